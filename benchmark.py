@@ -0,0 +1,433 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import timeit
+import numpy as np
+import ekf
+import grad_imf
+from input_output import generate_data_bulk
+from model_cache import clear_caches
+from model_registry import available_models, get_model
+from rmlm import rmle, rmle_recursive
+
+
+# Методы, пропускная способность которых измеряется
+ESTIMATORS = {
+    'rmle': rmle,
+    'rmle_recursive': rmle_recursive,
+    're_ekf': ekf.re_ekf,
+}
+
+# Количества наблюдений по умолчанию
+DEFAULT_N = (100, 1000, 10000)
+
+# Файл данных для проверки согласованности рекуррентного режима RMLM
+# (для модели по умолчанию) и количество наблюдений для других моделей
+CHECK_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data',
+                          'position_control_system200')
+CHECK_N = 200
+
+
+def measure(func, repeat=5, min_time=0.2) -> dict:
+    """ Функция измерения времени одного вызова функции
+
+        Количество вызовов в серии подбирается так, чтобы серия
+        длилась не меньше min_time, результатом является
+        минимальное по repeat сериям время вызова.
+
+        Parameters
+        ----------
+            func: function
+                функция без параметров
+            repeat: int
+                количество серий
+            min_time: float
+                минимальная длительность серии
+
+        Returns
+        ----------
+            dict
+                время одного вызова per_call и количество
+                вызовов в серии calls
+    """
+    timer = timeit.Timer(func)
+    calls, elapsed = timer.autorange()
+    calls = max(int(calls * min_time / max(elapsed, 1e-9)), 1)
+    best = min(timer.repeat(repeat=repeat, number=calls))
+    return {'per_call': best / calls, 'calls': calls}
+
+
+def _latency_targets(model=None) -> dict:
+    """ Функция формирования измеряемых функций
+
+        Функции модели измеряются как с кэшем (повторный вызов с теми же
+        аргументами), так и без него (вызов исходной функции).
+
+        Parameters
+        ----------
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+
+        Returns
+        ----------
+            dict
+                название -> функция без параметров
+    """
+    model = get_model(model)
+    conventional_model, extended_model = model.conventional, model.extended
+    s, theta = model.common.get_data_theta()
+    t = model.common.get_t0()
+    n, m, r = conventional_model.get_data()
+    y = np.ones(m)
+    targets = {
+        'grad_imf_evaluation(N=100)':
+            lambda: grad_imf.grad_imf_evaluation(theta, 100, n, m, r, s, y, model),
+        'eval_ci': lambda: grad_imf.eval_ci(1, n, s),
+    }
+
+    # Функции расширенного фильтра Калмана
+    # -----------------------------------------
+    nA = extended_model.get_data()[0]
+    x = extended_model.get_x0(theta)
+    p = extended_model.get_P0()
+    x_prediction, p_prediction = ekf.prediction(x, p, t, model)
+    targets['ekf.prediction'] = lambda: ekf.prediction(x, p, t, model)
+    targets['ekf.update'] = lambda: ekf.update(nA, x_prediction, p_prediction, y, t, model)
+    # -----------------------------------------
+
+    # Функции моделей
+    # -----------------------------------------
+    models = {
+        'conventional_model': (conventional_model, (t, theta),
+                               ('get_F', 'get_dFdtheta', 'get_Psi', 'get_dPsidtheta', 'get_H',
+                                'get_dHdtheta', 'get_R', 'get_dRdtheta', 'get_inv_R')),
+        'extended_model': (extended_model, (t, x), ('get_f', 'get_F', 'get_psi', 'get_h',
+                                                    'get_H', 'get_R')),
+    }
+    for model_name, (namespace, args, names) in models.items():
+        for name in names:
+            func = getattr(namespace, name)
+            targets[f'{model_name}.{name}'] = lambda func=func, args=args: func(*args)
+            if hasattr(func, '__wrapped__'):
+                targets[f'{model_name}.{name}[uncached]'] = \
+                    lambda func=func.__wrapped__, args=args: func(*args)
+    for model_name, namespace, names in (('conventional_model', conventional_model, ('get_u', )),
+                                         ('extended_model', extended_model,
+                                          ('get_u', 'get_G', 'get_Q'))):
+        for name in names:
+            targets[f'{model_name}.{name}'] = lambda func=getattr(namespace, name): func(t)
+    targets['conventional_model.get_xt0'] = conventional_model.get_xt0
+    targets['conventional_model.get_dxt0dtheta'] = conventional_model.get_dxt0dtheta
+    targets['extended_model.get_P0'] = extended_model.get_P0
+    targets['extended_model.get_x0'] = lambda: extended_model.get_x0(theta)
+    # -----------------------------------------
+    return targets
+
+
+def run_latency(repeat=5, min_time=0.2, model=None) -> dict:
+    """ Функция измерения времени вызова функций методов и моделей
+
+        Parameters
+        ----------
+            repeat: int
+                количество серий
+            min_time: float
+                минимальная длительность серии
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+
+        Returns
+        ----------
+            dict
+                название функции -> результат measure
+    """
+    return {name: measure(func, repeat, min_time)
+            for name, func in _latency_targets(model).items()}
+
+
+def fit_exponent(N, times) -> float:
+    """ Функция оценки показателя степени зависимости
+        времени работы от количества наблюдений time ~ N^p
+
+        Parameters
+        ----------
+            N: list
+                количества наблюдений
+            times: list
+                времена работы
+
+        Returns
+        ----------
+            float
+                показатель степени p (NaN при менее чем двух точках)
+    """
+    if len(N) < 2:
+        return float('nan')
+    return float(np.polyfit(np.log(N), np.log(times), 1)[0])
+
+
+def run_throughput(Ns=DEFAULT_N, estimators=tuple(ESTIMATORS), budget=60., seed=0,
+                   repeat=3, model=None) -> dict:
+    """ Функция измерения пропускной способности методов
+
+        Для каждого метода количество наблюдений увеличивается по Ns,
+        пока время одного запуска не превысит budget. Перед запуском его
+        время предсказывается по последнему измерению и показателю
+        степени, оцененному по уже выполненным запускам (не меньше 1),
+        и запуски с предсказанным временем больше budget не выполняются.
+        Запуски короче секунды повторяются repeat раз, и берется
+        минимальное время.
+
+        Parameters
+        ----------
+            Ns: tuple
+                количества наблюдений в порядке возрастания
+            estimators: tuple
+                названия методов (см. ESTIMATORS)
+            budget: float
+                предельное время запуска, после превышения которого
+                большие N не измеряются
+            seed: int
+                начальное значение генератора данных
+            repeat: int
+                количество повторений коротких запусков
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+
+        Returns
+        ----------
+            dict
+                название метода -> количества наблюдений N, времена работы
+                time, пропускная способность throughput (наблюдений в
+                секунду), показатель степени exponent, N запусков,
+                завершившихся расходимостью, failed и N запусков,
+                пропущенных по предсказанному времени, skipped
+    """
+    model = get_model(model)
+    s, theta_true = model.common.get_data_theta()
+    results = {}
+    with tempfile.TemporaryDirectory() as data_dir:
+        files = {}
+        for N in Ns:
+            files[N] = os.path.join(data_dir, f'benchmark{N}')
+            generate_data_bulk(N, theta_true, files[N], seed=seed, model=model)
+
+        for name in estimators:
+            result = {'N': [], 'time': [], 'throughput': [], 'failed': [], 'skipped': []}
+            for N in Ns:
+                # Предсказание времени запуска по выполненным запускам
+                # -----------------------------------------
+                if result['N']:
+                    exponent = max(fit_exponent(result['N'], result['time']), 1.) \
+                        if len(result['N']) > 1 else 1.
+                    predicted = result['time'][-1] * (N / result['N'][-1]) ** exponent
+                    if predicted > budget:
+                        result['skipped'] = [N_skip for N_skip in Ns if N_skip >= N]
+                        break
+                # -----------------------------------------
+                elapsed = float('inf')
+                try:
+                    for k in range(repeat):
+                        clear_caches()
+                        start = time.perf_counter()
+                        with np.errstate(all='ignore'):
+                            ESTIMATORS[name](theta_true, files[N], s, model=model)
+                        elapsed = min(elapsed, time.perf_counter() - start)
+                        if elapsed > 1.:
+                            break
+                except (ArithmeticError, np.linalg.LinAlgError):
+                    result['failed'].append(N)
+                    continue
+                result['N'].append(N)
+                result['time'].append(elapsed)
+                result['throughput'].append(N / elapsed)
+                if elapsed > budget:
+                    break
+            result['exponent'] = fit_exponent(result['N'], result['time'])
+            results[name] = result
+    return results
+
+
+def check_recursive(f_name, init_theta, s, tol=1e-10, model=None) -> dict:
+    """ Функция проверки согласованности рекуррентного режима RMLM
+        (rmle_recursive) с методом с повторным проходом (rmle)
+
+        При пересчете на каждом шаге по всей истории (relin_period=1,
+        replay_length=None) оценки обоих методов должны совпадать;
+        отклонение в режиме по умолчанию приводится для сведения. В
+        режиме по умолчанию количество шагов, повторно пройденных при
+        одном пересчете, не должно зависеть от количества наблюдений:
+        пересчет длиннее половины наблюдений означает проход по всей
+        истории за время O(N).
+
+        Parameters
+        ----------
+            f_name: str
+                имя файла с данными наблюдений
+            init_theta: np.ndarray
+                s-вектор начальных значений параметров
+            s: int
+                размер вектора параметров
+            tol: float
+                допустимое отклонение оценок при relin_period=1
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+
+        Returns
+        ----------
+            dict
+                наибольшие по траектории отклонения оценок от rmle при
+                relin_period=1 (relin_period_1) и в режиме по умолчанию
+                (default), среднее количество повторно пройденных шагов
+                на наблюдение (replayed_per_observation) и наибольшее
+                количество шагов одного пересчета (max_replay) в режиме
+                по умолчанию, признаки согласованности (consistent),
+                ограниченности пересчета (bounded) и прохождения
+                проверки passed
+    """
+    reference = rmle(init_theta, f_name, s, model=model)
+    result = {}
+    stats = {}
+    for name, options in (('relin_period_1', {'relin_period': 1, 'replay_length': None}),
+                          ('default', {'stats': stats})):
+        theta_est = rmle_recursive(init_theta, f_name, s, model=model, **options)
+        result[name] = float(np.max(np.abs(theta_est - reference)))
+    result['replayed_per_observation'] = stats['replayed'] / stats['observations']
+    result['max_replay'] = stats['max_replay']
+    result['consistent'] = bool(result['relin_period_1'] <= tol)
+    result['bounded'] = bool(stats['max_replay'] <= stats['observations'] // 2)
+    result['passed'] = result['consistent'] and result['bounded']
+    return result
+
+
+def compare(current, baseline, threshold=0.1) -> list[str]:
+    """ Функция сравнения пропускной способности с эталонной
+
+        Parameters
+        ----------
+            current: dict
+                текущие результаты (см. main)
+            baseline: dict
+                эталонные результаты
+            threshold: float
+                допустимое относительное снижение пропускной способности
+
+        Returns
+        ----------
+            list
+                описания случаев снижения пропускной
+                способности больше допустимого
+    """
+    regressions = []
+    for name, result in current.get('throughput', {}).items():
+        base = baseline.get('throughput', {}).get(name)
+        if base is None:
+            continue
+        base_throughput = dict(zip(base['N'], base['throughput']))
+        for N, throughput in zip(result['N'], result['throughput']):
+            if N in base_throughput and throughput < (1 - threshold) * base_throughput[N]:
+                regressions.append(f'{name} N={N}: {throughput:.1f} < {base_throughput[N]:.1f} '
+                                   f'наблюдений/с ({throughput / base_throughput[N] - 1:+.1%})')
+    return regressions
+
+
+def main(argv=None) -> int:
+    """ Функция запуска набора тестов производительности
+
+        Parameters
+        ----------
+            argv: list
+                аргументы командной строки (по умолчанию sys.argv[1:])
+
+        Returns
+        ----------
+            int
+                код завершения: 1 при снижении пропускной способности
+                относительно эталона или при несогласованности
+                рекуррентного режима RMLM, иначе 0
+    """
+    parser = argparse.ArgumentParser(description='Тесты производительности методов оценивания')
+    parser.add_argument('--output', default='benchmark.json', help='файл результатов (JSON)')
+    parser.add_argument('--N', type=int, nargs='+', default=list(DEFAULT_N),
+                        help='количества наблюдений')
+    parser.add_argument('--estimators', nargs='+', choices=list(ESTIMATORS),
+                        default=list(ESTIMATORS), help='методы')
+    parser.add_argument('--budget', type=float, default=60.,
+                        help='предельное время запуска метода, с')
+    parser.add_argument('--no-latency', dest='latency', action='store_false',
+                        help='не измерять время вызова функций')
+    parser.add_argument('--no-check', dest='check', action='store_false',
+                        help='не проверять согласованность rmle_recursive с rmle')
+    parser.add_argument('--compare', help='файл эталонных результатов (JSON)')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='допустимое относительное снижение пропускной способности')
+    parser.add_argument('--model', default=None, choices=available_models(),
+                        help='модель системы (по умолчанию position_control_system)')
+    parser.add_argument('--model-options', dest='model_options', type=json.loads, default={},
+                        help='параметры модели (JSON), например {"n": 40, "s": 20}')
+    args = parser.parse_args(argv)
+    model = get_model(args.model, **args.model_options)
+
+    # Проверка согласованности рекуррентного режима RMLM на данных из
+    # репозитория (для модели по умолчанию) или на сгенерированных данных
+    # -----------------------------------------
+    check = {}
+    if args.check:
+        s, theta_true = model.common.get_data_theta()
+        if model is get_model():
+            check = check_recursive(CHECK_DATA, np.ones(s), s, model=model)
+        else:
+            with tempfile.TemporaryDirectory() as data_dir:
+                f_name = os.path.join(data_dir, 'check')
+                generate_data_bulk(CHECK_N, theta_true, f_name, seed=0, model=model)
+                check = check_recursive(f_name, theta_true, s, model=model)
+    # -----------------------------------------
+
+    results = {
+        'metadata': {'created': time.time(), 'python': platform.python_version(),
+                     'numpy': np.__version__, 'machine': platform.machine(),
+                     'processor': platform.processor(), 'model': model.name,
+                     'model_options': model.options},
+        'latency': run_latency(model=model) if args.latency else {},
+        'throughput': run_throughput(sorted(args.N), args.estimators, args.budget, model=model),
+        'check': check,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    for name, latency in results['latency'].items():
+        print('%-48s %12.3f us' % (name, latency['per_call'] * 1e6))
+    for name, result in results['throughput'].items():
+        for N, elapsed, throughput in zip(result['N'], result['time'], result['throughput']):
+            print('%-16s N=%-8d %10.3f s %12.1f obs/s' % (name, N, elapsed, throughput))
+        print('%-16s exponent %.2f' % (name, result['exponent']))
+        if result['skipped']:
+            print('%-16s skipped N=%s (predicted time over budget)'
+                  % (name, ', '.join(map(str, result['skipped']))))
+
+    failed = False
+    if check:
+        print('rmle_recursive - rmle: relin_period=1 %.3g, default %.3g'
+              % (check['relin_period_1'], check['default']))
+        print('rmle_recursive replay: %.2f steps/observation, longest %d'
+              % (check['replayed_per_observation'], check['max_replay']))
+        if not check['consistent']:
+            print('MISMATCH rmle_recursive(relin_period=1) differs from rmle')
+        if not check['bounded']:
+            print('UNBOUNDED rmle_recursive replays grow with the number of observations')
+        failed = not check['passed']
+    if args.compare is not None:
+        with open(args.compare, 'r') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print('REGRESSION', regression)
+        failed = failed or bool(regressions)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
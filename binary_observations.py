@@ -0,0 +1,208 @@
+import numpy as np
+from position_control_system.common_data import get_t0, get_t_step
+
+
+# Признак файла наблюдений в двоичном формате
+MAGIC = b'\x89OBSBIN\n'
+
+# Версия двоичного формата
+VERSION = 2
+
+# Заголовок файла: признак, версия, размер вектора измерений, количество
+# наблюдений, тип данных, начальный момент времени, шаг времени и
+# количество независимых реализаций (с версии 2, 0 - одна реализация).
+# Данные наблюдений следуют за заголовком непрерывным (N x m)-массивом,
+# а при нескольких реализациях - (N x B x m)-массивом
+HEADER_DTYPE = np.dtype([('magic', 'S8'), ('version', '<u4'), ('m', '<u4'), ('N', '<u8'),
+                         ('dtype', 'S8'), ('t0', '<f8'), ('step', '<f8'), ('B', '<u8'),
+                         ('reserved', 'V8')])
+
+
+def is_binary(f_name):
+    """ Функция проверки того, что файл наблюдений
+        записан в двоичном формате
+
+        Parameters
+        ----------
+            f_name: str
+                имя файла с данными наблюдений
+
+        Returns
+        ----------
+            bool
+                признак двоичного формата
+    """
+    with open(f_name, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def write_header(f, m, N, dtype='<f8', B=1, t0=None, step=None):
+    """ Процедура записи заголовка файла наблюдений в двоичном формате
+        в текущую позицию файла
+
+        Parameters
+        ----------
+            f:
+                указатель на файл, открытый для записи в двоичном режиме
+        ----------
+            m: int
+                размер вектора измерений
+            N: int
+                количество наблюдений
+            dtype: str
+                тип данных наблюдений
+            B: int
+                количество независимых реализаций
+            t0: float
+                начальный момент времени (по умолчанию get_t0())
+            step: float
+                шаг времени (по умолчанию get_t_step())
+    """
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header['magic'] = MAGIC
+    header['version'] = VERSION
+    header['m'] = m
+    header['N'] = N
+    header['dtype'] = np.dtype(dtype).str.encode()
+    header['t0'] = get_t0() if t0 is None else t0
+    header['step'] = get_t_step() if step is None else step
+    header['B'] = B
+    header.tofile(f)
+
+
+def read_header(f_name) -> dict:
+    """ Функция чтения заголовка файла наблюдений
+        в двоичном формате
+
+        Parameters
+        ----------
+            f_name: str
+                имя файла с данными наблюдений
+
+        Returns
+        ----------
+            dict
+                размер вектора измерений m, количество наблюдений N,
+                тип данных dtype, начальный момент времени t0, шаг
+                времени step и количество реализаций B
+    """
+    header = np.fromfile(f_name, dtype=HEADER_DTYPE, count=1)
+    if len(header) == 0 or header['magic'][0] != MAGIC:
+        raise ValueError(f'{f_name} не является файлом наблюдений в двоичном формате')
+    if header['version'][0] > VERSION:
+        raise ValueError(f'неподдерживаемая версия формата {header["version"][0]} в {f_name}')
+    return {'m': int(header['m'][0]), 'N': int(header['N'][0]),
+            'dtype': np.dtype(header['dtype'][0].decode()),
+            't0': float(header['t0'][0]), 'step': float(header['step'][0]),
+            'B': max(int(header['B'][0]), 1)}
+
+
+def open_binary(f_name) -> tuple[dict, np.ndarray]:
+    """ Функция отображения файла наблюдений в двоичном
+        формате в память
+
+        Срезы возвращаемого массива не копируют данные, поэтому
+        наблюдение с любым номером доступно без чтения предыдущих.
+
+        Parameters
+        ----------
+            f_name: str
+                имя файла с данными наблюдений
+
+        Returns
+        ----------
+            header, Y: dict, np.memmap
+                заголовок файла (см. read_header),
+                (N x m)-массив наблюдений (при нескольких реализациях -
+                (N x B x m)-массив) только для чтения
+    """
+    header = read_header(f_name)
+    shape = (header['N'], header['m']) if header['B'] == 1 else \
+        (header['N'], header['B'], header['m'])
+    if header['N'] == 0:
+        return header, np.empty(shape=shape, dtype=header['dtype'])
+    Y = np.memmap(f_name, dtype=header['dtype'], mode='r', offset=HEADER_DTYPE.itemsize,
+                  shape=shape)
+    return header, Y
+
+
+def write_binary(f_name, Y, dtype='<f8', t0=None, step=None):
+    """ Процедура записи наблюдений в файл в двоичном формате
+
+        Parameters
+        ----------
+            f_name: str
+                имя файла для записи наблюдений
+            Y: np.ndarray
+                (N x m)-массив наблюдений или (N x B x m)-массив
+                наблюдений B независимых реализаций
+            dtype: str
+                тип данных наблюдений в файле
+            t0: float
+                начальный момент времени (по умолчанию get_t0())
+            step: float
+                шаг времени (по умолчанию get_t_step())
+    """
+    Y = np.asarray(Y, dtype=dtype)
+    B = Y.shape[1] if Y.ndim == 3 else 1
+    with open(f_name, 'wb') as f:
+        write_header(f, Y.shape[-1], Y.shape[0], dtype, B, t0, step)
+        np.ascontiguousarray(Y).tofile(f)
+
+
+def text_to_binary(text_name, binary_name, dtype='<f8', chunk=1 << 16):
+    """ Процедура преобразования файла наблюдений из текстового
+        формата в двоичный
+
+        Файл обрабатывается блоками по chunk строк, поэтому
+        объем памяти не зависит от количества наблюдений.
+
+        Parameters
+        ----------
+            text_name: str
+                имя файла с данными наблюдений в текстовом формате
+            binary_name: str
+                имя файла для записи наблюдений в двоичном формате
+            dtype: str
+                тип данных наблюдений в файле
+            chunk: int
+                количество строк в блоке
+    """
+    N = 0
+    m = 0
+    with open(text_name, 'r') as f_in, open(binary_name, 'wb') as f_out:
+        # Запись заголовка с количеством наблюдений, уточняемым в конце
+        write_header(f_out, 0, 0, dtype)
+        while True:
+            lines = [line for _, line in zip(range(chunk), f_in) if line.strip()]
+            if not lines:
+                break
+            if m == 0:
+                m = len(lines[0].split())
+            block = np.array(' '.join(lines).split(), dtype=dtype).reshape(-1, m)
+            block.tofile(f_out)
+            N += len(block)
+        f_out.seek(0)
+        write_header(f_out, m, N, dtype)
+
+
+def binary_to_text(binary_name, text_name, chunk=1 << 16):
+    """ Процедура преобразования файла наблюдений из двоичного
+        формата в текстовый
+
+        Parameters
+        ----------
+            binary_name: str
+                имя файла с данными наблюдений в двоичном формате
+            text_name: str
+                имя файла для записи наблюдений в текстовом формате
+            chunk: int
+                количество наблюдений в блоке
+    """
+    header, Y = open_binary(binary_name)
+    if header['B'] != 1:
+        raise ValueError(f'{binary_name} содержит {header["B"]} реализаций, '
+                         f'текстовый формат допускает одну')
+    with open(text_name, 'w') as f:
+        for k in range(0, header['N'], chunk):
+            np.savetxt(f, Y[k:k + chunk], fmt='%f', delimiter=' ')
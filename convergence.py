@@ -0,0 +1,136 @@
+from collections import deque
+import numpy as np
+import numpy.linalg as npl
+
+
+class ConvergenceMonitor:
+    """ Монитор сходимости оценок параметров для досрочной
+        остановки рекуррентных методов
+
+        Генераторы оценок (iter_rmle, iter_rmle_recursive, iter_ekf)
+        передают монитору каждую новую оценку и доступные им величины:
+        градиент критерия максимального правдоподобия (RMLM) или след
+        блока ковариационной матрицы ошибки оценивания, отвечающего
+        параметрам (EKF). Оценивание прекращается, когда все заданные
+        критерии выполняются patience наблюдений подряд. Критерии,
+        величины для которых метод не передает, не проверяются.
+    """
+
+    def __init__(self, theta_tol=None, window=10, grad_tol=None, cov_tol=None,
+                 min_observations=None, patience=1):
+        """ Parameters
+            ----------
+                theta_tol: float
+                    допуск относительного изменения оценки за window
+                    наблюдений ||theta_N - theta_(N - window)|| / ||theta_N||
+                    (None - не проверять)
+                window: int
+                    размер окна наблюдений для критериев изменения оценки
+                    и градиента
+                grad_tol: float
+                    допуск нормы среднего по окну градиента критерия
+                    максимального правдоподобия (None - не проверять)
+                cov_tol: float
+                    допуск следа блока ковариационной матрицы ошибки
+                    оценивания, отвечающего параметрам (None - не проверять)
+                min_observations: int
+                    минимальное количество наблюдений до остановки
+                    (по умолчанию window)
+                patience: int
+                    количество наблюдений подряд, на которых должны
+                    выполняться критерии
+        """
+        if theta_tol is None and grad_tol is None and cov_tol is None:
+            raise ValueError('не задан ни один критерий сходимости')
+        self.theta_tol = theta_tol
+        self.window = window
+        self.grad_tol = grad_tol
+        self.cov_tol = cov_tol
+        self.min_observations = window if min_observations is None else min_observations
+        self.patience = patience
+        self.reset()
+
+    def reset(self):
+        """ Процедура подготовки монитора к новому запуску метода
+        """
+        self.count = 0
+        self.satisfied = 0
+        self.stop_index = None
+        self.thetas = deque(maxlen=self.window + 1)
+        self.grads = deque(maxlen=self.window)
+        self.grad_sum = None
+        self.values = {}
+
+    def update(self, theta, grad=None, cov_trace=None) -> bool:
+        """ Функция учета очередной оценки и проверки критериев
+
+            Parameters
+            ----------
+                theta: np.ndarray
+                    s-вектор оценки параметров после очередного наблюдения
+                grad: np.ndarray
+                    s-вектор градиента критерия максимального
+                    правдоподобия на очередном наблюдении
+                cov_trace: float
+                    след блока ковариационной матрицы ошибки
+                    оценивания, отвечающего параметрам
+
+            Returns
+            ----------
+                bool
+                    признак остановки: критерии выполняются patience
+                    наблюдений подряд
+        """
+        self.count += 1
+        theta = np.array(theta, dtype=float)
+        self.thetas.append(theta)
+
+        # Вычисление величин, по которым проверяются критерии
+        # -----------------------------------------
+        values = {}
+        if self.theta_tol is not None and len(self.thetas) == self.thetas.maxlen:
+            values['theta_change'] = float(npl.norm(theta - self.thetas[0]) / npl.norm(theta))
+        if self.grad_tol is not None and grad is not None:
+            grad = np.array(grad, dtype=float)
+            # Скользящая сумма градиентов по окну
+            if len(self.grads) == self.window:
+                self.grad_sum -= self.grads[0]
+            self.grad_sum = grad.copy() if self.grad_sum is None else self.grad_sum + grad
+            self.grads.append(grad)
+            if len(self.grads) == self.window:
+                values['grad_norm'] = float(npl.norm(self.grad_sum / self.window))
+        if self.cov_tol is not None and cov_trace is not None:
+            values['cov_trace'] = float(cov_trace)
+        self.values = values
+        # -----------------------------------------
+
+        # Проверка критериев: величины всех заданных критериев, которые
+        # может вычислить метод, должны быть получены и не превышать допуски
+        # -----------------------------------------
+        tolerances = {'theta_change': self.theta_tol, 'grad_norm': self.grad_tol,
+                      'cov_trace': self.cov_tol}
+        required = [name for name, tol in tolerances.items() if tol is not None and
+                    (name != 'grad_norm' or grad is not None) and
+                    (name != 'cov_trace' or cov_trace is not None)]
+        met = bool(required) and all(name in values and values[name] <= tolerances[name]
+                                     for name in required)
+        # -----------------------------------------
+
+        self.satisfied = self.satisfied + 1 if met else 0
+        if self.count >= self.min_observations and self.satisfied >= self.patience:
+            self.stop_index = self.count
+            return True
+        return False
+
+    def result(self) -> dict:
+        """ Функция получения сведений о работе монитора
+
+            Returns
+            ----------
+                dict
+                    количество учтенных наблюдений count, номер наблюдения,
+                    на котором выполнена остановка, stop_index (None, если
+                    остановки не было), последние значения проверяемых
+                    величин values
+        """
+        return {'count': self.count, 'stop_index': self.stop_index, 'values': dict(self.values)}
@@ -1,10 +1,104 @@
-import re
+import numpy as np
 import numpy.linalg as npl
-from position_control_system.extended_model import *
-from position_control_system.common_data import *
+try:
+    from scipy.linalg import solve_triangular
+except ImportError:
+    solve_triangular = None
+from input_output import read_observations, count_observations
+from model_registry import get_model
+from trajectory import collect_trajectory
+import profiling
 
 
-def re_ekf(init_theta, f_name, s):
+# Псевдообращение через имя модуля: при профилировании заменяется
+# только вызов из этого модуля, а не numpy.linalg.pinv всего процесса
+_pinv = npl.pinv
+
+
+def iter_ekf(init_theta, observations, s, square_root=False, monitor=None, model=None, P0=None):
+    """ Генератор оценок параметров, получаемых с помощью
+        расширенного фильтра Калмана
+
+        Parameters
+        ----------
+            init_theta: np.ndarray
+                s-вектор начальных значений параметров
+            observations: str or iterable
+                имя файла с данными наблюдений или
+                последовательность m-векторов наблюдений
+            s: int
+                размер вектора параметров
+            square_root: bool
+                признак использования квадратно-корневой формы фильтра,
+                в которой вместо ковариационной матрицы ошибки оценивания
+                распространяется ее множитель Холецкого. Начальная
+                ковариационная матрица должна быть неотрицательно
+                определенной, иначе ValueError; get_P0 модели
+                position_control_system такой не является, и для нее
+                задается P0
+            monitor: ConvergenceMonitor
+                монитор сходимости, по сигналу которого оценивание
+                прекращается досрочно (None - до конца наблюдений)
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+            P0: np.ndarray
+                (n x n)-ковариационная матрица оценки вектора начального
+                состояния расширенной модели (None - get_P0 модели)
+
+        Yields
+        ----------
+            np.ndarray
+                s-вектор оценки параметров после очередного наблюдения
+    """
+
+    # Блок подготовки
+    # -----------------------------------------
+    # Инициализация начальных условия для работы фильтра
+    model = get_model(model)
+    n, m, r = model.extended.get_data()
+    x_prev = model.extended.get_x0(init_theta)
+    p_prev = model.extended.get_P0() if P0 is None else np.array(P0, dtype=float)
+    t = model.common.get_t0()
+    if isinstance(observations, str):
+        observations = read_observations(observations)
+    # Выбор формы фильтра
+    if square_root:
+        p_prev = sqrt_factor(p_prev)
+        predict, correct = prediction_sqrt, update_sqrt
+    else:
+        predict, correct = prediction, update
+    # -----------------------------------------
+
+    # Считывание нового наблюдения, если оно есть
+    for y in observations:
+        # Блок предсказания
+        # -----------------------------------------
+        x_prediction, p_prediction = predict(x_prev, p_prev, t, model)
+        x_prediction = np.reshape(x_prediction, n)
+        # -----------------------------------------
+
+        # Блок коррекции
+        # -----------------------------------------
+        t = model.common.get_t_next(t)
+        x_prev, p_prev = correct(n, x_prediction, p_prediction, y, t, model)
+        # -----------------------------------------
+        yield x_prev[n - s:]
+
+        # Проверка сходимости оценок по следу блока ковариационной
+        # матрицы, отвечающего параметрам (для квадратно-корневой
+        # формы - по сумме квадратов строк множителя)
+        # -----------------------------------------
+        if monitor is not None:
+            if square_root:
+                cov_trace = np.sum(p_prev[n - s:] ** 2)
+            else:
+                cov_trace = np.trace(p_prev[n - s:, n - s:])
+            if monitor.update(x_prev[n - s:], cov_trace=cov_trace):
+                return
+        # -----------------------------------------
+
+
+def re_ekf(init_theta, f_name, s, square_root=False, monitor=None, model=None, P0=None):
     """ Функция рекуррентного оценивания параметров
         с импользованием расширенного фильтра Калмана
 
@@ -16,50 +110,30 @@ def re_ekf(init_theta, f_name, s):
                 имя файла с данными наблюдений
             s: int
                 размер вектора параметров
+            square_root: bool
+                признак использования квадратно-корневой формы фильтра
+                (требует неотрицательно определенной P0, см. iter_ekf)
+            monitor: ConvergenceMonitor
+                монитор сходимости (None - без досрочной остановки)
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+            P0: np.ndarray
+                (n x n)-ковариационная матрица оценки вектора начального
+                состояния расширенной модели (None - get_P0 модели)
 
         Returns
         ----------
             theta_est: np.ndarray
-                (N + 1) x s-вектор оценок параметров
+                (N + 1) x s-вектор оценок параметров (при досрочной
+                остановке - (monitor.stop_index + 1) x s)
     """
+    with profiling.stage('re_ekf'):
+        N = count_observations(f_name)
+        return collect_trajectory(init_theta, iter_ekf(init_theta, f_name, s, square_root, monitor,
+                                                       model, P0), N)
 
-    # Блок подготовки
-    # -----------------------------------------
-    # Инициализация начальных условия для работы фильтра
-    n, m, r = get_data()
-    x_prev = get_x0(init_theta)
-    p_prev = get_P0()
-    x_filtered = np.array([x_prev[n - s:]])
-    t = get_t0()
-    N = 0
-    # -----------------------------------------
-    # Открытие файла с данными наблюдений для чтения
-    with open(f_name, 'r') as f:
-        # Считывание нового наблюдения, если оно есть
-        for line in f:
-            # Сохранение считанного наблюдения в нужном формате
-            y = np.array(re.split('[ 	]', line)).astype(np.float)
-            # Увеличение счетчика наблюдений на единицу
-            N += 1
-
-            # Блок предсказания
-            # -----------------------------------------
-            x_prediction, p_prediction = prediction(x_prev, p_prev, t)
-            x_prediction = np.reshape(x_prediction, n)
-            # -----------------------------------------
-
-            # Блок коррекции
-            # -----------------------------------------
-            t = get_t_next(t)
-            x_prev, p_prev = update(n, x_prediction, p_prediction, y, t)
-            # Сохранение полученной оценки
-            x_filtered = np.append(x_filtered, np.array([x_prev[n - s:]]), axis=0)
-            # -----------------------------------------
-
-    return x_filtered
-
-
-def prediction(x_prev, p_prev, t) -> tuple[np.ndarray, np.ndarray]:
+
+def prediction(x_prev, p_prev, t, model=None) -> tuple[np.ndarray, np.ndarray]:
     """ Блок предсказания для расширенного фильтра Калмана
 
         Parameters
@@ -71,6 +145,8 @@ def prediction(x_prev, p_prev, t) -> tuple[np.ndarray, np.ndarray]:
                 на предыдущем шаге по времени
             t: float
                 текущий момент времени
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
 
         Returns
         -------
@@ -82,12 +158,13 @@ def prediction(x_prev, p_prev, t) -> tuple[np.ndarray, np.ndarray]:
 
     # Обновление матриц модели
     # -----------------------------------------
-    f = get_f(t, x_prev)
-    F = get_F(t, x_prev)
-    psi = get_psi(t, x_prev)
-    u = get_u(t)
-    G = get_G(t)
-    Q = get_Q(t)
+    model = get_model(model).extended
+    f = model.get_f(t, x_prev)
+    F = model.get_F(t, x_prev)
+    psi = model.get_psi(t, x_prev)
+    u = model.get_u(t)
+    G = model.get_G(t)
+    Q = model.get_Q(t)
     # -----------------------------------------
 
     # Оценка одношагового прогнозирования
@@ -100,7 +177,7 @@ def prediction(x_prev, p_prev, t) -> tuple[np.ndarray, np.ndarray]:
     return x_prediction, p_prediction
 
 
-def update(n, x_prediction, p_prediction, y_curr, t) \
+def update(n, x_prediction, p_prediction, y_curr, t, model=None) \
         -> tuple[np.ndarray, np.ndarray]:
     """ Блок коррекции для расширенного фильтра Калмана
 
@@ -117,6 +194,8 @@ def update(n, x_prediction, p_prediction, y_curr, t) \
                 m-вектор измерения в текущий момент времени
             t: float
                 текущий момент времени
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
 
         Returns
         -------
@@ -127,15 +206,16 @@ def update(n, x_prediction, p_prediction, y_curr, t) \
 
     # Обновление матриц модели
     # -----------------------------------------
-    h = get_h(t, x_prediction)
-    H = get_H(t, x_prediction)
-    R = get_R(t, x_prediction)
+    model = get_model(model).extended
+    h = model.get_h(t, x_prediction)
+    H = model.get_H(t, x_prediction)
+    R = model.get_R(t, x_prediction)
     # -----------------------------------------
 
     # Вычисление коэффициента усиления Калмана
     # -----------------------------------------
     b = H @ p_prediction @ H.T + R
-    k = p_prediction @ H.T @ npl.pinv(b)
+    k = p_prediction @ H.T @ _pinv(b)
     # -----------------------------------------
 
     # Оценка фильтрации
@@ -148,3 +228,346 @@ def update(n, x_prediction, p_prediction, y_curr, t) \
     p_filtered = (np.eye(n) - k @ H) @ p_prediction
 
     return x_filtered, p_filtered
+
+
+def sqrt_factor(p):
+    """ Функция вычисления нижнего треугольного множителя
+        ковариационной матрицы
+
+        Отрицательные собственные значения порядка ошибок округления
+        заменяются нулями. Матрица, не являющаяся неотрицательно
+        определенной (например, get_P0 модели position_control_system),
+        не раскладывается: фильтр с ближайшей неотрицательно определенной
+        матрицей давал бы другие оценки, чем обычная форма фильтра.
+
+        Parameters
+        ----------
+            p: ndarray
+                (n x n)-ковариационная матрица
+
+        Returns
+        -------
+            ndarray
+                (n x n)-нижняя треугольная матрица s, такая что s s^T = p
+    """
+    eigenvalues, eigenvectors = npl.eigh((p + p.T) / 2)
+    tol = len(p) * np.finfo(float).eps * np.max(np.abs(eigenvalues))
+    if eigenvalues[0] < -tol:
+        raise ValueError(f'ковариационная матрица не является неотрицательно определенной '
+                         f'(наименьшее собственное значение {eigenvalues[0]:.3g}), '
+                         f'квадратно-корневая форма фильтра неприменима')
+    a = eigenvectors * np.sqrt(np.maximum(eigenvalues, 0))
+    return npl.qr(a.T, mode='r').T
+
+
+def _solve_lower(l, b):
+    """ Функция решения системы с нижней треугольной матрицей
+        (scipy.linalg.solve_triangular, без scipy - numpy.linalg.solve)
+
+        Parameters
+        ----------
+            l: ndarray
+                (m x m)-нижняя треугольная матрица
+            b: ndarray
+                m-вектор правой части
+
+        Returns
+        -------
+            ndarray
+                m-вектор решения системы l x = b
+    """
+    if solve_triangular is None:
+        return npl.solve(l, b)
+    return solve_triangular(l, b, lower=True)
+
+
+def prediction_sqrt(x_prev, s_prev, t, model=None) -> tuple[np.ndarray, np.ndarray]:
+    """ Блок предсказания для квадратно-корневой формы
+        расширенного фильтра Калмана
+
+        Множитель ковариационной матрицы ошибки прогнозирования
+        находится QR-разложением матрицы [F s, G Q^(1/2)].
+
+        Parameters
+        ----------
+            x_prev: ndarray
+                n-вектор состояния на предыдущем шаге по времени
+            s_prev: ndarray
+                (n x n)-нижний треугольный множитель ковариационной
+                матрицы ошибки оценивания на предыдущем шаге по времени
+            t: float
+                текущий момент времени
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+
+        Returns
+        -------
+            x_prediction, s_prediction: ndarray, ndarray
+                n-вектор оценки одношагового прогнозирования,
+                (n x n)-нижний треугольный множитель ковариационной
+                матрицы ошибки одношагового прогнозирования
+    """
+
+    # Обновление матриц модели
+    # -----------------------------------------
+    model = get_model(model).extended
+    f = model.get_f(t, x_prev)
+    F = model.get_F(t, x_prev)
+    psi = model.get_psi(t, x_prev)
+    u = model.get_u(t)
+    G = model.get_G(t)
+    Q = model.get_Q(t)
+    # -----------------------------------------
+
+    # Оценка одношагового прогнозирования
+    x_prediction = f + psi @ u
+
+    # Вычисление множителя ковариационной матрицы ошибки
+    # одношагового прогнозирования
+    a = np.hstack((F @ s_prev, G @ npl.cholesky(Q)))
+    s_prediction = npl.qr(a.T, mode='r').T
+
+    return x_prediction, s_prediction
+
+
+def update_sqrt(n, x_prediction, s_prediction, y_curr, t, model=None) \
+        -> tuple[np.ndarray, np.ndarray]:
+    """ Блок коррекции для квадратно-корневой формы
+        расширенного фильтра Калмана
+
+        Множители ковариационных матриц невязки и ошибки оценивания
+        и нормированный коэффициент усиления находятся одним
+        QR-разложением блочной матрицы [[R^(1/2), H s], [0, s]].
+
+        Parameters
+        ----------
+            n: int
+                размер вектора состояния
+            x_prediction: ndarray
+                n-вектор оценки одношагового прогнозирования
+            s_prediction: ndarray
+                (n x n)-нижний треугольный множитель ковариационной
+                матрицы ошибки одношагового прогнозирования
+            y_curr: ndarray
+                m-вектор измерения в текущий момент времени
+            t: float
+                текущий момент времени
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+
+        Returns
+        -------
+            x_filtered, s_filtered: ndarray, ndarray
+                n-вектор оценки фильтрации
+                (n x n)-нижний треугольный множитель ковариационной
+                матрицы ошибки оценивания
+    """
+
+    # Обновление матриц модели
+    # -----------------------------------------
+    model = get_model(model).extended
+    h = model.get_h(t, x_prediction)
+    H = model.get_H(t, x_prediction)
+    R = model.get_R(t, x_prediction)
+    m = len(R)
+    # -----------------------------------------
+
+    # Треугольное разложение блочной матрицы
+    # -----------------------------------------
+    a = np.zeros(shape=(m + n, m + n))
+    a[:m, :m] = npl.cholesky(R)
+    a[:m, m:] = H @ s_prediction
+    a[m:, m:] = s_prediction
+    l = npl.qr(a.T, mode='r').T
+    # -----------------------------------------
+
+    # Оценка фильтрации
+    # -----------------------------------------
+    e = y_curr - h
+    x_filtered = x_prediction + l[m:, :m] @ _solve_lower(l[:m, :m], e)
+    # -----------------------------------------
+
+    return x_filtered, l[m:, m:]
+
+
+def prediction_batch(x_prev, p_prev, t, model=None) -> tuple[np.ndarray, np.ndarray]:
+    """ Блок предсказания для набора независимых
+        расширенных фильтров Калмана
+
+        Parameters
+        ----------
+            x_prev: ndarray
+                (B x n)-матрица векторов состояния на предыдущем
+                шаге по времени
+            p_prev: ndarray
+                (B x n x n)-массив ковариационных матриц ошибки
+                оценивания на предыдущем шаге по времени
+            t: float
+                текущий момент времени
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+
+        Returns
+        -------
+            x_prediction, p_prediction: ndarray, ndarray
+                (B x n)-матрица оценок одношагового прогнозирования,
+                (B x n x n)-массив ковариационных матриц ошибки
+                одношагового прогнозирования
+    """
+
+    # Обновление матриц модели
+    # -----------------------------------------
+    model = get_model(model).extended
+    f = model.get_f_batch(t, x_prev)
+    F = model.get_F_batch(t, x_prev)
+    psi = model.get_psi_batch(t, x_prev)
+    u = model.get_u(t)
+    G = model.get_G(t)
+    Q = model.get_Q(t)
+    # -----------------------------------------
+
+    # Оценки одношагового прогнозирования
+    x_prediction = f + (psi @ u)[:, :, 0]
+
+    # Вычисление ковариационных матриц ошибки
+    # одношагового прогнозирования
+    p_prediction = F @ p_prev @ np.transpose(F, (0, 2, 1)) + G @ Q @ G.T
+
+    return x_prediction, p_prediction
+
+
+def update_batch(n, x_prediction, p_prediction, y_curr, t, model=None) \
+        -> tuple[np.ndarray, np.ndarray]:
+    """ Блок коррекции для набора независимых
+        расширенных фильтров Калмана
+
+        Parameters
+        ----------
+            n: int
+                размер вектора состояния
+            x_prediction: ndarray
+                (B x n)-матрица оценок одношагового прогнозирования
+            p_prediction: ndarray
+                (B x n x n)-массив ковариационных матриц ошибки
+                одношагового прогнозирования
+            y_curr: ndarray
+                (B x m)-матрица измерений в текущий момент времени
+            t: float
+                текущий момент времени
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+
+        Returns
+        -------
+            x_filtered, p_filtered: ndarray, ndarray
+                (B x n)-матрица оценок фильтрации
+                (B x n x n)-массив ковариационных матриц
+                ошибки оценивания
+    """
+
+    # Обновление матриц модели
+    # -----------------------------------------
+    model = get_model(model).extended
+    h = model.get_h_batch(t, x_prediction)
+    H = model.get_H_batch(t, x_prediction)
+    R = model.get_R_batch(t, x_prediction)
+    # -----------------------------------------
+
+    # Вычисление коэффициентов усиления Калмана
+    # -----------------------------------------
+    HP = H @ p_prediction
+    b = HP @ np.transpose(H, (0, 2, 1)) + R
+    k = np.transpose(npl.solve(b, HP), (0, 2, 1))
+    # -----------------------------------------
+
+    # Оценки фильтрации
+    # -----------------------------------------
+    e = y_curr - h
+    x_filtered = x_prediction + (k @ e[:, :, np.newaxis])[:, :, 0]
+    # -----------------------------------------
+
+    # Обновление ковариационных матриц ошибки оценивания
+    p_filtered = p_prediction - k @ HP
+
+    return x_filtered, p_filtered
+
+
+def iter_ekf_batch(init_theta, Y, s, model=None):
+    """ Генератор оценок параметров, получаемых набором
+        независимых расширенных фильтров Калмана по набору
+        последовательностей наблюдений
+
+        Parameters
+        ----------
+            init_theta: np.ndarray
+                s-вектор начальных значений параметров, общий для всех
+                фильтров, или (B x s)-матрица начальных значений
+            Y: np.ndarray
+                (B x N x m)-массив последовательностей наблюдений
+            s: int
+                размер вектора параметров
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+
+        Yields
+        ----------
+            np.ndarray
+                (B x s)-матрица оценок параметров после
+                очередного наблюдения
+    """
+
+    # Блок подготовки
+    # -----------------------------------------
+    model = get_model(model)
+    n, m, r = model.extended.get_data()
+    B = len(Y)
+    init_theta = np.broadcast_to(init_theta, (B, s))
+    x_prev = np.array([model.extended.get_x0(theta) for theta in init_theta], dtype=float)
+    p_prev = np.tile(model.extended.get_P0(), (B, 1, 1))
+    t = model.common.get_t0()
+    # -----------------------------------------
+
+    for k in range(Y.shape[1]):
+        # Блок предсказания
+        x_prediction, p_prediction = prediction_batch(x_prev, p_prev, t, model)
+
+        # Блок коррекции
+        t = model.common.get_t_next(t)
+        x_prev, p_prev = update_batch(n, x_prediction, p_prediction, Y[:, k], t, model)
+        yield x_prev[:, n - s:]
+
+
+def re_ekf_batch(init_theta, Y, s, model=None):
+    """ Функция рекуррентного оценивания параметров набором
+        независимых расширенных фильтров Калмана
+
+        Parameters
+        ----------
+            init_theta: np.ndarray
+                s-вектор начальных значений параметров, общий для всех
+                фильтров, или (B x s)-матрица начальных значений
+            Y: np.ndarray
+                (B x N x m)-массив последовательностей наблюдений
+            s: int
+                размер вектора параметров
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+
+        Returns
+        ----------
+            theta_est: np.ndarray
+                (B x (N + 1) x s)-массив оценок параметров
+    """
+    B, N = Y.shape[:2]
+    theta_est = collect_trajectory(np.broadcast_to(init_theta, (B, s)),
+                                   iter_ekf_batch(init_theta, Y, s, model), N)
+    return np.transpose(theta_est, (1, 0, 2))
+
+
+# Функции, время вызова которых измеряется при включенном профилировании
+# -----------------------------------------
+profiling.instrument(globals(), ('read_observations', ), 'ekf.read')
+profiling.instrument(globals(), ('prediction', 'prediction_sqrt'), 'ekf.prediction')
+profiling.instrument(globals(), ('update', 'update_sqrt'), 'ekf.update')
+profiling.instrument(globals(), ('_pinv', ), 'numpy.linalg.pinv')
+# -----------------------------------------
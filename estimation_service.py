@@ -0,0 +1,717 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from convergence import ConvergenceMonitor
+from ekf import iter_ekf, prediction_batch, update_batch
+from model_registry import get_model
+from rmlm import iter_rmle, iter_rmle_recursive
+from shared_source import read_blocks
+
+
+# Генераторы оценок методов, доступных в службе
+METHODS = {'ekf': iter_ekf, 'rmle': iter_rmle, 'rmle_recursive': iter_rmle_recursive}
+
+# Адрес службы по умолчанию (путь к локальному сокету или host:port)
+DEFAULT_ADDRESS = 'estimation_service.sock'
+
+
+def _parse_address(address):
+    """ Функция разбора адреса службы
+
+        Parameters
+        ----------
+            address: str
+                путь к локальному сокету (Unix) или host:port (TCP)
+
+        Returns
+        ----------
+            str or tuple
+                путь к сокету или (host, port)
+    """
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit():
+        return host or '127.0.0.1', int(port)
+    return address
+
+
+async def _start_server(handler, address):
+    """ Функция запуска сервера по адресу службы (см. _parse_address)
+    """
+    address = _parse_address(address)
+    if isinstance(address, tuple):
+        return await asyncio.start_server(handler, *address)
+    return await asyncio.start_unix_server(handler, address)
+
+
+async def _open_connection(address):
+    """ Функция подключения к службе по адресу (см. _parse_address)
+    """
+    address = _parse_address(address)
+    if isinstance(address, tuple):
+        return await asyncio.open_connection(*address)
+    return await asyncio.open_unix_connection(address)
+
+
+def _feed(queue):
+    """ Генератор наблюдений из очереди, пополняемой службой
+
+        Parameters
+        ----------
+            queue: deque
+                очередь наблюдений
+
+        Yields
+        ----------
+            np.ndarray
+                m-вектор очередного наблюдения
+    """
+    while True:
+        yield queue.popleft()
+
+
+async def _send(writer, message):
+    """ Процедура отправки сообщения (строка JSON)
+    """
+    writer.write((json.dumps(message) + '\n').encode())
+    await writer.drain()
+
+
+class _Stream:
+    """ Поток наблюдений с собственным экземпляром метода оценивания
+
+        Поток расширенного фильтра Калмана в обычной форме без монитора
+        сходимости хранит состояние фильтра (x, p, t) в службе, и его
+        шаги выполняются вместе с шагами других таких потоков той же
+        модели в тот же момент времени (prediction_batch, update_batch).
+        Остальные методы выполняются своими генераторами оценок, которые
+        получают по одному наблюдению на оценку, в собственной задаче
+        потока (task).
+    """
+
+    def __init__(self, name, method, init_theta, options, model, monitor, queue_size,
+                 latency_window):
+        self.name = name
+        self.method = method
+        self.model = model
+        _, self.m, _ = model.conventional.get_data()
+        self.s = len(init_theta)
+        self.queue = asyncio.Queue(queue_size)
+        self.finished = asyncio.Event()
+        self.task = None
+        self.state = 'running'
+        self.error = None
+        self.count = 0
+        self.estimate = np.array(init_theta, dtype=float)
+        self.max_depth = 0
+        self.stalls = 0
+        self.latencies = deque(maxlen=latency_window)
+        self.latency_sum = 0.
+        self.latency_max = 0.
+        self.monitor = None if monitor is None else ConvergenceMonitor(**monitor)
+        self.batched = method == 'ekf' and not options and self.monitor is None
+        if self.batched:
+            self.n = model.extended.get_data()[0]
+            self.x = np.array(model.extended.get_x0(init_theta), dtype=float)
+            self.p = np.array(model.extended.get_P0(), dtype=float)
+            self.t = model.common.get_t0()
+            # Для стационарной модели с постоянным входом шаг фильтра не
+            # зависит от момента времени, и шаги выполняются вместе
+            # независимо от количества обработанных потоком наблюдений
+            self.stationary = (getattr(model.conventional, 'TIME_INVARIANT', False) and
+                               getattr(model.conventional, 'CONSTANT_INPUT', False))
+        else:
+            self.observations = deque()
+            self.estimates = METHODS[method](init_theta, _feed(self.observations), self.s,
+                                             monitor=self.monitor, model=model, **options)
+
+    @property
+    def done(self) -> bool:
+        return self.state != 'running'
+
+    def step(self, y):
+        """ Процедура обработки наблюдения генератором оценок
+        """
+        self.observations.append(y)
+        theta = next(self.estimates, None)
+        if theta is None:
+            # Досрочное завершение по сигналу монитора сходимости
+            self.observations.clear()
+            self.state = 'stopped'
+            return
+        self.estimate = np.array(theta, dtype=float)
+        self.count += 1
+
+    def record(self, latency):
+        """ Процедура учета задержки обработки наблюдения
+        """
+        self.latencies.append(latency)
+        self.latency_sum += latency
+        self.latency_max = max(self.latency_max, latency)
+
+    def close(self):
+        if not self.batched:
+            self.estimates.close()
+
+    def summary(self) -> dict:
+        """ Функция получения последней оценки и показателей потока
+
+            Returns
+            ----------
+                dict
+                    метод, состояние, количество обработанных наблюдений,
+                    последняя оценка параметров, очередь (текущая и
+                    наибольшая длина, количество ожиданий при заполненной
+                    очереди) и задержки обработки в секундах (средняя
+                    и наибольшая за все время, медиана и 95-й
+                    процентиль по последним наблюдениям)
+        """
+        latency = {'mean': None, 'p50': None, 'p95': None, 'max': None}
+        if self.latencies:
+            p50, p95 = np.percentile(self.latencies, (50, 95))
+            latency = {'mean': self.latency_sum / self.count if self.count else None,
+                       'p50': float(p50), 'p95': float(p95), 'max': self.latency_max}
+        result = {'stream': self.name, 'method': self.method, 'state': self.state,
+                  'count': self.count, 'theta': self.estimate.tolist(),
+                  'queue': {'depth': self.queue.qsize(), 'max_depth': self.max_depth,
+                            'stalls': self.stalls},
+                  'latency': latency}
+        if self.error is not None:
+            result['error'] = self.error
+        if self.monitor is not None:
+            result['monitor'] = self.monitor.result()
+        return result
+
+
+class EstimationService:
+    """ Служба оценивания параметров по потокам наблюдений
+
+        Клиент подключается к локальному сокету (или TCP host:port) и
+        передает первой строкой заголовок JSON, затем наблюдения по одному
+        в строке (m чисел через пробел, как в текстовых файлах данных).
+        Заголовок потока наблюдений: {"stream": название, "method": "ekf",
+        "rmle" или "rmle_recursive", "init_theta": начальные значения
+        параметров (по умолчанию единицы), "options": параметры генератора
+        оценок, "monitor": параметры ConvergenceMonitor, "model",
+        "model_options": модель системы}. Служба отвечает {"status": "ok"}
+        или {"error": ...}, после закрытия клиентом передачи дообрабатывает
+        очередь и отвечает итогом потока (см. _Stream.summary).
+        Заголовок {"command": "status"} запрашивает последние оценки и
+        показатели всех потоков, {"command": "subscribe", "interval": T} -
+        их публикацию каждые T секунд до отключения клиента.
+
+        Наблюдения потока помещаются в очередь ограниченной длины: при
+        заполненной очереди служба перестает читать сокет потока, и
+        клиент ожидает освобождения буфера передачи (противодавление).
+        На каждом такте служба берет по одному наблюдению из каждой
+        непустой очереди потоков расширенного фильтра Калмана, шаги
+        которых выполняются вместе (см. _Stream), и выполняет их за один
+        проход. Остальные потоки обрабатываются собственными задачами:
+        шаги генераторов оценок выполняются в пуле потоков выполнения и
+        не задерживают такты и прием наблюдений. Завершенные потоки
+        удаляются из службы, их итоги хранятся в ограниченном архиве.
+    """
+
+    def __init__(self, queue_size=1024, tick=0.005, max_steps=64, latency_window=1024,
+                 workers=4, history=256):
+        """ Parameters
+            ----------
+                queue_size: int
+                    наибольшая длина очереди наблюдений потока
+                tick: float
+                    время накопления наблюдений перед тактом, когда
+                    все очереди были пусты, в секундах
+                max_steps: int
+                    наибольшее количество тактов подряд без передачи
+                    управления чтению сокетов
+                latency_window: int
+                    количество последних наблюдений для процентилей задержки
+                workers: int
+                    количество потоков выполнения для шагов генераторов оценок
+                history: int
+                    количество хранимых итогов завершенных потоков
+        """
+        self.queue_size = queue_size
+        self.tick = tick
+        self.max_steps = max_steps
+        self.latency_window = latency_window
+        self.streams = {}
+        self.archive = deque(maxlen=history)
+        self.ticks = 0
+        self.updates = 0
+        self.calls = 0
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._handlers = set()
+        self._server = None
+        self._scheduler = None
+        self._address = None
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+
+    async def start(self, address=DEFAULT_ADDRESS):
+        """ Процедура запуска службы
+
+            Parameters
+            ----------
+                address: str
+                    путь к локальному сокету (Unix) или host:port (TCP)
+        """
+        self._address = _parse_address(address)
+        self._scheduler = asyncio.create_task(self._schedule())
+        self._server = await _start_server(self._handle, address)
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        """ Процедура остановки службы с отключением клиентов
+        """
+        self._closing.set()
+        self._server.close()
+        for task in list(self._handlers):
+            task.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self._server.wait_closed()
+        self._scheduler.cancel()
+        tasks = [stream.task for stream in self.streams.values() if stream.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(self._scheduler, *tasks, return_exceptions=True)
+        # Генераторы закрываются после завершения начатых шагов
+        await asyncio.to_thread(self._executor.shutdown, cancel_futures=True)
+        for stream in self.streams.values():
+            stream.close()
+        if isinstance(self._address, str) and os.path.exists(self._address):
+            os.unlink(self._address)
+
+    def snapshot(self) -> dict:
+        """ Функция получения последних оценок и показателей службы
+
+            Returns
+            ----------
+                dict
+                    показатели службы service (количество тактов, шагов
+                    методов и вызовов методов; шаги потоков расширенного
+                    фильтра Калмана, выполненные вместе, считаются одним
+                    вызовом), итоги передаваемых потоков streams и
+                    последних завершенных потоков finished
+                    (см. _Stream.summary)
+        """
+        service = {'ticks': self.ticks, 'updates': self.updates, 'calls': self.calls,
+                   'batch_size': self.updates / self.calls if self.calls else None}
+        return {'service': service,
+                'streams': {name: stream.summary() for name, stream in self.streams.items()},
+                'finished': list(self.archive)}
+
+    async def _handle(self, reader, writer):
+        """ Процедура обслуживания подключения клиента
+        """
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            header = json.loads(await reader.readline() or 'null')
+            if not isinstance(header, dict):
+                raise ValueError('ожидался заголовок JSON')
+            if 'command' in header:
+                await self._publish(writer, header)
+            else:
+                await self._receive(reader, writer, header)
+        except (ValueError, TypeError, KeyError) as error:
+            await _send(writer, {'error': str(error)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._handlers.discard(task)
+            writer.close()
+
+    async def _publish(self, writer, header):
+        """ Процедура передачи последних оценок клиенту: однократно
+            (status) или с заданным интервалом (subscribe)
+        """
+        if header['command'] not in ('status', 'subscribe'):
+            raise ValueError(f'неизвестная команда {header["command"]!r}')
+        await _send(writer, self.snapshot())
+        if header['command'] == 'subscribe':
+            interval = float(header.get('interval', 1.))
+            while not self._closing.is_set():
+                try:
+                    await asyncio.wait_for(self._closing.wait(), interval)
+                except asyncio.TimeoutError:
+                    await _send(writer, self.snapshot())
+
+    async def _receive(self, reader, writer, header):
+        """ Процедура приема наблюдений потока в очередь
+        """
+        # Создание потока с собственным экземпляром метода
+        # -----------------------------------------
+        name = str(header['stream'])
+        if name in self.streams:
+            raise ValueError(f'поток {name!r} уже передается')
+        method = header.get('method', 'ekf')
+        if method not in METHODS:
+            raise ValueError(f'неизвестный метод {method!r}, доступны: {sorted(METHODS)}')
+        model = get_model(header.get('model'), **header.get('model_options', {}))
+        s = model.common.get_data_theta()[0]
+        init_theta = np.array(header.get('init_theta', np.ones(s)), dtype=float)
+        if init_theta.shape != (s, ):
+            raise ValueError(f'ожидалось {s} начальных значений параметров')
+        stream = _Stream(name, method, init_theta, header.get('options', {}), model,
+                         header.get('monitor'), self.queue_size, self.latency_window)
+        self.streams[name] = stream
+        if not stream.batched:
+            stream.task = asyncio.create_task(self._run(stream))
+        await _send(writer, {'status': 'ok'})
+        # -----------------------------------------
+
+        # Прием наблюдений: при заполненной очереди ожидание освобождения
+        # места, в течение которого сокет не читается
+        # -----------------------------------------
+        try:
+            while line := await reader.readline():
+                if not line.strip() or stream.done:
+                    continue
+                y = np.array(line.split(), dtype=float)
+                if y.shape != (stream.m, ):
+                    raise ValueError(f'ожидалось наблюдение из {stream.m} чисел')
+                if stream.queue.full():
+                    stream.stalls += 1
+                await stream.queue.put((y, time.perf_counter()))
+                stream.max_depth = max(stream.max_depth, stream.queue.qsize())
+                if stream.batched:
+                    self._ready.set()
+        except ValueError as error:
+            self._fail(stream, error)
+            raise
+        finally:
+            # Признак конца потока обрабатывается после всех наблюдений
+            await stream.queue.put(None)
+            if stream.batched:
+                self._ready.set()
+        # -----------------------------------------
+
+        await stream.finished.wait()
+        await _send(writer, stream.summary())
+
+    def _fail(self, stream, error):
+        if not stream.done:
+            stream.state = 'failed'
+            stream.error = f'{type(error).__name__}: {error}'
+
+    def _finish(self, stream):
+        """ Процедура завершения потока: удаление из службы
+            с сохранением итога в архиве
+        """
+        if not stream.done:
+            stream.state = 'finished'
+        stream.close()
+        if self.streams.get(stream.name) is stream:
+            del self.streams[stream.name]
+        self.archive.append(stream.summary())
+        stream.finished.set()
+
+    async def _run(self, stream):
+        """ Процедура обработки наблюдений потока генератором оценок
+
+            Шаги генератора выполняются по одному в пуле потоков
+            выполнения, поэтому длительные шаги (например, повторная
+            линеаризация iter_rmle_recursive) не задерживают такты
+            расширенных фильтров Калмана других потоков.
+        """
+        loop = asyncio.get_running_loop()
+        while (item := await stream.queue.get()) is not None:
+            if stream.done:
+                continue
+            try:
+                await loop.run_in_executor(self._executor, stream.step, item[0])
+            except Exception as error:
+                # Ошибка метода завершает только его поток
+                self._fail(stream, error)
+                continue
+            self._record([(stream, item)])
+        self._finish(stream)
+
+    async def _schedule(self):
+        """ Процедура выполнения тактов службы
+        """
+        while True:
+            if not any(stream.batched and not stream.queue.empty()
+                       for stream in self.streams.values()):
+                # Ожидание наблюдений и их накопление в течение tick
+                self._ready.clear()
+                await self._ready.wait()
+                await asyncio.sleep(self.tick)
+            for _ in range(self.max_steps):
+                if not self._step():
+                    break
+            await asyncio.sleep(0)
+
+    def _step(self) -> bool:
+        """ Функция выполнения такта: по одному наблюдению из каждой
+            непустой очереди потоков расширенного фильтра Калмана
+
+            Returns
+            ----------
+                bool
+                    признак того, что такт выполнен (была непустая очередь)
+        """
+        ready = [stream for stream in self.streams.values()
+                 if stream.batched and not stream.queue.empty()]
+        if not ready:
+            return False
+        self.ticks += 1
+        groups = {}
+        for stream in ready:
+            item = stream.queue.get_nowait()
+            if item is None:
+                # Конец потока
+                self._finish(stream)
+                continue
+            if stream.done:
+                continue
+            key = (id(stream.model), None if stream.stationary else stream.t)
+            groups.setdefault(key, []).append((stream, item))
+        for group in groups.values():
+            self._ekf_step(group)
+        return True
+
+    def _ekf_step(self, group):
+        """ Процедура шага расширенных фильтров Калмана потоков одной
+            модели в один момент времени (для стационарной модели с
+            постоянным входом - в любые моменты времени)
+
+            Если шаг набора фильтров не выполнен, шаги фильтров выполняются
+            по отдельности, чтобы ошибка одного потока не затрагивала другие.
+
+            Parameters
+            ----------
+                group: list
+                    пары (поток, (наблюдение, время поступления))
+        """
+        stream = group[0][0]
+        model, n, s, t = stream.model, stream.n, stream.s, stream.t
+        try:
+            x_prediction, p_prediction = prediction_batch(
+                np.array([stream.x for stream, _ in group]),
+                np.array([stream.p for stream, _ in group]), t, model)
+            x, p = update_batch(n, x_prediction, p_prediction,
+                                np.array([y for _, (y, _) in group]),
+                                model.common.get_t_next(t), model)
+        except Exception as error:
+            if len(group) == 1:
+                self._fail(stream, error)
+            else:
+                for item in group:
+                    self._ekf_step([item])
+            return
+        for (stream, _), x_curr, p_curr in zip(group, x, p):
+            stream.x, stream.p = x_curr, p_curr
+            stream.t = model.common.get_t_next(stream.t)
+            stream.estimate = x_curr[n - s:]
+            stream.count += 1
+        self._record(group, calls=1)
+
+    def _record(self, items, calls=None):
+        """ Процедура учета задержек обработанных наблюдений
+
+            Parameters
+            ----------
+                items: list
+                    пары (поток, (наблюдение, время поступления))
+                calls: int
+                    количество вызовов методов (по умолчанию
+                    по количеству наблюдений)
+        """
+        now = time.perf_counter()
+        for stream, (_, arrival) in items:
+            stream.record(now - arrival)
+        self.updates += len(items)
+        self.calls += len(items) if calls is None else calls
+
+
+async def serve(address=DEFAULT_ADDRESS, **options):
+    """ Процедура работы службы до прерывания
+
+        Parameters
+        ----------
+            address: str
+                путь к локальному сокету (Unix) или host:port (TCP)
+            options:
+                параметры службы (см. EstimationService)
+    """
+    service = EstimationService(**options)
+    await service.start(address)
+    try:
+        await service.serve_forever()
+    finally:
+        await service.close()
+
+
+async def replay(address, f_name, stream=None, rate=0., method='ekf', init_theta=None,
+                 options=None, monitor=None, model=None, model_options=None,
+                 replication=0) -> dict:
+    """ Функция передачи наблюдений из файла данных службе с заданной
+        частотой (локальный заменитель источника наблюдений)
+
+        Передача ожидает освобождения буфера сокета, поэтому при
+        заполненной очереди потока в службе клиент замедляется.
+
+        Parameters
+        ----------
+            address: str
+                адрес службы
+            f_name: str
+                имя файла с данными наблюдений (текстового или двоичного)
+            stream: str
+                название потока (по умолчанию имя файла)
+            rate: float
+                частота передачи наблюдений в секунду (0 - без ограничения)
+            method: str
+                метод оценивания (см. METHODS)
+            init_theta: np.ndarray
+                s-вектор начальных значений параметров (None - единицы)
+            options: dict
+                параметры генератора оценок метода
+            monitor: dict
+                параметры монитора сходимости (см. ConvergenceMonitor)
+            model: str
+                название модели системы (None - модель по умолчанию)
+            model_options: dict
+                параметры модели
+            replication: int
+                номер реализации в двоичном файле с
+                несколькими реализациями
+
+        Returns
+        ----------
+            dict
+                итог потока в службе (см. _Stream.summary), дополненный
+                количеством переданных наблюдений sent и временем
+                передачи send_time
+    """
+    header = {'stream': stream or os.path.basename(f_name), 'method': method,
+              'options': options or {}, 'model': model, 'model_options': model_options or {}}
+    if init_theta is not None:
+        header['init_theta'] = np.asarray(init_theta, dtype=float).tolist()
+    if monitor is not None:
+        header['monitor'] = monitor
+    reader, writer = await _open_connection(address)
+    try:
+        await _send(writer, header)
+        reply = json.loads(await reader.readline())
+        if 'error' in reply:
+            raise RuntimeError(reply['error'])
+
+        # Передача наблюдений по расписанию start + k / rate
+        # -----------------------------------------
+        start = time.perf_counter()
+        k = 0
+        for Y in read_blocks(f_name, replication=replication):
+            for y in Y:
+                if rate:
+                    delay = start + k / rate - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                writer.write((' '.join(map(repr, y.tolist())) + '\n').encode())
+                await writer.drain()
+                k += 1
+        writer.write_eof()
+        send_time = time.perf_counter() - start
+        # -----------------------------------------
+
+        summary = json.loads(await reader.readline())
+    finally:
+        writer.close()
+    if 'error' in summary and 'stream' not in summary:
+        raise RuntimeError(summary['error'])
+    summary.update({'sent': k, 'send_time': send_time})
+    return summary
+
+
+async def status(address) -> dict:
+    """ Функция запроса последних оценок и показателей службы
+
+        Parameters
+        ----------
+            address: str
+                адрес службы
+
+        Returns
+        ----------
+            dict
+                см. EstimationService.snapshot
+    """
+    reader, writer = await _open_connection(address)
+    try:
+        await _send(writer, {'command': 'status'})
+        return json.loads(await reader.readline())
+    finally:
+        writer.close()
+
+
+def main(argv=None):
+    """ Процедура запуска службы или клиентов с
+        параметрами командной строки
+
+        Parameters
+        ----------
+            argv: list
+                аргументы командной строки (по умолчанию sys.argv[1:])
+    """
+    parser = argparse.ArgumentParser(description='Служба оценивания параметров по потокам '
+                                                 'наблюдений')
+    parser.add_argument('--address', default=DEFAULT_ADDRESS,
+                        help='путь к локальному сокету или host:port')
+    commands = parser.add_subparsers(dest='command', required=True)
+    server = commands.add_parser('serve', help='запустить службу')
+    server.add_argument('--queue-size', dest='queue_size', type=int, default=1024,
+                        help='наибольшая длина очереди наблюдений потока')
+    server.add_argument('--tick', type=float, default=0.005,
+                        help='время накопления наблюдений перед тактом, с')
+    server.add_argument('--workers', type=int, default=4,
+                        help='количество потоков выполнения для шагов генераторов оценок')
+    client = commands.add_parser('replay', help='передать наблюдения из файлов данных')
+    client.add_argument('files', nargs='+', help='файлы с данными наблюдений')
+    client.add_argument('--streams', type=int, default=1,
+                        help='количество потоков на каждый файл')
+    client.add_argument('--rate', type=float, default=0.,
+                        help='частота передачи наблюдений в секунду (0 - без ограничения)')
+    client.add_argument('--method', default='ekf', choices=list(METHODS), help='метод')
+    client.add_argument('--init-theta', dest='init_theta',
+                        type=lambda value: [float(v) for v in value.split(',')],
+                        help='начальные значения параметров через запятую')
+    client.add_argument('--options', type=json.loads, default={},
+                        help='параметры генератора оценок метода (JSON)')
+    client.add_argument('--model', default=None, help='модель системы')
+    client.add_argument('--model-options', dest='model_options', type=json.loads, default={},
+                        help='параметры модели (JSON)')
+    commands.add_parser('status', help='запросить последние оценки и показатели службы')
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        try:
+            asyncio.run(serve(args.address, queue_size=args.queue_size, tick=args.tick,
+                              workers=args.workers))
+        except KeyboardInterrupt:
+            pass
+        return
+    if args.command == 'status':
+        result = asyncio.run(status(args.address))
+    else:
+        async def replay_all():
+            return await asyncio.gather(*(
+                replay(args.address, f_name, f'{os.path.basename(f_name)}-{i}', args.rate,
+                       args.method, args.init_theta, args.options, model=args.model,
+                       model_options=args.model_options)
+                for f_name in args.files for i in range(args.streams)))
+        result = asyncio.run(replay_all())
+    json.dump(result, sys.stdout, indent=1)
+    print()
+
+
+if __name__ == '__main__':
+    main()
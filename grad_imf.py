@@ -1,7 +1,7 @@
-from position_control_system.conventional_model import *
-from position_control_system.common_data import *
 import numpy as np
 import numpy.linalg as npl
+from model_registry import get_model
+import profiling
 
 
 def eval_ci(i, n, s):
@@ -27,7 +27,193 @@ def eval_ci(i, n, s):
     return ci
 
 
-def grad_imf_evaluation(theta, N, n, m, r, s, y) \
+def init_xA(n, s, model=None):
+    """ Функция получения начального значения расширенного
+        вектора состояния
+
+        Parameters
+        ----------
+            n: int
+                размер вектора состояний
+            s: int
+                размер вектора параметров
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+
+        Returns
+        ----------
+            xA: np.ndarray
+                n(s + 1)-вектор начального значения расширенного
+                вектора состояния
+    """
+    model = get_model(model).conventional
+    xA = np.zeros(shape=(n * (s + 1), 1))
+    dxt0dtheta = model.get_dxt0dtheta()
+    xA[:n] = model.get_xt0()
+    for i in range(s):
+        xA[(i + 1) * n:(i + 2) * n] = dxt0dtheta[i]
+    return xA
+
+
+def grad_imf_step(theta, xA, t, n, m, r, s, y=None, factor=False, model=None) \
+        -> tuple[np.ndarray, float, np.ndarray, np.ndarray]:
+    """ Функция одного шага вычисления расширенного вектора состояния,
+        приращения информационной матрицы Фишера и градиента критерия
+        максимального правдоподобия
+
+        Parameters
+        ----------
+            theta: np.ndarray
+                s-вектор параметров
+            xA: np.ndarray
+                n(s + 1)-вектор значения расширенного вектора
+                состояния на предыдущем шаге по времени
+            t: float
+                текущий момент времени
+            n: int
+                размер вектора состояний
+            m: int
+                размер вектора измерений
+            r: int
+                размер вектора управления
+            s: int
+                размер вектора параметров
+            y: np.ndarray
+                наблюдение в следующий момент времени; если не задано,
+                градиент не вычисляется
+            factor: bool
+                признак возврата приращения информационной матрицы
+                в виде сомножителя W, такого что imf_k = W W^T
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+
+        Returns
+        ----------
+            xA, t, imf_k, grad: np.ndarray, float, np.ndarray, np.ndarray
+                n(s + 1)-вектор расширенного вектора состояния
+                в следующий момент времени,
+                следующий момент времени,
+                (s x s) приращение информационной матрицы Фишера
+                (при factor=True - его (s x k)-сомножитель W),
+                s-вектор градиента критерия максимального
+                правдоподобия (нулевой, если наблюдение не задано).
+    """
+
+    # Блок подготовки
+    # -----------------------------------------
+    model = get_model(model)
+    conventional = model.conventional
+    # Выделение памяти
+    imf_k = np.empty(shape=(s, s))
+    grad = np.zeros(s)
+    # Индексы элементов верхнего треугольника информационной матрицы
+    iu, ju = np.triu_indices(s)
+    # -----------------------------------------
+
+    # Обновления матриц модели
+    # -----------------------------------------
+    F = conventional.get_F(t, theta)
+    Psi = conventional.get_Psi(t, theta)
+    u = conventional.get_u(t)
+    dFdtheta = conventional.get_dFdtheta(t, theta)
+    dPsidtheta = conventional.get_dPsidtheta(t, theta)
+    t = model.common.get_t_next(t)
+    H = conventional.get_H(t, theta)
+    inv_R = conventional.get_inv_R(t, theta)
+    dHdtheta = conventional.get_dHdtheta(t, theta)
+    dRdtheta = np.reshape(conventional.get_dRdtheta(t, theta), (s, m, m))
+    # -----------------------------------------
+
+    # Вычисление значения расширенного вектора состояния в следующий
+    # момент времени поблочно, без заполнения расширенной матрицы
+    # состояния и расширенной матрицы управления
+    # -----------------------------------------
+    X = np.reshape(xA, (s + 1, n))
+    X_next = np.empty(shape=(s + 1, n))
+    X_next[0] = F @ X[0] + (Psi @ u)[:, 0]
+    X_next[1:] = X[1:] @ F.T + dFdtheta @ X[0] + (dPsidtheta @ u)[:, :, 0]
+    xA = np.reshape(X_next, (n * (s + 1), 1))
+    # -----------------------------------------
+
+    # Вычисление производных выхода модели по параметрам: i-ая строка
+    # z_i = dH/dtheta_i x0 + H x_i. Так как математическое ожидание
+    # xA xA^T имеет ранг один, блоки, нужные для приращения информационной
+    # матрицы, сводятся к произведениям векторов z_i
+    Z = dHdtheta @ X_next[0] + X_next[1:] @ H.T
+
+    # Вычисление градиента критерия максимального правдоподобия
+    # -----------------------------------------
+    if y is not None:
+        # Вычисление вектора ошибки оценивания
+        eps = np.reshape(y, m) - H @ X_next[0]
+        inv_R_eps = inv_R @ eps
+        grad = -Z @ inv_R_eps - 1 / 2. * np.einsum('a,pab,b->p', inv_R_eps, dRdtheta, inv_R_eps)
+    # -----------------------------------------
+
+    # Вычисление сомножителя приращения информационной матрицы Фишера:
+    # при inv_R = L L^T первые m столбцов равны Z L, остальные - L^T dR_i L
+    # -----------------------------------------
+    if factor:
+        L = npl.cholesky(inv_R)
+        W = Z @ L
+        if np.any(dRdtheta):
+            W = np.hstack((W, np.reshape(L.T @ dRdtheta @ L, (s, m * m))))
+        return xA, t, W, grad
+    # -----------------------------------------
+
+    # Вычисление приращения информационной матрицы Фишера
+    # по элементам верхнего треугольника
+    # -----------------------------------------
+    dR_inv_R = dRdtheta @ inv_R
+    imf_upper = np.einsum('pa,ab,pb->p', Z[iu], inv_R, Z[ju]) + \
+        np.einsum('pab,pba->p', dR_inv_R[iu], dR_inv_R[ju])
+    imf_k[iu, ju] = imf_upper
+    imf_k[ju, iu] = imf_upper
+    # -----------------------------------------
+    return xA, t, imf_k, grad
+
+
+def replay_imf(theta, N, n, m, r, s, model=None) -> tuple[np.ndarray, float, np.ndarray]:
+    """ Функция вычисления расширенного вектора состояния и
+        информационной матрицы Фишера повторным проходом
+        по N шагам при фиксированном векторе параметров
+
+        Parameters
+        ----------
+            theta: np.ndarray
+                s-вектор параметров
+            N: int
+                количество шагов
+            n: int
+                размер вектора состояний
+            m: int
+                размер вектора измерений
+            r: int
+                размер вектора управления
+            s: int
+                размер вектора параметров
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+
+        Returns
+        ----------
+            xA, t, imf: np.ndarray, float, np.ndarray
+                n(s + 1)-вектор расширенного вектора состояния
+                в момент N-ого наблюдения,
+                момент времени N-ого наблюдения,
+                (s x s) информационная матрица Фишера для N наблюдений.
+    """
+    model = get_model(model)
+    imf = np.zeros(shape=(s, s))
+    xA = init_xA(n, s, model)
+    t = model.common.get_t0()
+    for k in range(N):
+        xA, t, imf_k, _ = grad_imf_step(theta, xA, t, n, m, r, s, model=model)
+        imf += imf_k
+    return xA, t, imf
+
+
+def grad_imf_evaluation(theta, N, n, m, r, s, y, model=None) \
         -> tuple[np.ndarray, np.ndarray]:
     """ Функция вычисления градиента критерия максимального
         правдоподобия и информационной матрицы Фишера
@@ -48,6 +234,8 @@ def grad_imf_evaluation(theta, N, n, m, r, s, y) \
                 размер вектора параметров
             y: np.ndarray
                 текущее наблюдение
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
 
         Returns
         ----------
@@ -57,82 +245,160 @@ def grad_imf_evaluation(theta, N, n, m, r, s, y) \
                 правдоподобия.
     """
 
+    # Повторный проход по первым N - 1 наблюдениям
+    model = get_model(model)
+    xA, t, imf = replay_imf(theta, N - 1, n, m, r, s, model)
+
+    # Шаг, отвечающий N-ому наблюдению
+    xA, t, imf_k, grad_N = grad_imf_step(theta, xA, t, n, m, r, s, y, model=model)
+    imf += imf_k
+    return imf, grad_N
+
+
+def grad_imf_step_batch(thetas, XA, t, n, m, r, s, y=None, model=None) \
+        -> tuple[np.ndarray, float, np.ndarray, np.ndarray, np.ndarray]:
+    """ Функция одного шага вычисления расширенных векторов состояния,
+        приращений информационной матрицы Фишера и градиентов критерия
+        максимального правдоподобия для набора векторов параметров
+
+        Parameters
+        ----------
+            thetas: np.ndarray
+                (B x s)-матрица векторов параметров
+            XA: np.ndarray
+                (B x (s + 1) x n)-массив расширенных векторов состояния
+                на предыдущем шаге по времени
+            t: float
+                текущий момент времени
+            n: int
+                размер вектора состояний
+            m: int
+                размер вектора измерений
+            r: int
+                размер вектора управления
+            s: int
+                размер вектора параметров
+            y: np.ndarray
+                наблюдение в следующий момент времени; если не задано,
+                градиент и критерий не вычисляются
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+
+        Returns
+        ----------
+            XA, t, imf_k, grad, nll_k: np.ndarray, float, np.ndarray, np.ndarray, np.ndarray
+                (B x (s + 1) x n)-массив расширенных векторов состояния
+                в следующий момент времени,
+                следующий момент времени,
+                (B x s x s)-массив приращений информационной матрицы Фишера,
+                (B x s)-массив градиентов критерия максимального правдоподобия,
+                B-вектор приращений отрицательного логарифма функции
+                правдоподобия (без постоянного слагаемого).
+    """
+
     # Блок подготовки
     # -----------------------------------------
-    # Выделение памяти
-    imf = np.zeros(shape=(s, s))
-    xA = np.zeros(shape=(n * (s + 1), 1))
-    grad_N = np.zeros(s)
+    model = get_model(model)
+    conventional = model.conventional
+    B = len(thetas)
+    imf_k = np.empty(shape=(B, s, s))
+    grad = np.zeros(shape=(B, s))
+    nll_k = np.zeros(B)
+    iu, ju = np.triu_indices(s)
+    # -----------------------------------------
 
-    # Инициализация начальных условий
-    dxt0dtheta = get_dxt0dtheta()
-    xA[:n] = get_xt0()
-    for i in range(s):
-        xA[(i + 1) * n:(i + 2) * n] = dxt0dtheta[i]
+    # Обновления матриц модели
     # -----------------------------------------
+    F = conventional.get_F_batch(t, thetas)
+    Psi = conventional.get_Psi_batch(t, thetas)
+    u = conventional.get_u(t)
+    dFdtheta = conventional.get_dFdtheta_batch(t, thetas)
+    dPsidtheta = conventional.get_dPsidtheta_batch(t, thetas)
+    t = model.common.get_t_next(t)
+    H = conventional.get_H_batch(t, thetas)
+    inv_R = conventional.get_inv_R_batch(t, thetas)
+    dHdtheta = conventional.get_dHdtheta_batch(t, thetas)
+    dRdtheta = conventional.get_dRdtheta_batch(t, thetas)
+    # -----------------------------------------
+
+    # Вычисление значений расширенных векторов состояния
+    # в следующий момент времени
+    # -----------------------------------------
+    XA_next = np.empty(shape=(B, s + 1, n))
+    XA_next[:, 0] = np.einsum('bij,bj->bi', F, XA[:, 0]) + (Psi @ u)[:, :, 0]
+    XA_next[:, 1:] = np.einsum('bij,bpj->bpi', F, XA[:, 1:]) + \
+        np.einsum('bpij,bj->bpi', dFdtheta, XA[:, 0]) + (dPsidtheta @ u)[:, :, :, 0]
+    # -----------------------------------------
+
+    # Вычисление производных выхода модели по параметрам
+    Z = np.einsum('bpij,bj->bpi', dHdtheta, XA_next[:, 0]) + \
+        np.einsum('bij,bpj->bpi', H, XA_next[:, 1:])
+
+    # Вычисление приращений информационной матрицы Фишера
+    # по элементам верхнего треугольника
+    # -----------------------------------------
+    dR_inv_R = dRdtheta @ inv_R[:, np.newaxis]
+    imf_upper = np.einsum('bpa,bac,bpc->bp', Z[:, iu], inv_R, Z[:, ju]) + \
+        np.einsum('bpac,bpca->bp', dR_inv_R[:, iu], dR_inv_R[:, ju])
+    imf_k[:, iu, ju] = imf_upper
+    imf_k[:, ju, iu] = imf_upper
+    # -----------------------------------------
+
+    # Вычисление градиентов и приращений критерия
+    # -----------------------------------------
+    if y is not None:
+        eps = np.reshape(y, m) - np.einsum('bij,bj->bi', H, XA_next[:, 0])
+        inv_R_eps = np.einsum('bij,bj->bi', inv_R, eps)
+        grad = -np.einsum('bpa,ba->bp', Z, inv_R_eps) - \
+            1 / 2. * np.einsum('ba,bpac,bc->bp', inv_R_eps, dRdtheta, inv_R_eps)
+        nll_k = 1 / 2. * (np.einsum('ba,ba->b', eps, inv_R_eps) - np.log(npl.det(inv_R)))
+    # -----------------------------------------
+    return XA_next, t, imf_k, grad, nll_k
+
+
+def replay_imf_batch(thetas, N, n, m, r, s, model=None) -> tuple[np.ndarray, float, np.ndarray]:
+    """ Функция вычисления расширенных векторов состояния и информационных
+        матриц Фишера повторным проходом по N шагам для набора
+        векторов параметров
+
+        Parameters
+        ----------
+            thetas: np.ndarray
+                (B x s)-матрица векторов параметров
+            N: int
+                количество шагов
+            n: int
+                размер вектора состояний
+            m: int
+                размер вектора измерений
+            r: int
+                размер вектора управления
+            s: int
+                размер вектора параметров
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
 
-    t = get_t0()
+        Returns
+        ----------
+            XA, t, imf: np.ndarray, float, np.ndarray
+                (B x (s + 1) x n)-массив расширенных векторов состояния
+                в момент N-ого наблюдения,
+                момент времени N-ого наблюдения,
+                (B x s x s)-массив информационных матриц Фишера.
+    """
+    model = get_model(model)
+    B = len(thetas)
+    imf = np.zeros(shape=(B, s, s))
+    XA = np.tile(np.reshape(init_xA(n, s, model), (1, s + 1, n)), (B, 1, 1))
+    t = model.common.get_t0()
     for k in range(N):
-        # Обновления матриц модели
-        # -----------------------------------------
-        F = get_F(t, theta)
-        Psi = get_Psi(t, theta)
-        u = get_u(t)
-        dFdtheta = get_dFdtheta(t, theta)
-        dPsidtheta = get_dPsidtheta(t, theta)
-        t = get_t_next(t)
-        H = get_H(t, theta)
-        R = get_R(t, theta)
-        inv_R = npl.inv(R)
-        dHdtheta = get_dHdtheta(t, theta)
-        dRdtheta = get_dRdtheta(t, theta)
-        # -----------------------------------------
-
-        # Заполнение расширенной матрицы состояния и
-        # расширенной матрицы управления
-        # -----------------------------------------
-        FA = np.zeros(shape=(n * (s + 1), n * (s + 1)))
-        PsiA = np.zeros(shape=(n * (s + 1), r))
-        FA[:n, :n] = F
-        PsiA[:n] = Psi
-        for i in range(s):
-            FA[(i + 1) * n:(i + 2) * n, (i + 1) * n:(i + 2) * n] = F
-            FA[(i + 1) * n:(i + 2) * n, :n] = dFdtheta[i]
-            PsiA[(i + 1) * n:(i + 2) * n] = dPsidtheta[i]
-        # -----------------------------------------
-
-        # Вычисление значения расширенного вектора состояния с номером k + 1
-        # и математиеского ожидания
-        xA = FA @ xA + PsiA @ u
-        expected_value = xA @ xA.T
-
-        # Вычисление градиента критерия максимального правдоподобия
-        # и информационной матрицы Фишера для N наблюдений
-        for i in range(s):
-            if k == N - 1:
-                # Вычисление вектора ошибки оценивания
-                eps = y - H @ xA[:n]
-                # Вычисление производной вектора ошибки оценивания по i-ому параметру
-                depsdtheta = -dHdtheta[i] @ xA[:n] - H @ xA[(i + 1) * n:(i + 2) * n]
-                # Вычисление i-ой компоненты вектора градиента критерия
-                # максимального правдоподобия в момент N-ого наблюдения
-                # -----------------------------------------
-                a = np.transpose(depsdtheta) @ inv_R @ eps
-                b = 1 / 2. * (eps.T @ inv_R @ dRdtheta[i, np.newaxis] @ inv_R @ eps)
-                grad_N[i] = a - b
-                # -----------------------------------------
-            for j in range(s):
-                # Блок вычисления приращения i-ого j-ого элемента информационной матрицы,
-                # отвечающего текущему значению k
-                # -----------------------------------------
-                c0 = eval_ci(0, n, s)
-                cj = eval_ci(j + 1, n, s)
-                ci = eval_ci(i + 1, n, s)
-                sp1 = dHdtheta[i] @ c0 @ expected_value @ c0.T @ np.transpose(dHdtheta[j]) @ inv_R
-                sp2 = dHdtheta[i] @ c0 @ expected_value @ cj.T @ H.T @ inv_R
-                sp3 = H @ ci @ expected_value @ c0.T @ np.transpose(dHdtheta[j]) @ inv_R
-                sp4 = H @ ci @ expected_value @ cj.T @ H.T @ inv_R
-                sp5 = np.reshape(dRdtheta[i] @ inv_R @ dRdtheta[j], (m, m)) @ inv_R
-                imf[i][j] += np.trace(sp1) + np.trace(sp2) + np.trace(sp3) + np.trace(sp4) + np.trace(sp5)
-                # -----------------------------------------
-    return imf, grad_N
+        XA, t, imf_k, _, _ = grad_imf_step_batch(thetas, XA, t, n, m, r, s, model=model)
+        imf += imf_k
+    return XA, t, imf
+
+
+# Функции, время вызова которых измеряется при включенном профилировании
+# -----------------------------------------
+profiling.instrument(globals(), ('grad_imf_step', ), 'grad_imf.step')
+profiling.instrument(globals(), ('replay_imf', ), 'grad_imf.replay')
+# -----------------------------------------
@@ -1,10 +1,110 @@
-import matplotlib.pyplot as pl
 from position_control_system.common_data import *
 from relative_errors import *
 
 
-def visualize_results(N, s, theta_est_rmlm, theta_est_ekf, theta_true)\
-        -> tuple[np.ndarray, np.ndarray]:
+# Максимальное количество отображаемых точек каждой траектории
+MAX_POINTS = 2000
+
+
+def _pyplot(show=False):
+    """ Функция импорта matplotlib при первом построении графика
+
+        Parameters
+        ----------
+            show: bool
+                признак вывода графиков на экран; иначе используется
+                неинтерактивный модуль вывода Agg (только запись в файлы)
+
+        Returns
+        -------
+            module
+                модуль matplotlib.pyplot
+    """
+    import matplotlib
+    if not show:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as pl
+    return pl
+
+
+def decimate(y, max_points=MAX_POINTS) -> np.ndarray:
+    """ Функция прореживания траектории для отображения с сохранением
+        ее формы
+
+        Траектория разбивается на равные интервалы, в каждом сохраняются
+        точки минимума и максимума (метод min/max), поэтому выбросы и
+        колебания траектории остаются видны. Первая и последняя точки
+        сохраняются всегда.
+
+        Parameters
+        ----------
+            y: np.ndarray
+                K-вектор значений траектории
+            max_points: int
+                максимальное количество сохраняемых точек
+
+        Returns
+        -------
+            np.ndarray
+                возрастающий вектор номеров сохраняемых точек
+    """
+    K = len(y)
+    if K <= max_points:
+        return np.arange(K)
+    buckets = max(max_points // 2 - 1, 1)
+    size = -(-K // buckets)
+    # Дополнение траектории последним значением до целого числа интервалов
+    padded = np.concatenate((y, np.full(buckets * size - K, y[-1])))
+    blocks = np.reshape(padded, (buckets, size))
+    offsets = np.arange(buckets) * size
+    indices = np.concatenate(([0], offsets + blocks.argmin(axis=1),
+                              offsets + blocks.argmax(axis=1), [K - 1]))
+    return np.unique(np.minimum(indices, K - 1))
+
+
+def _plot(axes, x, y, max_points, *args, **kwargs):
+    """ Процедура построения прореженной траектории
+
+        Parameters
+        ----------
+            axes: matplotlib.axes.Axes
+                область построения
+            x: np.ndarray
+                K-вектор значений аргумента
+            y: np.ndarray
+                K-вектор значений траектории
+            max_points: int
+                максимальное количество отображаемых точек
+            args, kwargs
+                параметры axes.plot
+    """
+    indices = decimate(y, max_points)
+    axes.plot(x[indices], y[indices], *args, **kwargs)
+
+
+def _finish(pl, fig, f_name, show):
+    """ Процедура записи графика в файл и (или) вывода на экран
+
+        Parameters
+        ----------
+            pl: module
+                модуль matplotlib.pyplot
+            fig: matplotlib.figure.Figure
+                график
+            f_name: str
+                имя файла графика (None - не записывать)
+            show: bool
+                признак вывода графика на экран
+    """
+    if f_name is not None:
+        fig.savefig(f_name)
+    if show:
+        pl.show()
+    pl.close(fig)
+
+
+def visualize_results(N, s, theta_est_rmlm, theta_est_ekf, theta_true, f_name=None,
+                      show=False, max_points=MAX_POINTS) -> tuple[np.ndarray, np.ndarray]:
     """ Функция графического отображения результатов и
         вычисления относительной ошибки оценок параметров
 
@@ -22,6 +122,14 @@ def visualize_results(N, s, theta_est_rmlm, theta_est_ekf, theta_true)\
                 с помощью расширенного фильтра Калмана
             theta_true: np.ndarray
                 s-вектор значений истинных параметров
+            f_name: str
+                префикс имен файлов графиков (<f_name>_theta.png и
+                <f_name>_error.png); если не задан и show=False,
+                графики не строятся и matplotlib не загружается
+            show: bool
+                признак вывода графиков на экран
+            max_points: int
+                максимальное количество отображаемых точек траектории
 
         Returns
         ----------
@@ -34,46 +142,43 @@ def visualize_results(N, s, theta_est_rmlm, theta_est_ekf, theta_true)\
 
     # Блок подготовки
     # -----------------------------------------
-    # Выделение памяти
-    error_rml = np.zeros((N + 1, s))
-    error_ekf = np.zeros((N + 1, s))
-    theta = np.zeros((N + 1, s))
+    # Нахождение относительных ошибок по всей траектории
+    error_rml = relative_error(theta_true, theta_est_rmlm)
+    error_ekf = relative_error(theta_true, theta_est_ekf)
     # Получение вектора значений количества наблюдений
     # во все маменты времени
-    iterations = np.array(range(N + 1))
-
-    # Заполнение массивов
-    for i in range(N + 1):
-        theta[i] = theta_true
-        # Нахождение относительных ошибок
-        for j in range(s):
-            error_rml[i][j] = relative_error_theta_i(theta_true[j], theta_est_rmlm[i][j])
-            error_ekf[i][j] = relative_error_theta_i(theta_true[j], theta_est_ekf[i][j])
+    iterations = np.arange(N + 1)
     # -----------------------------------------
 
+    if f_name is None and not show:
+        return error_rml[N], error_ekf[N]
+
     # Построение графика зависимости оценок параметров от количества наблюдений
     # -----------------------------------------
-    pl.Figure()
+    pl = _pyplot(show)
+    fig, axes = pl.subplots(s, 1, squeeze=False)
     for i in range(s):
-        pl.subplot(s, 1, i + 1)
-        pl.plot(iterations, theta_est_rmlm[:, i], label='RMLM')
-        pl.plot(iterations, theta_est_ekf[:, i], label='EKF')
-        pl.plot(iterations, theta[:, i], '--', color='black', linewidth=1)
+        ax = axes[i, 0]
+        _plot(ax, iterations, theta_est_rmlm[:, i], max_points, label='RMLM')
+        _plot(ax, iterations, theta_est_ekf[:, i], max_points, label='EKF')
+        ax.axhline(theta_true[i], linestyle='--', color='black', linewidth=1)
         label = 'theta' + str(i+1)
-        pl.ylabel(label)
-        pl.legend()
-        pl.grid(True)
-    pl.xlabel("k")
-    pl.show()
+        ax.set_ylabel(label)
+        ax.legend()
+        ax.grid(True)
+    axes[-1, 0].set_xlabel("k")
+    _finish(pl, fig, None if f_name is None else f_name + '_theta.png', show)
     # -----------------------------------------
 
     # Построение графика зависимости ошибок оценок параметров от количества наблюдений
-    visualize_results_error(s, error_rml, error_ekf, iterations)
+    visualize_results_error(s, error_rml, error_ekf, iterations,
+                            None if f_name is None else f_name + '_error.png', show, max_points)
 
     return error_rml[N], error_ekf[N]
 
 
-def visualize_results_error(s, error_rml, error_ekf, iterations):
+def visualize_results_error(s, error_rml, error_ekf, iterations, f_name=None, show=False,
+                            max_points=MAX_POINTS):
     """ Процедура графического отображения зависимости ошибок
         оценок параметров от количества наблюдений
 
@@ -90,17 +195,24 @@ def visualize_results_error(s, error_rml, error_ekf, iterations):
             iterations: np.ndarray
                 (N + 1)-вектор значений количества наблюдений
                 во все маменты времени
+            f_name: str
+                имя файла графика
+            show: bool
+                признак вывода графика на экран
+            max_points: int
+                максимальное количество отображаемых точек траектории
     """
 
     # Построение графика зависимости ошибок оценок параметров от количества наблюдений
-    pl.Figure()
+    pl = _pyplot(show)
+    fig, axes = pl.subplots(s, 1, squeeze=False)
     for i in range(s):
-        pl.subplot(s, 1, i + 1)
-        pl.plot(iterations, error_rml[:, i], label='RMLM')
-        pl.plot(iterations, error_ekf[:, i], label='EKF')
+        ax = axes[i, 0]
+        _plot(ax, iterations, error_rml[:, i], max_points, label='RMLM')
+        _plot(ax, iterations, error_ekf[:, i], max_points, label='EKF')
         label = 'relative error theta' + str(i+1)
-        pl.ylabel(label)
-        pl.legend()
-        pl.grid(True)
-    pl.xlabel("k")
-    pl.show()
+        ax.set_ylabel(label)
+        ax.legend()
+        ax.grid(True)
+    axes[-1, 0].set_xlabel("k")
+    _finish(pl, fig, f_name, show)
@@ -0,0 +1,91 @@
+import numpy as np
+import numpy.linalg as npl
+
+
+def inverse_from_cholesky(imf, rcond=1e-10):
+    """ Функция вычисления матрицы, обратной к информационной
+        матрице Фишера, через разложение Холецкого
+
+        Parameters
+        ----------
+            imf: np.ndarray
+                (s x s) информационная матрица Фишера
+            rcond: float
+                минимально допустимая оценка обратного числа
+                обусловленности информационной матрицы
+
+        Returns
+        ----------
+            np.ndarray
+                (s x s) матрица, обратная к информационной матрице,
+                или None, если матрица не является положительно
+                определенной или плохо обусловлена
+    """
+    try:
+        L = npl.cholesky(imf)
+    except npl.LinAlgError:
+        return None
+    # Оценка обратного числа обусловленности по диагонали
+    # множителя Холецкого
+    diag = np.abs(np.diag(L))
+    if (np.min(diag) / np.max(diag)) ** 2 < rcond:
+        return None
+    inv_L = npl.inv(L)
+    return inv_L.T @ inv_L
+
+
+def woodbury_update(P, W, sign=1):
+    """ Функция обновления матрицы, обратной к информационной
+        матрице Фишера, при приращении информационной матрицы
+        вида sign W W^T (тождество Вудбери)
+
+        Parameters
+        ----------
+            P: np.ndarray
+                (s x s) матрица, обратная к информационной матрице
+            W: np.ndarray
+                (s x k)-сомножитель приращения информационной матрицы
+            sign: int
+                1 - добавление приращения, -1 - его исключение
+
+        Returns
+        ----------
+            np.ndarray
+                (s x s) матрица, обратная к обновленной информационной
+                матрице, или None, если обновление численно неустойчиво
+    """
+    PW = P @ W
+    S = np.eye(W.shape[1]) + sign * W.T @ PW
+    try:
+        L = npl.cholesky(S)
+    except npl.LinAlgError:
+        return None
+    G = npl.solve(L, PW.T)
+    P = P - sign * G.T @ G
+    if np.any(np.diag(P) <= 0):
+        return None
+    return P
+
+
+def regularized_solve(imf, grad, reg=1e-10):
+    """ Функция решения системы с информационной матрицей
+        Фишера с регуляризацией по Тихонову
+
+        Parameters
+        ----------
+            imf: np.ndarray
+                (s x s) информационная матрица Фишера
+            grad: np.ndarray
+                s-вектор градиента критерия максимального правдоподобия
+            reg: float
+                коэффициент регуляризации относительно среднего
+                диагонального элемента информационной матрицы
+
+        Returns
+        ----------
+            np.ndarray
+                s-вектор решения системы (imf + lambda I) x = grad
+    """
+    s = len(grad)
+    lam = reg * max(np.trace(imf) / s, np.finfo(float).tiny)
+    return npl.solve(imf + lam * np.eye(s), grad)
@@ -1,8 +1,64 @@
-from position_control_system.conventional_model import *
-from position_control_system.common_data import *
+import re
+from binary_observations import is_binary, open_binary, read_header, write_header
+import numpy as np
+from model_registry import get_model
 
 
-def generate_data(N, theta_true, f_name):
+def read_observations(f_name, replication=0):
+    """ Генератор наблюдений из файла с данными наблюдений
+
+        Формат файла (текстовый или двоичный, см. binary_observations)
+        определяется автоматически.
+
+        Parameters
+        ----------
+            f_name: str
+                имя файла с данными наблюдений
+            replication: int
+                номер реализации в двоичном файле с
+                несколькими реализациями
+
+        Yields
+        ----------
+            np.ndarray
+                m-вектор очередного наблюдения
+    """
+    if is_binary(f_name):
+        header, Y = open_binary(f_name)
+        yield from Y if header['B'] == 1 else Y[:, replication]
+        return
+    with open(f_name, 'r') as f:
+        for line in f:
+            yield np.array(re.split('[ 	]', line)).astype(float)
+
+
+def count_observations(f_name):
+    """ Функция подсчета количества наблюдений в файле
+        с данными наблюдений без их разбора
+
+        Parameters
+        ----------
+            f_name: str
+                имя файла с данными наблюдений
+
+        Returns
+        ----------
+            int
+                количество наблюдений
+    """
+    if is_binary(f_name):
+        return read_header(f_name)['N']
+    N = 0
+    last = b'\n'
+    with open(f_name, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            N += block.count(b'\n')
+            last = block[-1:]
+    # Последняя строка может не оканчиваться переводом строки
+    return N + (last != b'\n')
+
+
+def generate_data(N, theta_true, f_name, model=None):
     """ Процедура генерации наблюдений эксперимента
 
         Parameters
@@ -13,14 +69,18 @@ def generate_data(N, theta_true, f_name):
                 s-вектор истинных параметров
             f_name: str
                 имя файла для записи сгенерированных данных
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
     """
 
     # Блок подготовки
     # -----------------------------------------
-    n, m, r = get_data()
+    model = get_model(model)
+    conventional = model.conventional
+    n, m, r = conventional.get_data()
     mu = np.zeros(m)
-    x = get_xt0()
-    t = get_t0()
+    x = conventional.get_xt0()
+    t = model.common.get_t0()
     # -----------------------------------------
 
     # Открытие файла для записи сгенерированных данных
@@ -28,12 +88,12 @@ def generate_data(N, theta_true, f_name):
         for k in range(N):
             # Обновление матриц модели
             # -----------------------------------------
-            F = get_F(t, theta_true)
-            Psi = get_Psi(t, theta_true)
-            u = get_u(t)
-            t = get_t_next(t)
-            R = get_R(t, theta_true)
-            H = get_H(t, theta_true)
+            F = conventional.get_F(t, theta_true)
+            Psi = conventional.get_Psi(t, theta_true)
+            u = conventional.get_u(t)
+            t = model.common.get_t_next(t)
+            R = conventional.get_R(t, theta_true)
+            H = conventional.get_H(t, theta_true)
             # -----------------------------------------
 
             # Вычисление значения вектора состояния и
@@ -41,7 +101,7 @@ def generate_data(N, theta_true, f_name):
             # -----------------------------------------
             x = F @ x + Psi @ u
             v = np.random.multivariate_normal(mu, R)
-            y = np.reshape(np.matmul(H, x) + v, m)
+            y = np.reshape(np.matmul(H, x), m) + v
             # -----------------------------------------
 
             # Вывод в файл сгенерированного вектора
@@ -53,7 +113,99 @@ def generate_data(N, theta_true, f_name):
             # -----------------------------------------
 
 
-def output(theta_est, error, time, method, s, f):
+def generate_data_bulk(N, theta_true, f_name, replications=1, seed=None, binary=True,
+                       block=1 << 16, model=None):
+    """ Процедура генерации наблюдений эксперимента блоками
+
+        Матрицы модели постоянны (TIME_INVARIANT), поэтому при постоянном
+        управлении (CONSTANT_INPUT) состояния блока из L моментов вычисляются
+        в замкнутой форме x(k + j) = F^j x(k) + sum_{i<j} F^i Psi u по заранее
+        вычисленным степеням F; при меняющемся управлении - последовательно
+        по шагам. Ошибки измерений всех реализаций генерируются одним
+        вызовом генератора на блок, и блок записывается в файл целиком.
+        Последовательность ошибок измерений не зависит от размера блока.
+
+        Parameters
+        ----------
+            N: int
+                количество наблюдений
+            theta_true: np.ndarray
+                s-вектор истинных параметров
+            f_name: str
+                имя файла для записи сгенерированных данных
+            replications: int
+                количество независимых реализаций наблюдений
+            seed: int, np.random.SeedSequence
+                начальное значение генератора случайных чисел
+            binary: bool
+                записывать данные в двоичном формате (см. binary_observations);
+                текстовый формат допускает только одну реализацию
+            block: int
+                количество моментов времени в блоке
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+    """
+    model = get_model(model)
+    conventional = model.conventional
+    if not conventional.TIME_INVARIANT:
+        raise ValueError('блочная генерация требует постоянных матриц модели')
+    if replications != 1 and not binary:
+        raise ValueError('текстовый формат допускает только одну реализацию')
+
+    # Блок подготовки
+    # -----------------------------------------
+    n, m, r = conventional.get_data()
+    rng = np.random.default_rng(seed)
+    t = model.common.get_t0()
+    x = np.reshape(conventional.get_xt0(), n)
+    F = conventional.get_F(t, theta_true)
+    H = conventional.get_H(t, theta_true)
+    chol_R = np.linalg.cholesky(conventional.get_R(t, theta_true))
+    Psi = conventional.get_Psi(t, theta_true)
+    Fu = np.reshape(Psi @ conventional.get_u(t), n)
+    L = max(min(block, N), 1)
+
+    # F_pow[j] = F^(j+1), c[j] = sum_{i<=j} F^i Psi u
+    if conventional.CONSTANT_INPUT:
+        F_pow = np.empty(shape=(L, n, n))
+        c = np.empty(shape=(L, n))
+        F_pow[0] = F
+        c[0] = Fu
+        for j in range(1, L):
+            F_pow[j] = F @ F_pow[j - 1]
+            c[j] = F @ c[j - 1] + Fu
+    fmt = ' '.join(['%f'] * m) + '\n'
+    # -----------------------------------------
+
+    with open(f_name, 'wb' if binary else 'w') as f:
+        if binary:
+            write_header(f, m, N, '<f8', replications)
+        for k in range(0, N, L):
+            size = min(L, N - k)
+
+            # Вычисление векторов состояния и измерения с номерами k + 1, ..., k + size
+            # -----------------------------------------
+            if conventional.CONSTANT_INPUT:
+                X = F_pow[:size] @ x + c[:size]
+            else:
+                X = np.empty(shape=(size, n))
+                for j in range(size):
+                    x = F @ x + np.reshape(Psi @ conventional.get_u(t), n)
+                    t = model.common.get_t_next(t)
+                    X[j] = x
+            x = X[-1]
+            V = rng.standard_normal(size=(size, replications, m)) @ chol_R.T
+            Y = (X @ H.T)[:, np.newaxis, :] + V
+            # -----------------------------------------
+
+            # Вывод блока в файл
+            if binary:
+                Y.tofile(f)
+            else:
+                f.write((fmt * size) % tuple(Y.ravel()))
+
+
+def output(theta_est, error, time, method, s, f, cpu_time=None, stats=None):
     """ Процедура вывода полученных результатов
 
         Parameters
@@ -70,6 +222,11 @@ def output(theta_est, error, time, method, s, f):
                 размер вектора параметров
             f:
                 указатель на фай файл для записи результатов
+            cpu_time: float
+                процессорное время работы метода (если задано)
+            stats: dict
+                статистика метода, например количества наблюдений
+                и пересчетов информационной матрицы (если задана)
     """
     # Вывод названия метода
     f.write(method.center(30))
@@ -87,4 +244,8 @@ def output(theta_est, error, time, method, s, f):
 
     # Вывод времени работы метода
     f.write('\n%-5s %10.4f\n' % ('time', time))
+    if cpu_time is not None:
+        f.write('%-5s %10.4f\n' % ('cpu', cpu_time))
+    for key, value in (stats or {}).items():
+        f.write('%-16s %10d\n' % (key, value))
     f.write('------------------------------\n\n')
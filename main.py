@@ -1,30 +1,83 @@
+import functools
 import re
-import time
-from input_output import generate_data, output
-from rmlm import rmle
-from ekf import re_ekf
+import sys
+from input_output import generate_data_bulk, output
+from rmlm import rmle, iter_rmle
+from ekf import re_ekf, iter_ekf
+from shared_source import run_shared, run_parallel
+from result_store import append_runs
+import profiling
 from graphics import *
 
 
-s, theta_true = get_data_theta()
-N = int(input('Введите число измерений:\n'))
-f_in = 'data/position_control_system' + str(N)
-f_out = 'results/position_control_system' + str(N)
-answer = input('Хотите сгенерировать новые данные? (y/n)\n')
-if answer == 'y':
-    generate_data(N, theta_true, f_in)
-
-answer = input('Введите начальное значение параметров через пробел\n')
-init_theta = np.array(re.split('[ ]', answer)).astype(np.float)
-start_rmlm = time.time()
-theta_est_rmlm = rmle(init_theta, f_in, s)
-end_rmlm = time.time()
-start_ekf = time.time()
-theta_est_ekf = re_ekf(init_theta, f_in, s)
-end_ekf = time.time()
-error_rmlm, error_ekf = visualize_results(N, s, theta_est_rmlm, theta_est_ekf, theta_true)
-
-with open(f_out, 'w') as f:
-    output(theta_est_rmlm[N], error_rmlm, end_rmlm-start_rmlm, 'RMLM', s, f)
-    output(theta_est_ekf[N], error_ekf, end_ekf-start_ekf, 'EKF', s, f)
+# Выполнение методов одновременно в отдельных процессах
+# (иначе - последовательно за один проход по данным)
+PARALLEL = True
 
+# Профилирование этапов вычислений методов
+PROFILE = False
+
+# Квадратно-корневая форма расширенного фильтра Калмана. Она требует
+# неотрицательно определенной начальной ковариационной матрицы, а
+# get_P0 модели position_control_system имеет отрицательное собственное
+# значение (-0.067), поэтому в этой форме используется P0_SQRT -
+# get_P0 с дисперсией второй компоненты состояния 0.2 вместо 0
+SQUARE_ROOT = False
+P0_SQRT = np.array([[0.1, 0.1, 1, 0.1],
+                    [0.1, 0.2, 0, 0],
+                    [1, 0, 110, 0],
+                    [0.1, 0, 0, 1]])
+
+
+if __name__ == '__main__':
+    s, theta_true = get_data_theta()
+    N = int(input('Введите число измерений:\n'))
+    f_in = 'data/position_control_system' + str(N)
+    f_out = 'results/position_control_system.npz'
+    answer = input('Хотите сгенерировать новые данные? (y/n)\n')
+    if answer == 'y':
+        generate_data_bulk(N, theta_true, f_in)
+
+    answer = input('Введите начальное значение параметров через пробел\n')
+    init_theta = np.array(re.split('[ ]', answer)).astype(float)
+    ekf_options = {'square_root': SQUARE_ROOT, 'P0': P0_SQRT if SQUARE_ROOT else None}
+    # Количество наблюдений и пересчетов информационной матрицы RMLM
+    stats = {'RMLM': {}}
+    if PROFILE:
+        profiling.enable()
+    if PARALLEL:
+        ekf = functools.partial(re_ekf, **ekf_options)
+        results = run_parallel(f_in, {'RMLM': (init_theta, rmle), 'EKF': (init_theta, ekf)}, s,
+                               stats=stats)
+    else:
+        def make_rmlm(y, **options):
+            return iter_rmle(init_theta, y, s, **options)
+
+        def make_ekf(y):
+            return iter_ekf(init_theta, y, s, **ekf_options)
+
+        results, _ = run_shared(f_in, {'RMLM': (init_theta, make_rmlm),
+                                       'EKF': (init_theta, make_ekf)}, stats=stats)
+    profile = profiling.report() if PROFILE else None
+    profiling.disable()
+    theta_est_rmlm, time_rmlm, cpu_time_rmlm = results['RMLM']
+    theta_est_ekf, time_ekf, cpu_time_ekf = results['EKF']
+    error_rmlm, error_ekf = visualize_results(N, s, theta_est_rmlm, theta_est_ekf, theta_true,
+                                              'results/position_control_system' + str(N))
+
+    # Сохранение траекторий оценок и ошибок в хранилище результатов
+    # -----------------------------------------
+    runs = []
+    for method, (theta_est, wall_time, cpu_time) in results.items():
+        error = relative_error(theta_true, theta_est)
+        metadata = {'method': method, 'data': f_in, 'N': N, 'init_theta': init_theta,
+                    'theta_true': theta_true, 'parallel': PARALLEL, 'square_root': SQUARE_ROOT,
+                    'timings': {'wall': wall_time, 'cpu': cpu_time}, 'profile': profile,
+                    'stats': stats.get(method)}
+        runs.append(({'theta_est': theta_est, 'error': error}, metadata))
+    append_runs(f_out, runs)
+    # -----------------------------------------
+
+    output(theta_est_rmlm[N], error_rmlm, time_rmlm, 'RMLM', s, sys.stdout, cpu_time_rmlm,
+           stats['RMLM'])
+    output(theta_est_ekf[N], error_ekf, time_ekf, 'EKF', s, sys.stdout, cpu_time_ekf)
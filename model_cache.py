@@ -0,0 +1,82 @@
+from collections import OrderedDict
+import functools
+import numpy as np
+
+
+# Список кэшей всех мемоизированных функций модели
+_caches = []
+
+
+def _key_part(arg):
+    """ Функция получения части ключа кэша по аргументу функции модели
+
+        Parameters
+        ----------
+            arg:
+                аргумент функции модели (вектор параметров,
+                вектор состояния или число)
+
+        Returns
+        -------
+            bytes
+                представление аргумента, пригодное для хэширования
+    """
+    return np.asarray(arg, dtype=float).tobytes()
+
+
+def memoize(time_invariant=False, maxsize=128, args_in_key=None):
+    """ Декоратор мемоизации функций модели вида f(t, *args)
+
+        Результат кэшируется по ключу (theta, t) с вытеснением давно
+        не использовавшихся значений. Для стационарной модели момент
+        времени в ключ не входит. Возвращаемые массивы доступны
+        только для чтения, так как разделяются между вызовами.
+
+        Parameters
+        ----------
+            time_invariant: bool
+                признак стационарности модели
+            maxsize: int
+                максимальное количество хранимых значений
+            args_in_key: int
+                количество аргументов после t, входящих в ключ
+                (None - все аргументы)
+
+        Returns
+        -------
+            function
+                декоратор функции модели
+    """
+    def decorator(func):
+        cache = OrderedDict()
+        _caches.append(cache)
+
+        @functools.wraps(func)
+        def wrapper(t, *args):
+            key = tuple(_key_part(arg) for arg in args[:args_in_key])
+            if not time_invariant:
+                key += (t,)
+            # Поиск значения в кэше
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+                return value
+            # Вычисление и сохранение нового значения
+            value = func(t, *args)
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+            cache[key] = value
+            if len(cache) > maxsize:
+                cache.popitem(last=False)
+            return value
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
+
+
+def clear_caches():
+    """ Процедура очистки кэшей всех мемоизированных функций модели
+    """
+    for cache in _caches:
+        cache.clear()
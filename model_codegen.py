@@ -0,0 +1,141 @@
+import hashlib
+import importlib.util
+import inspect
+import os
+import numpy as np
+
+
+# Версия генератора кода: входит в ключ кэша сгенерированных модулей
+CODEGEN_VERSION = 2
+
+
+def generate_source(theta, matrices) -> str:
+    """ Функция генерации исходного кода функции вычисления матриц
+        модели и их частных производных по переменным
+
+        Для всех матриц и производных выполняется исключение общих
+        подвыражений, и значения всех ненулевых элементов вычисляются
+        в одной функции с записью в заранее выделенные буферы.
+        Буфер с номером 2i содержит i-ую матрицу, буфер 2i + 1 -
+        ее (s x ...)-массив частных производных. Выражения вычисляются
+        функциями numpy, поэтому функция вычисляет матрицы как для
+        одного вектора переменных, так и для набора векторов по первой
+        оси (буферы выделяются функцией allocate с размером набора).
+
+        Parameters
+        ----------
+            theta: list
+                s-список символов переменных (sympy.Symbol), по которым
+                вычисляются производные
+            matrices: dict
+                матрицы модели в виде выражений от переменных
+                (sympy.Matrix) в порядке следования буферов
+
+        Returns
+        -------
+            str
+                исходный код модуля с функциями allocate и evaluate
+    """
+    import sympy as sp
+    from sympy.printing.numpy import NumPyPrinter
+
+    # Вычисление производных и сбор ненулевых элементов всех буферов
+    # -----------------------------------------
+    s = len(theta)
+    shapes = []
+    entries = []
+    for buffer, M in enumerate(matrices.values()):
+        M = sp.Matrix(M)
+        buffer *= 2
+        shapes.append(M.shape)
+        shapes.append((s,) + M.shape)
+        for (i, j), expr in np.ndenumerate(np.array(M.tolist(), dtype=object)):
+            if expr != 0:
+                entries.append((buffer, (i, j), expr))
+            for k in range(s):
+                d_expr = sp.diff(expr, theta[k])
+                if d_expr != 0:
+                    entries.append((buffer + 1, (k, i, j), d_expr))
+    # -----------------------------------------
+
+    # Исключение общих подвыражений
+    replacements, reduced = sp.cse([expr for _, _, expr in entries],
+                                   symbols=sp.numbered_symbols('_c'))
+
+    # Формирование исходного кода
+    # -----------------------------------------
+    printer = NumPyPrinter({'fully_qualified_modules': True})
+    lines = ['# Модуль сгенерирован model_codegen.generate_source, не редактировать',
+             'import numpy',
+             '',
+             '',
+             f'NAMES = {tuple(matrices)!r}',
+             f'SHAPES = {tuple(shapes)!r}',
+             '',
+             '',
+             'def allocate(batch=()):',
+             '    return tuple(numpy.zeros(tuple(batch) + shape) for shape in SHAPES)',
+             '',
+             '',
+             'def evaluate(theta, out):']
+    for k in range(s):
+        lines.append(f'    {theta[k].name} = theta[..., {k}]')
+    for symbol, expr in replacements:
+        lines.append(f'    {symbol.name} = {printer.doprint(expr)}')
+    for (buffer, index, _), expr in zip(entries, reduced):
+        lines.append(f'    out[{buffer}][..., {", ".join(map(str, index))}] = '
+                     f'{printer.doprint(expr)}')
+    lines.append('    return out')
+    # -----------------------------------------
+    return '\n'.join(lines) + '\n'
+
+
+def load_model(define, depends=(), cache_dir=None):
+    """ Функция загрузки сгенерированного модуля вычисления матриц модели
+
+        Сгенерированный код сохраняется на диске с ключом по исходному
+        коду функции define, поэтому символьные вычисления выполняются
+        только при изменении определения модели.
+
+        Parameters
+        ----------
+            define: function
+                функция без параметров, возвращающая список символов
+                переменных и словарь матриц модели (см. generate_source)
+            depends: tuple
+                функции, вызываемые из define, исходный код которых
+                также входит в ключ кэша
+            cache_dir: str
+                каталог кэша сгенерированного кода (по умолчанию
+                __modelcache__ рядом с модулем, содержащим define)
+
+        Returns
+        -------
+            module
+                модуль с функциями allocate(batch) и evaluate(theta, out)
+    """
+
+    # Вычисление ключа кэша и пути к сгенерированному модулю
+    # -----------------------------------------
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(inspect.getfile(define)), '__modelcache__')
+    sources = [inspect.getsource(func) for func in (define,) + tuple(depends)]
+    key = hashlib.sha256('\n'.join([str(CODEGEN_VERSION)] + sources).encode()).hexdigest()
+    name = f'{define.__module__.rsplit(".", 1)[-1]}_{define.__name__}_{key[:16]}'
+    path = os.path.join(cache_dir, name + '.py')
+    # -----------------------------------------
+
+    # Генерация кода при отсутствии его в кэше
+    if not os.path.exists(path):
+        source = generate_source(*define())
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(source)
+        os.replace(tmp_path, path)
+
+    # Загрузка сгенерированного модуля
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,172 @@
+import functools
+import profiling
+
+
+# Название модели, используемой по умолчанию
+DEFAULT_MODEL = 'position_control_system'
+
+# Функции создания моделей по названиям
+_factories = {}
+
+# Созданные модели: (название, параметры) -> модель
+_models = {}
+
+
+class Model:
+    """ Модель системы для методов оценивания
+
+        Объединяет три пространства имен с функциями модели: обычную модель
+        conventional (RMLM и генерация данных: get_data, get_F, get_dFdtheta,
+        get_Psi, get_dPsidtheta, get_H, get_dHdtheta, get_R, get_dRdtheta,
+        get_inv_R, get_u, get_xt0, get_dxt0dtheta, функции *_batch, признаки
+        TIME_INVARIANT и CONSTANT_INPUT), расширенную модель extended (EKF:
+        get_data, get_f, get_F, get_psi, get_h, get_H, get_R, get_u, get_G,
+        get_Q, get_P0, get_x0, функции *_batch) и общие данные common
+        (get_data_theta, get_t0, get_t_step, get_t_next). Пространством
+        имен может быть модуль (как position_control_system) или объект
+        с такими же методами (как synthetic_model).
+    """
+
+    def __init__(self, name, conventional, extended, common, options=None):
+        """ Parameters
+            ----------
+                name: str
+                    название модели в реестре
+                conventional: module or object
+                    обычная модель
+                extended: module or object
+                    расширенная модель
+                common: module or object
+                    общие данные
+                options: dict
+                    параметры, с которыми модель создана в реестре
+        """
+        self.name = name
+        self.conventional = conventional
+        self.extended = extended
+        self.common = common
+        self.options = dict(options or {})
+
+    def __reduce__(self):
+        # Модули не сериализуются, поэтому в рабочие процессы
+        # передаются название и параметры модели
+        return functools.partial(get_model, self.name, **self.options), ()
+
+    def __repr__(self):
+        options = ''.join(f', {key}={value!r}' for key, value in sorted(self.options.items()))
+        return f'Model({self.name!r}{options})'
+
+
+def register(name, factory):
+    """ Процедура регистрации модели
+
+        Parameters
+        ----------
+            name: str
+                название модели
+            factory: function
+                функция factory(**options), возвращающая Model
+    """
+    _factories[name] = factory
+
+
+def available_models() -> list[str]:
+    """ Функция получения названий зарегистрированных моделей
+
+        Returns
+        ----------
+            list
+                названия моделей в алфавитном порядке
+    """
+    return sorted(_factories)
+
+
+def get_model(model=None, **options) -> Model:
+    """ Функция получения модели по названию
+
+        Модели с одинаковыми названием и параметрами создаются один раз.
+
+        Parameters
+        ----------
+            model: str or Model
+                название модели в реестре (None - DEFAULT_MODEL)
+                или готовая модель, которая возвращается без изменений
+            options:
+                параметры создания модели (см. функцию модели в реестре)
+
+        Returns
+        ----------
+            Model
+                модель
+    """
+    if isinstance(model, Model):
+        return model
+    key = (model or DEFAULT_MODEL, tuple(sorted(options.items())))
+    if key not in _models:
+        if key[0] not in _factories:
+            raise KeyError(f'неизвестная модель {key[0]!r}, доступны: {available_models()}')
+        _models[key] = _factories[key[0]](**options)
+    return _models[key]
+
+
+def _position_control_system() -> Model:
+    """ Функция создания модели системы управления положением
+
+        Returns
+        ----------
+            Model
+                модель из модулей пакета position_control_system
+    """
+    from position_control_system import common_data, conventional_model, extended_model
+
+    # Функции, время вызова которых измеряется при включенном профилировании
+    # -----------------------------------------
+    profiling.instrument(vars(conventional_model),
+                         ('get_F', 'get_Psi', 'get_u', 'get_dFdtheta', 'get_dPsidtheta', 'get_H',
+                          'get_inv_R', 'get_dHdtheta', 'get_dRdtheta'), 'grad_imf.model')
+    profiling.instrument(vars(extended_model), ('get_f', 'get_F', 'get_psi', 'get_u', 'get_G',
+                                                'get_Q', 'get_h', 'get_H', 'get_R'), 'ekf.model')
+    # -----------------------------------------
+    return Model('position_control_system', conventional_model, extended_model, common_data)
+
+
+def _position_control_system_symbolic() -> Model:
+    """ Функция создания модели системы управления положением,
+        матрицы которой вычисляются сгенерированным по символьному
+        определению кодом (см. model_codegen)
+
+        Returns
+        ----------
+            Model
+                модель из модулей symbolic_model и symbolic_extended_model
+    """
+    from position_control_system import common_data, symbolic_model, symbolic_extended_model
+
+    # Функции, время вызова которых измеряется при включенном профилировании
+    # -----------------------------------------
+    profiling.instrument(vars(symbolic_model),
+                         ('get_F', 'get_Psi', 'get_u', 'get_dFdtheta', 'get_dPsidtheta', 'get_H',
+                          'get_inv_R', 'get_dHdtheta', 'get_dRdtheta'), 'grad_imf.model')
+    profiling.instrument(vars(symbolic_extended_model),
+                         ('get_f', 'get_F', 'get_psi', 'get_u', 'get_G', 'get_Q', 'get_h', 'get_H',
+                          'get_R'), 'ekf.model')
+    # -----------------------------------------
+    return Model('position_control_system_symbolic', symbolic_model, symbolic_extended_model,
+                 common_data)
+
+
+def _synthetic(**options) -> Model:
+    """ Функция создания синтетической модели (см. synthetic_model.make_model)
+
+        Returns
+        ----------
+            Model
+                синтетическая модель
+    """
+    from synthetic_model import make_model
+    return make_model(**options)
+
+
+register('position_control_system', _position_control_system)
+register('position_control_system_symbolic', _position_control_system_symbolic)
+register('synthetic', _synthetic)
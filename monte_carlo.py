@@ -0,0 +1,191 @@
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from input_output import generate_data_bulk
+from model_registry import get_model
+from rmlm import rmle, rmle_recursive
+from ekf import re_ekf
+from relative_errors import relative_error, rmse
+
+
+# Методы оценивания, доступные для экспериментов
+ESTIMATORS = {
+    'RMLM': rmle,
+    'RMLM-recursive': rmle_recursive,
+    'EKF': re_ekf,
+}
+
+# Процентили времени работы методов
+PERCENTILES = (5, 50, 95)
+
+
+def _run_job(job) -> tuple:
+    """ Функция оценивания параметров одним методом
+        по одной реализации наблюдений
+
+        Parameters
+        ----------
+            job: tuple
+                номер реализации, название метода, s-вектор начальных
+                значений параметров, размер вектора параметров, имя
+                файла с данными наблюдений реализации, модель системы
+
+        Returns
+        ----------
+            tuple
+                номер реализации, название метода, s-вектор оценок
+                параметров (NaN при расходимости метода), астрономическое
+                и процессорное время работы
+    """
+    r, name, init_theta, s, f_name, model = job
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        with np.errstate(all='ignore'):
+            theta_est = ESTIMATORS[name](init_theta, f_name, s, model=model)[-1]
+    except (ArithmeticError, np.linalg.LinAlgError):
+        theta_est = np.full(s, np.nan)
+    return r, name, theta_est, time.perf_counter() - wall, time.process_time() - cpu
+
+
+def run_monte_carlo(R, N, theta_true, init_theta, estimators=('RMLM', 'EKF'), seed=0,
+                    workers=None, model=None) -> dict:
+    """ Функция статистического моделирования оценивания параметров
+
+        Каждая из R реализаций наблюдений генерируется собственным
+        генератором, порожденным от SeedSequence(seed), и оценивается
+        всеми методами; задания (реализация x метод) распределяются
+        между процессами. Результаты собираются в порядке заданий,
+        поэтому не зависят от количества процессов.
+
+        Parameters
+        ----------
+            R: int
+                количество реализаций
+            N: int
+                количество наблюдений в реализации
+            theta_true: np.ndarray
+                s-вектор истинных параметров
+            init_theta: np.ndarray
+                s-вектор начальных значений параметров
+            estimators: tuple
+                названия методов (см. ESTIMATORS)
+            seed: int
+                начальное значение генератора случайных чисел
+            workers: int
+                количество процессов (1 - выполнение в текущем процессе,
+                None - по количеству процессоров)
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+
+        Returns
+        ----------
+            dict
+                название метода -> статистики (см. summarize)
+    """
+    theta_true = np.asarray(theta_true, dtype=float)
+    init_theta = np.asarray(init_theta, dtype=float)
+    s = len(theta_true)
+    model = get_model(model)
+    children = np.random.SeedSequence(seed).spawn(R)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        # Генерация реализаций наблюдений
+        # -----------------------------------------
+        files = []
+        for r, child in enumerate(children):
+            f_name = os.path.join(data_dir, f'replication{r}')
+            generate_data_bulk(N, theta_true, f_name, seed=child, model=model)
+            files.append(f_name)
+        # -----------------------------------------
+
+        # Оценивание параметров
+        # -----------------------------------------
+        jobs = [(r, name, init_theta, s, files[r], model) for r in range(R)
+                for name in estimators]
+        if workers == 1:
+            results = list(map(_run_job, jobs))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_run_job, jobs, chunksize=max(len(jobs) // 64, 1)))
+        # -----------------------------------------
+
+    # Сбор результатов по методам в порядке реализаций
+    # -----------------------------------------
+    theta_est = {name: np.empty(shape=(R, s)) for name in estimators}
+    times = {name: np.empty(shape=(R, 2)) for name in estimators}
+    for r, name, theta, wall, cpu in results:
+        theta_est[name][r] = theta
+        times[name][r] = wall, cpu
+    # -----------------------------------------
+    return {name: summarize(theta_est[name], times[name], theta_true) for name in estimators}
+
+
+def summarize(theta_est, times, theta_true) -> dict:
+    """ Функция вычисления статистик оценок параметров
+
+        Реализации с неконечными оценками (расходимость метода)
+        учитываются только в количестве отказов.
+
+        Parameters
+        ----------
+            theta_est: np.ndarray
+                R x s-вектор оценок параметров по реализациям
+            times: np.ndarray
+                R x 2-вектор астрономического и процессорного
+                времени работы по реализациям
+            theta_true: np.ndarray
+                s-вектор истинных параметров
+
+        Returns
+        ----------
+            dict
+                количество реализаций R и отказов failed, s-векторы
+                среднего mean, дисперсии var, среднеквадратичной ошибки
+                rmse и средней относительной ошибки relative_error оценок,
+                процентили PERCENTILES астрономического wall_time и
+                процессорного cpu_time времени работы
+    """
+    finite = np.all(np.isfinite(theta_est), axis=1)
+    theta = theta_est[finite]
+    return {
+        'R': len(theta_est),
+        'failed': int(np.count_nonzero(~finite)),
+        'mean': theta.mean(axis=0),
+        'var': theta.var(axis=0, ddof=1) if len(theta) > 1 else np.full(len(theta_true), np.nan),
+        'rmse': rmse(theta_true, theta),
+        'relative_error': np.mean(relative_error(theta_true, theta), axis=0),
+        'wall_time': np.percentile(times[:, 0], PERCENTILES),
+        'cpu_time': np.percentile(times[:, 1], PERCENTILES),
+    }
+
+
+def output_monte_carlo(summary, s, f):
+    """ Процедура вывода результатов статистического моделирования
+
+        Parameters
+        ----------
+            summary: dict
+                название метода -> статистики (см. summarize)
+            s: int
+                размер вектора параметров
+            f:
+                указатель на файл для записи результатов
+    """
+    for method, stats in summary.items():
+        f.write(method.center(48))
+        f.write('\n------------------------------------------------\n')
+        f.write('%-14s %d (failed %d)\n' % ('R', stats['R'], stats['failed']))
+        for key in ('mean', 'var', 'rmse', 'relative_error'):
+            f.write('%-14s' % key)
+            for i in range(s):
+                f.write(' %10.4g' % stats[key][i])
+            f.write('\n')
+        f.write('%-14s' % 'percentile' + ''.join(' %10d' % p for p in PERCENTILES) + '\n')
+        for key in ('wall_time', 'cpu_time'):
+            f.write('%-14s' % key)
+            for value in stats[key]:
+                f.write(' %10.4f' % value)
+            f.write('\n')
+        f.write('------------------------------------------------\n\n')
@@ -1,5 +1,14 @@
 import math
 import numpy as np
+import numpy.linalg as npl
+from model_cache import memoize
+
+
+# Признак стационарности модели: матрицы модели не зависят от времени
+TIME_INVARIANT = True
+
+# Признак постоянного вектора управления
+CONSTANT_INPUT = True
 
 
 def get_data() -> tuple[int, int, int]:
@@ -18,6 +27,31 @@ def get_data() -> tuple[int, int, int]:
     return n, m, r
 
 
+@memoize(TIME_INVARIANT)
+def _get_exp_terms(t, theta):
+    """ Функция получения общих для матриц модели подвыражений
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            theta: np.ndarray
+                s-вектор параметров
+
+        Returns
+        -------
+            T, temp, e: float, float, float
+                период дискретизации,
+                величина 1 / theta1,
+                величина exp(-theta1 * T).
+    """
+    T = 0.1
+    temp = 1. / theta[0]
+    e = math.exp(-theta[0] * T)
+    return T, temp, e
+
+
+@memoize(TIME_INVARIANT)
 def get_F(t, theta):
     """ Функция получения матрицы состояния
 
@@ -33,12 +67,12 @@ def get_F(t, theta):
             np.ndarray
                 (n x n)-матрица состояния
     """
-    T = 0.1
-    e = math.exp(-theta[0] * T)
-    return np.array([[1, (1. / theta[0]) * (1 - e)],
+    T, temp, e = _get_exp_terms(t, theta)
+    return np.array([[1, temp * (1 - e)],
                      [0, e]])
 
 
+@memoize(TIME_INVARIANT)
 def get_dFdtheta(t, theta):
     """ Функция получения матрицы значений частных производных
         матрицы состояния по параметрам
@@ -56,9 +90,7 @@ def get_dFdtheta(t, theta):
                 (s x n x n)-матрица частных производных
                 матрицы состояния по параметрам
     """
-    T = 0.1
-    temp = 1. / theta[0]
-    e = math.exp(-theta[0] * T)
+    T, temp, e = _get_exp_terms(t, theta)
     dFdtheta1 = [[0, temp * (-temp + e * (temp + T))],
                  [0, -T * e]]
     dFdtheta2 = [[0, 0],
@@ -66,6 +98,7 @@ def get_dFdtheta(t, theta):
     return np.array([dFdtheta1, dFdtheta2])
 
 
+@memoize(TIME_INVARIANT)
 def get_Psi(t, theta):
     """ Функция получения матрицы управления
 
@@ -81,13 +114,12 @@ def get_Psi(t, theta):
             np.ndarray
                 (n x r)-матрица управления
     """
-    T = 0.1
-    temp = 1. / theta[0]
-    e = math.exp(-theta[0] * T)
+    T, temp, e = _get_exp_terms(t, theta)
     return np.array([[theta[1] * temp * (T - temp + temp * e)],
                      [theta[1] * temp * (1 - e)]])
 
 
+@memoize(TIME_INVARIANT)
 def get_dPsidtheta(t, theta):
     """ Функция получения матрицы значений частных производных
         матрицы управления по параметрам
@@ -105,9 +137,7 @@ def get_dPsidtheta(t, theta):
                 (s x n x r)-матрица частных производных
                 матрицы управления по параметрам
     """
-    T = 0.1
-    temp = 1. / theta[0]
-    e = math.exp(-theta[0] * T)
+    T, temp, e = _get_exp_terms(t, theta)
     dPsidtheta1 = [[theta[1] * (temp ** 2) * (-T + 2 * temp - e * (T + 2 * temp))],
                    [theta[1] * (temp ** 2) * (e * (T * theta[0] + 1) - 1)]]
     dPsidtheta2 = [[temp * (T - temp + temp * e)],
@@ -115,6 +145,7 @@ def get_dPsidtheta(t, theta):
     return np.array([dPsidtheta1, dPsidtheta2])
 
 
+@memoize(TIME_INVARIANT, args_in_key=0)
 def get_H(t, theta):
     """ Функция получения матрицы измерения
 
@@ -133,6 +164,7 @@ def get_H(t, theta):
     return np.array([[1, 0]])
 
 
+@memoize(TIME_INVARIANT, args_in_key=0)
 def get_dHdtheta(t, theta):
     """ Функция получения матрицы значений частных производных
         матрицы измерения по параметрам
@@ -155,6 +187,7 @@ def get_dHdtheta(t, theta):
     return np.array([dHdtheta1, dHdtheta2])
 
 
+@memoize(TIME_INVARIANT, args_in_key=0)
 def get_dRdtheta(t, theta):
     """ Функция получения матрицы значений частных производных
         ковариационной матрицы ошибки измерения по параметрам
@@ -177,6 +210,7 @@ def get_dRdtheta(t, theta):
     return np.array([dRdtheta1, dRdtheta2])
 
 
+@memoize(TIME_INVARIANT, args_in_key=0)
 def get_u(t):
     """ Функция получения вектора управления
 
@@ -193,6 +227,7 @@ def get_u(t):
     return np.array([[75]])
 
 
+@memoize(TIME_INVARIANT)
 def get_R(t, theta):
     """ Функция получения ковариационной матрицы ошибки измерения
 
@@ -211,6 +246,27 @@ def get_R(t, theta):
     return np.array([[0.1]])
 
 
+@memoize(TIME_INVARIANT)
+def get_inv_R(t, theta):
+    """ Функция получения обратной ковариационной матрицы
+        ошибки измерения
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            theta: np.ndarray
+                s-вектор параметров
+
+        Returns
+        -------
+            np.ndarray
+                (m x m)-матрица, обратная ковариационной
+                матрице ошибки измерения
+    """
+    return npl.inv(get_R(t, theta))
+
+
 def get_xt0():
     """ Функция получения вектора начального состояния
 
@@ -238,3 +294,203 @@ def get_dxt0dtheta():
     dxt0dtheta2 = [[0],
                    [0]]
     return np.array([dxt0dtheta1, dxt0dtheta2])
+
+
+def _get_exp_terms_batch(thetas):
+    """ Функция получения общих для матриц модели подвыражений
+        для набора векторов параметров
+
+        Parameters
+        ----------
+            thetas: np.ndarray
+                (B x s)-матрица векторов параметров
+
+        Returns
+        -------
+            T, temp, e: float, np.ndarray, np.ndarray
+                период дискретизации,
+                B-вектор величин 1 / theta1,
+                B-вектор величин exp(-theta1 * T).
+    """
+    T = 0.1
+    temp = 1. / thetas[:, 0]
+    e = np.exp(-thetas[:, 0] * T)
+    return T, temp, e
+
+
+def get_F_batch(t, thetas):
+    """ Функция получения матриц состояния для набора векторов параметров
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            thetas: np.ndarray
+                (B x s)-матрица векторов параметров
+
+        Returns
+        -------
+            np.ndarray
+                (B x n x n)-массив матриц состояния
+    """
+    T, temp, e = _get_exp_terms_batch(thetas)
+    F = np.zeros(shape=(len(thetas), 2, 2))
+    F[:, 0, 0] = 1
+    F[:, 0, 1] = temp * (1 - e)
+    F[:, 1, 1] = e
+    return F
+
+
+def get_dFdtheta_batch(t, thetas):
+    """ Функция получения матриц значений частных производных матрицы
+        состояния по параметрам для набора векторов параметров
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            thetas: np.ndarray
+                (B x s)-матрица векторов параметров
+
+        Returns
+        -------
+            np.ndarray
+                (B x s x n x n)-массив частных производных
+                матрицы состояния по параметрам
+    """
+    T, temp, e = _get_exp_terms_batch(thetas)
+    dFdtheta = np.zeros(shape=(len(thetas), 2, 2, 2))
+    dFdtheta[:, 0, 0, 1] = temp * (-temp + e * (temp + T))
+    dFdtheta[:, 0, 1, 1] = -T * e
+    return dFdtheta
+
+
+def get_Psi_batch(t, thetas):
+    """ Функция получения матриц управления для набора векторов параметров
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            thetas: np.ndarray
+                (B x s)-матрица векторов параметров
+
+        Returns
+        -------
+            np.ndarray
+                (B x n x r)-массив матриц управления
+    """
+    T, temp, e = _get_exp_terms_batch(thetas)
+    Psi = np.empty(shape=(len(thetas), 2, 1))
+    Psi[:, 0, 0] = thetas[:, 1] * temp * (T - temp + temp * e)
+    Psi[:, 1, 0] = thetas[:, 1] * temp * (1 - e)
+    return Psi
+
+
+def get_dPsidtheta_batch(t, thetas):
+    """ Функция получения матриц значений частных производных матрицы
+        управления по параметрам для набора векторов параметров
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            thetas: np.ndarray
+                (B x s)-матрица векторов параметров
+
+        Returns
+        -------
+            np.ndarray
+                (B x s x n x r)-массив частных производных
+                матрицы управления по параметрам
+    """
+    T, temp, e = _get_exp_terms_batch(thetas)
+    dPsidtheta = np.empty(shape=(len(thetas), 2, 2, 1))
+    dPsidtheta[:, 0, 0, 0] = thetas[:, 1] * (temp ** 2) * (-T + 2 * temp - e * (T + 2 * temp))
+    dPsidtheta[:, 0, 1, 0] = thetas[:, 1] * (temp ** 2) * (e * (T * thetas[:, 0] + 1) - 1)
+    dPsidtheta[:, 1, 0, 0] = temp * (T - temp + temp * e)
+    dPsidtheta[:, 1, 1, 0] = temp * (1 - e)
+    return dPsidtheta
+
+
+def get_H_batch(t, thetas):
+    """ Функция получения матриц измерения для набора векторов параметров
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            thetas: np.ndarray
+                (B x s)-матрица векторов параметров
+
+        Returns
+        -------
+            np.ndarray
+                (B x m x n)-массив матриц измерения
+    """
+    H = get_H(t, thetas[0])
+    return np.broadcast_to(H, (len(thetas),) + H.shape)
+
+
+def get_dHdtheta_batch(t, thetas):
+    """ Функция получения матриц значений частных производных матрицы
+        измерения по параметрам для набора векторов параметров
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            thetas: np.ndarray
+                (B x s)-матрица векторов параметров
+
+        Returns
+        -------
+            np.ndarray
+                (B x s x m x n)-массив частных производных
+                матрицы измерения по параметрам
+    """
+    dHdtheta = get_dHdtheta(t, thetas[0])
+    return np.broadcast_to(dHdtheta, (len(thetas),) + dHdtheta.shape)
+
+
+def get_dRdtheta_batch(t, thetas):
+    """ Функция получения матриц значений частных производных
+        ковариационной матрицы ошибки измерения по параметрам
+        для набора векторов параметров
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            thetas: np.ndarray
+                (B x s)-матрица векторов параметров
+
+        Returns
+        -------
+            np.ndarray
+                (B x s x m x m)-массив частных производных ковариационной
+                матрицы ошибки измерения по параметрам
+    """
+    dRdtheta = np.reshape(get_dRdtheta(t, thetas[0]), (2, 1, 1))
+    return np.broadcast_to(dRdtheta, (len(thetas),) + dRdtheta.shape)
+
+
+def get_inv_R_batch(t, thetas):
+    """ Функция получения обратных ковариационных матриц ошибки
+        измерения для набора векторов параметров
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            thetas: np.ndarray
+                (B x s)-матрица векторов параметров
+
+        Returns
+        -------
+            np.ndarray
+                (B x m x m)-массив матриц, обратных ковариационной
+                матрице ошибки измерения
+    """
+    inv_R = get_inv_R(t, thetas[0])
+    return np.broadcast_to(inv_R, (len(thetas),) + inv_R.shape)
@@ -1,5 +1,10 @@
 import math
 import numpy as np
+from model_cache import memoize
+
+
+# Признак стационарности модели: матрицы модели не зависят от времени
+TIME_INVARIANT = True
 
 
 def get_data():
@@ -19,6 +24,31 @@ def get_data():
     return n, m, r
 
 
+@memoize(TIME_INVARIANT, maxsize=4)
+def _get_exp_terms(t, x):
+    """ Функция получения общих для функций расширенной
+        модели подвыражений
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            x: np.ndarray
+                n-вектор состояния
+
+        Returns
+        -------
+            T, temp, e: float, float, float
+                период дискретизации,
+                величина 1 / x3,
+                величина exp(-x3 * T).
+    """
+    T = 0.1
+    temp = 1. / x[2]
+    e = math.exp(-x[2] * T)
+    return T, temp, e
+
+
 def get_f(t, x):
     """ Функция получения вектора правой части
         расширенной модели
@@ -36,8 +66,7 @@ def get_f(t, x):
                 n-вектор правой части
                 расширенной модели
     """
-    T = 0.1
-    e = math.exp(-x[2]*T)
+    T, temp, e = _get_exp_terms(t, x)
     return np.array([[x[0] + (1 - e) * x[1] / x[2]],
                      [e * x[1]],
                      [x[2]],
@@ -62,9 +91,7 @@ def get_F(t, x):
                 (n x n)-матрица частных производных
                 вектора правой части по каждому состоянию
     """
-    T = 0.1
-    e = math.exp(-x[2]*T)
-    temp = 1. / x[2]
+    T, temp, e = _get_exp_terms(t, x)
     return np.array([[1, temp * (1 - e), x[1] * (temp**2) * (e * (1 + T * x[2]) - 1), 0],
                      [0, e, -x[1] * T * e, 0],
                      [0, 0, 1, 0],
@@ -87,9 +114,7 @@ def get_psi(t, x):
             np.ndarray
                 (n x r)-матрица управления
     """
-    T = 0.1
-    e = math.exp(-x[2] * T)
-    temp = 1./x[2]
+    T, temp, e = _get_exp_terms(t, x)
     return np.array([[x[3] * temp * (T - temp + temp * e)],
                      [x[3] * temp * (1 - e)],
                      [0],
@@ -135,6 +160,7 @@ def get_h(t, x):
     return np.array([x[0]])
 
 
+@memoize(TIME_INVARIANT, args_in_key=0)
 def get_H(t, x):
     """ Функция получения матрица частных производных
         вектора измерения расширенной модели
@@ -156,6 +182,7 @@ def get_H(t, x):
     return np.array([[1, 0, 0, 0]])
 
 
+@memoize(TIME_INVARIANT, args_in_key=0)
 def get_u(t):
     """ Функция получения вектора управления
 
@@ -172,6 +199,7 @@ def get_u(t):
     return np.array([[75]])
 
 
+@memoize(TIME_INVARIANT, args_in_key=0)
 def get_R(t, theta):
     """ Функция получения ковариационной матрицы ошибки измерения
 
@@ -190,6 +218,7 @@ def get_R(t, theta):
     return np.array([[0.1]])
 
 
+@memoize(TIME_INVARIANT, args_in_key=0)
 def get_G(t):
     """ Функция получения матрицы возмущения
         расширенной модели
@@ -210,6 +239,7 @@ def get_G(t):
                      [0, 1]])
 
 
+@memoize(TIME_INVARIANT, args_in_key=0)
 def get_Q(t):
     """ Функция получения ковариационной матрицы шума
         расширенной модели
@@ -238,3 +268,163 @@ def get_x0(theta):
                 n-вектор начального состояния
     """
     return np.array([0, 0, theta[0], theta[1]])
+
+
+def _get_exp_terms_batch(X):
+    """ Функция получения общих для функций расширенной модели
+        подвыражений для набора векторов состояния
+
+        Parameters
+        ----------
+            X: np.ndarray
+                (B x n)-матрица векторов состояния
+
+        Returns
+        -------
+            T, temp, e: float, np.ndarray, np.ndarray
+                период дискретизации,
+                B-вектор величин 1 / x3,
+                B-вектор величин exp(-x3 * T).
+    """
+    T = 0.1
+    temp = 1. / X[:, 2]
+    e = np.exp(-X[:, 2] * T)
+    return T, temp, e
+
+
+def get_f_batch(t, X):
+    """ Функция получения векторов правой части расширенной
+        модели для набора векторов состояния
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            X: np.ndarray
+                (B x n)-матрица векторов состояния
+
+        Returns
+        -------
+            np.ndarray
+                (B x n)-матрица векторов правой части
+                расширенной модели
+    """
+    T, temp, e = _get_exp_terms_batch(X)
+    f = np.array(X, dtype=float)
+    f[:, 0] = X[:, 0] + (1 - e) * X[:, 1] * temp
+    f[:, 1] = e * X[:, 1]
+    return f
+
+
+def get_F_batch(t, X):
+    """ Функция получения матриц частных производных вектора
+        правой части расширенной модели по каждому состоянию
+        для набора векторов состояния
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            X: np.ndarray
+                (B x n)-матрица векторов состояния
+
+        Returns
+        -------
+            np.ndarray
+                (B x n x n)-массив матриц частных производных
+                вектора правой части по каждому состоянию
+    """
+    T, temp, e = _get_exp_terms_batch(X)
+    F = np.zeros(shape=(len(X), 4, 4))
+    F[:, 0, 0] = 1
+    F[:, 0, 1] = temp * (1 - e)
+    F[:, 0, 2] = X[:, 1] * (temp ** 2) * (e * (1 + T * X[:, 2]) - 1)
+    F[:, 1, 1] = e
+    F[:, 1, 2] = -X[:, 1] * T * e
+    F[:, 2, 2] = 1
+    F[:, 3, 3] = 1
+    return F
+
+
+def get_psi_batch(t, X):
+    """ Функция получения матриц управления расширенной
+        модели для набора векторов состояния
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            X: np.ndarray
+                (B x n)-матрица векторов состояния
+
+        Returns
+        -------
+            np.ndarray
+                (B x n x r)-массив матриц управления
+    """
+    T, temp, e = _get_exp_terms_batch(X)
+    psi = np.zeros(shape=(len(X), 4, 1))
+    psi[:, 0, 0] = X[:, 3] * temp * (T - temp + temp * e)
+    psi[:, 1, 0] = X[:, 3] * temp * (1 - e)
+    return psi
+
+
+def get_h_batch(t, X):
+    """ Функция получения векторов измерения расширенной
+        модели для набора векторов состояния
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            X: np.ndarray
+                (B x n)-матрица векторов состояния
+
+        Returns
+        -------
+            np.ndarray
+                (B x m)-матрица векторов измерения
+    """
+    return X[:, :1]
+
+
+def get_H_batch(t, X):
+    """ Функция получения матриц частных производных вектора
+        измерения расширенной модели по каждому состоянию
+        для набора векторов состояния
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            X: np.ndarray
+                (B x n)-матрица векторов состояния
+
+        Returns
+        -------
+            np.ndarray
+                (B x m x n)-массив матриц частных производных
+                вектора измерения по каждому состоянию
+    """
+    H = get_H(t, X[0])
+    return np.broadcast_to(H, (len(X),) + H.shape)
+
+
+def get_R_batch(t, X):
+    """ Функция получения ковариационных матриц ошибки измерения
+        для набора векторов состояния
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            X: np.ndarray
+                (B x n)-матрица векторов состояния
+
+        Returns
+        -------
+            np.ndarray
+                (B x m x m)-массив ковариационных матриц ошибки измерения
+    """
+    R = get_R(t, X[0])
+    return np.broadcast_to(R, (len(X),) + R.shape)
@@ -0,0 +1,385 @@
+import numpy as np
+from model_cache import memoize
+from model_codegen import load_model
+from position_control_system import symbolic_model
+from position_control_system.extended_model import get_P0, get_G, get_Q, get_u
+
+
+# Признак стационарности модели: матрицы модели не зависят от времени
+TIME_INVARIANT = True
+
+
+def define():
+    """ Функция символьного определения расширенной модели,
+        получаемой из symbolic_model.define расширением вектора
+        состояния вектором параметров
+
+        Returns
+        -------
+            x, matrices: list, dict
+                n-список символов расширенного вектора состояния,
+                вектор правой части f, матрица управления psi,
+                вектор измерения h и ковариационная матрица ошибки
+                измерения R в виде выражений от расширенного вектора
+                состояния.
+    """
+    import sympy as sp
+    theta, conventional = symbolic_model.define()
+    n = conventional['F'].shape[0]
+    s = len(theta)
+    state = sp.Matrix(sp.symbols(f'x1:{n + 1}'))
+    x = list(state) + list(sp.symbols(f'x{n + 1}:{n + s + 1}'))
+    subs = dict(zip(theta, x[n:]))
+    F, Psi, H, R = (conventional[name].subs(subs) for name in ('F', 'Psi', 'H', 'R'))
+    matrices = {
+        'f': (F * state).col_join(sp.Matrix(x[n:])),
+        'psi': Psi.col_join(sp.zeros(s, Psi.shape[1])),
+        'h': H * state,
+        'R': R,
+    }
+    return x, matrices
+
+
+# Сгенерированная функция вычисления всех функций расширенной
+# модели и их производных и буферы для набора векторов состояния
+# -----------------------------------------
+_kernel = load_model(define, depends=(symbolic_model.define,))
+_X_last = None
+_batch_buffers = None
+_batch_views = None
+# -----------------------------------------
+
+
+@memoize(TIME_INVARIANT)
+def _evaluate(t, x) -> tuple:
+    """ Функция вычисления всех функций расширенной модели в новые
+        буферы (см. evaluate)
+    """
+    buffers = _kernel.evaluate(np.asarray(x, dtype=float), _kernel.allocate())
+    for buffer in buffers:
+        buffer.flags.writeable = False
+    return buffers
+
+
+def evaluate(x) -> tuple:
+    """ Функция вычисления всех функций расширенной модели и их
+        частных производных по вектору состояния за один вызов
+
+        Все значения для вектора состояния записываются в одни буферы,
+        которые кэшируются по вектору состояния (см. model_cache.memoize)
+        и не перезаписываются, поэтому функции get_* возвращают массивы
+        из буферов (или их представления) без копирования.
+
+        Parameters
+        ----------
+            x: np.ndarray
+                n-вектор состояния
+
+        Returns
+        -------
+            tuple
+                f, df/dx, psi, dpsi/dx, h, dh/dx, R, dR/dx
+                (массивы только для чтения)
+    """
+    return _evaluate(None, x)
+
+
+def get_data():
+    """ Функция получения общей информации об
+        исследуемой расширенной модели
+
+        Returns
+        -------
+            n, m, r: int, int, int
+                размер вектора состояний,
+                размер вектора измерений,
+                размер вектора управления.
+    """
+    n, r = _kernel.SHAPES[2]
+    m = _kernel.SHAPES[4][0]
+    return n, m, r
+
+
+def get_f(t, x):
+    """ Функция получения вектора правой части
+        расширенной модели
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            x: np.ndarray
+                n-вектор состояния
+
+        Returns
+        -------
+            np.ndarray
+                n-вектор правой части
+                расширенной модели
+    """
+    return evaluate(x)[0]
+
+
+def get_F(t, x):
+    """ Функция получения матрица частных производных
+        вектора правой части расширенной модели
+        по каждому состоянию
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            x: np.ndarray
+                n-вектор состояния
+
+        Returns
+        -------
+            np.ndarray
+                (n x n)-матрица частных производных
+                вектора правой части по каждому состоянию
+    """
+    return evaluate(x)[1][:, :, 0].T
+
+
+def get_psi(t, x):
+    """ Функция получения матрицы управления
+        расширенной модели
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            x: np.ndarray
+                n-вектор состояния
+
+        Returns
+        -------
+            np.ndarray
+                (n x r)-матрица управления
+    """
+    return evaluate(x)[2]
+
+
+def get_h(t, x):
+    """ Функция получения вектора измерения
+        расширенной модели
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            x: np.ndarray
+                n-вектор состояния
+
+        Returns
+        -------
+            np.ndarray
+                m-вектор измерения
+    """
+    return evaluate(x)[4][:, 0]
+
+
+def get_H(t, x):
+    """ Функция получения матрица частных производных
+        вектора измерения расширенной модели
+        по каждому состоянию
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            x: np.ndarray
+                n-вектор состояния
+
+        Returns
+        -------
+            np.ndarray
+                (m x n)-матрица частных производных
+                вектора измерения по каждому состоянию
+    """
+    return evaluate(x)[5][:, :, 0].T
+
+
+def get_R(t, x):
+    """ Функция получения ковариационной матрицы ошибки измерения
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            x: np.ndarray
+                n-вектор состояния
+
+        Returns
+        -------
+            np.ndarray
+                (m x m)-ковариационная матрица ошибки измерения
+    """
+    return evaluate(x)[6]
+
+
+def get_x0(theta):
+    """ Функция получения вектора начального состояния
+        расширенной модели
+
+        Returns
+        -------
+            np.ndarray
+                n-вектор начального состояния
+    """
+    xt0 = symbolic_model.get_xt0(theta)
+    return np.concatenate((np.reshape(xt0, -1), theta))
+
+
+def evaluate_batch(X) -> tuple:
+    """ Функция вычисления всех функций расширенной модели и их
+        частных производных для набора векторов состояния
+
+        Значения для всего набора вычисляются одним вызовом
+        сгенерированной функции и записываются в общие буферы, которые
+        выделяются заново только при изменении размера набора. Значения
+        остаются верными до вычисления при другом наборе векторов
+        состояния: возвращаемые массивы изменяются при следующем
+        вызове с другим набором.
+
+        Parameters
+        ----------
+            X: np.ndarray
+                (B x n)-матрица векторов состояния
+
+        Returns
+        -------
+            tuple
+                (B x ...)-массивы f, df/dx, psi, dpsi/dx, h, dh/dx, R, dR/dx
+                (массивы только для чтения)
+    """
+    global _X_last, _batch_buffers, _batch_views
+    if _X_last is None or not np.array_equal(X, _X_last):
+        if _X_last is None or len(X) != len(_X_last):
+            _batch_buffers = _kernel.allocate((len(X), ))
+            _batch_views = tuple(buffer.view() for buffer in _batch_buffers)
+            for view in _batch_views:
+                view.flags.writeable = False
+        _kernel.evaluate(np.asarray(X, dtype=float), _batch_buffers)
+        _X_last = np.array(X, dtype=float)
+    return _batch_views
+
+
+def get_f_batch(t, X):
+    """ Функция получения векторов правой части расширенной
+        модели
+        для набора векторов состояния
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            X: np.ndarray
+                (B x n)-матрица векторов состояния
+
+        Returns
+        -------
+            np.ndarray
+                (B x n)-матрица векторов правой части
+                расширенной модели
+    """
+    return evaluate_batch(X)[0][:, :, 0]
+
+
+def get_F_batch(t, X):
+    """ Функция получения матриц частных производных вектора
+        правой части расширенной модели по каждому состоянию
+        для набора векторов состояния
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            X: np.ndarray
+                (B x n)-матрица векторов состояния
+
+        Returns
+        -------
+            np.ndarray
+                (B x n x n)-массив матриц частных производных
+                вектора правой части по каждому состоянию
+    """
+    return evaluate_batch(X)[1][:, :, :, 0].transpose(0, 2, 1)
+
+
+def get_psi_batch(t, X):
+    """ Функция получения матриц управления расширенной модели
+        для набора векторов состояния
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            X: np.ndarray
+                (B x n)-матрица векторов состояния
+
+        Returns
+        -------
+            np.ndarray
+                (B x n x r)-массив матриц управления
+    """
+    return evaluate_batch(X)[2]
+
+
+def get_h_batch(t, X):
+    """ Функция получения векторов измерения расширенной модели
+        для набора векторов состояния
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            X: np.ndarray
+                (B x n)-матрица векторов состояния
+
+        Returns
+        -------
+            np.ndarray
+                (B x m)-матрица векторов измерения
+    """
+    return evaluate_batch(X)[4][:, :, 0]
+
+
+def get_H_batch(t, X):
+    """ Функция получения матриц частных производных вектора
+        измерения расширенной модели по каждому состоянию
+        для набора векторов состояния
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            X: np.ndarray
+                (B x n)-матрица векторов состояния
+
+        Returns
+        -------
+            np.ndarray
+                (B x m x n)-массив матриц частных производных
+                вектора измерения по каждому состоянию
+    """
+    return evaluate_batch(X)[5][:, :, :, 0].transpose(0, 2, 1)
+
+
+def get_R_batch(t, X):
+    """ Функция получения ковариационных матриц ошибки измерения
+        для набора векторов состояния
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            X: np.ndarray
+                (B x n)-матрица векторов состояния
+
+        Returns
+        -------
+            np.ndarray
+                (B x m x m)-массив ковариационных матриц ошибки измерения
+    """
+    return evaluate_batch(X)[6]
@@ -0,0 +1,577 @@
+import numpy as np
+from model_cache import memoize
+from model_codegen import load_model
+
+
+# Признак стационарности модели: матрицы модели не зависят от времени
+TIME_INVARIANT = True
+
+# Признак постоянного вектора управления
+CONSTANT_INPUT = True
+
+
+def define():
+    """ Функция символьного определения модели системы
+        управления положением
+
+        Returns
+        -------
+            theta, matrices: list, dict
+                s-список символов параметров,
+                матрицы F, Psi, H, R, xt0 в виде выражений от параметров.
+    """
+    import sympy as sp
+    theta1, theta2 = sp.symbols('theta1 theta2')
+    T = 0.1
+    e = sp.exp(-theta1 * T)
+    matrices = {
+        'F': sp.Matrix([[1, (1 - e) / theta1],
+                        [0, e]]),
+        'Psi': sp.Matrix([[theta2 / theta1 * (T - 1 / theta1 + e / theta1)],
+                          [theta2 / theta1 * (1 - e)]]),
+        'H': sp.Matrix([[1, 0]]),
+        'R': sp.Matrix([[0.1]]),
+        'xt0': sp.Matrix([[0],
+                          [0]]),
+    }
+    return [theta1, theta2], matrices
+
+
+def define_initial():
+    """ Функция символьного определения вектора начального
+        состояния модели (см. define)
+
+        Returns
+        -------
+            theta, matrices: list, dict
+                s-список символов параметров,
+                вектор xt0 в виде выражения от параметров.
+    """
+    theta, matrices = define()
+    return theta, {'xt0': matrices['xt0']}
+
+
+# Сгенерированные функции вычисления всех матриц модели и вектора
+# начального состояния и буферы для набора векторов параметров
+# -----------------------------------------
+_kernel = load_model(define)
+_initial_kernel = load_model(define_initial, depends=(define,))
+_thetas_last = None
+_batch_buffers = None
+_batch_views = None
+# -----------------------------------------
+
+
+@memoize(TIME_INVARIANT)
+def _evaluate(t, theta) -> tuple:
+    """ Функция вычисления всех матриц модели в новые буферы
+        (см. evaluate)
+    """
+    buffers = _kernel.evaluate(np.asarray(theta, dtype=float), _kernel.allocate())
+    for buffer in buffers:
+        buffer.flags.writeable = False
+    return buffers
+
+
+def evaluate(theta) -> tuple:
+    """ Функция вычисления всех матриц модели и их частных производных
+        по параметрам за один вызов
+
+        Все матрицы для вектора параметров записываются в одни буферы,
+        которые кэшируются по вектору параметров (см. model_cache.memoize)
+        и не перезаписываются, поэтому функции get_* возвращают массивы
+        из буферов без копирования.
+
+        Parameters
+        ----------
+            theta: np.ndarray
+                s-вектор параметров
+
+        Returns
+        -------
+            tuple
+                F, dFdtheta, Psi, dPsidtheta, H, dHdtheta, R, dRdtheta,
+                xt0, dxt0dtheta (массивы только для чтения)
+    """
+    return _evaluate(None, theta)
+
+
+def get_data() -> tuple[int, int, int]:
+    """ Функция получения общей информации об исследуемой модели
+
+        Returns
+        -------
+            n, m, r: int, int, int
+                размер вектора состояний,
+                размер вектора измерений,
+                размер вектора управления.
+    """
+    n, r = _kernel.SHAPES[2]
+    m = _kernel.SHAPES[4][0]
+    return n, m, r
+
+
+def get_F(t, theta):
+    """ Функция получения матрицы состояния
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            theta: np.ndarray
+                s-вектор параметров
+
+        Returns
+        -------
+            np.ndarray
+                (n x n)-матрица состояния
+    """
+    return evaluate(theta)[0]
+
+
+def get_dFdtheta(t, theta):
+    """ Функция получения матрицы значений частных производных
+        матрицы состояния по параметрам
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            theta: np.ndarray
+                s-вектор параметров
+
+        Returns
+        -------
+            np.ndarray
+                (s x n x n)-матрица частных производных
+                матрицы состояния по параметрам
+    """
+    return evaluate(theta)[1]
+
+
+def get_Psi(t, theta):
+    """ Функция получения матрицы управления
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            theta: np.ndarray
+                s-вектор параметров
+
+        Returns
+        -------
+            np.ndarray
+                (n x r)-матрица управления
+    """
+    return evaluate(theta)[2]
+
+
+def get_dPsidtheta(t, theta):
+    """ Функция получения матрицы значений частных производных
+        матрицы управления по параметрам
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            theta: np.ndarray
+                s-вектор параметров
+
+        Returns
+        -------
+            np.ndarray
+                (s x n x r)-матрица частных производных
+                матрицы управления по параметрам
+    """
+    return evaluate(theta)[3]
+
+
+def get_H(t, theta):
+    """ Функция получения матрицы измерения
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            theta: np.ndarray
+                s-вектор параметров
+
+        Returns
+        -------
+            np.ndarray
+                (m x n)-матрица измерения
+    """
+    return evaluate(theta)[4]
+
+
+def get_dHdtheta(t, theta):
+    """ Функция получения матрицы значений частных производных
+        матрицы измерения по параметрам
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            theta: np.ndarray
+                s-вектор параметров
+
+        Returns
+        -------
+            np.ndarray
+                (s x m x n)-матрица частных производных
+                матрицы измерения по параметрам
+    """
+    return evaluate(theta)[5]
+
+
+def get_R(t, theta):
+    """ Функция получения ковариационной матрицы ошибки измерения
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            theta: np.ndarray
+                s-вектор параметров
+
+        Returns
+        -------
+            np.ndarray
+                (m x m)-ковариационная матрица ошибки измерения
+    """
+    return evaluate(theta)[6]
+
+
+def get_dRdtheta(t, theta):
+    """ Функция получения матрицы значений частных производных
+        ковариационной матрицы ошибки измерения по параметрам
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            theta: np.ndarray
+                s-вектор параметров
+
+        Returns
+        -------
+            np.ndarray
+                (s x m x m)-матрица частных производных ковариационной
+                матрицы ошибки измерения по параметрам
+    """
+    return evaluate(theta)[7]
+
+
+@memoize(TIME_INVARIANT)
+def get_inv_R(t, theta):
+    """ Функция получения обратной ковариационной матрицы
+        ошибки измерения
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            theta: np.ndarray
+                s-вектор параметров
+
+        Returns
+        -------
+            np.ndarray
+                (m x m)-матрица, обратная ковариационной
+                матрице ошибки измерения
+    """
+    return np.linalg.inv(get_R(t, theta))
+
+
+@memoize(TIME_INVARIANT, args_in_key=0)
+def get_u(t):
+    """ Функция получения вектора управления
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+
+        Returns
+        -------
+            np.ndarray
+                r-вектор управления
+    """
+    return np.array([[75]])
+
+
+def _initial(theta) -> tuple:
+    """ Функция вычисления вектора начального состояния и его
+        частных производных по параметрам
+
+        Parameters
+        ----------
+            theta: np.ndarray
+                s-вектор параметров или None, если начальное
+                состояние не зависит от параметров
+
+        Returns
+        -------
+            tuple
+                xt0, dxt0dtheta
+    """
+    s = _initial_kernel.SHAPES[1][0]
+    explicit = theta is not None
+    # Без вектора параметров выражения вычисляются при векторе из nan:
+    # от параметров зависят только элементы, значения которых не определены
+    theta = np.asarray(theta, dtype=float) if explicit else np.full(s, np.nan)
+    result = _initial_kernel.evaluate(theta, _initial_kernel.allocate())
+    if not explicit and not all(np.all(np.isfinite(value)) for value in result):
+        raise ValueError('начальное состояние зависит от параметров, задайте theta')
+    return result
+
+
+def get_xt0(theta=None):
+    """ Функция получения вектора начального состояния
+
+        Parameters
+        ----------
+            theta: np.ndarray
+                s-вектор параметров (None - для начального
+                состояния, не зависящего от параметров)
+
+        Returns
+        -------
+            np.ndarray
+                n-вектор начального состояния
+    """
+    return _initial(theta)[0]
+
+
+def get_dxt0dtheta(theta=None):
+    """ Функция получения матрицы значений частных производных
+        вектора начального состояния по параметрам
+
+        Parameters
+        ----------
+            theta: np.ndarray
+                s-вектор параметров (None - для начального
+                состояния, не зависящего от параметров)
+
+        Returns
+        -------
+            np.ndarray
+                (s x n)-матрица частных производных вектора
+                начального состояния по параметрам
+    """
+    return _initial(theta)[1]
+
+
+def evaluate_batch(thetas) -> tuple:
+    """ Функция вычисления всех матриц модели и их частных производных
+        по параметрам для набора векторов параметров
+
+        Матрицы для всего набора вычисляются одним вызовом
+        сгенерированной функции и записываются в общие буферы, которые
+        выделяются заново только при изменении размера набора. Значения
+        остаются верными до вычисления при другом наборе векторов
+        параметров: возвращаемые массивы изменяются при следующем
+        вызове с другим набором.
+
+        Parameters
+        ----------
+            thetas: np.ndarray
+                (B x s)-матрица векторов параметров
+
+        Returns
+        -------
+            tuple
+                (B x ...)-массивы F, dFdtheta, Psi, dPsidtheta, H, dHdtheta,
+                R, dRdtheta, xt0, dxt0dtheta (массивы только для чтения)
+    """
+    global _thetas_last, _batch_buffers, _batch_views
+    if _thetas_last is None or not np.array_equal(thetas, _thetas_last):
+        if _thetas_last is None or len(thetas) != len(_thetas_last):
+            _batch_buffers = _kernel.allocate((len(thetas), ))
+            _batch_views = tuple(buffer.view() for buffer in _batch_buffers)
+            for view in _batch_views:
+                view.flags.writeable = False
+        _kernel.evaluate(np.asarray(thetas, dtype=float), _batch_buffers)
+        _thetas_last = np.array(thetas, dtype=float)
+    return _batch_views
+
+
+def get_F_batch(t, thetas):
+    """ Функция получения матриц состояния
+        для набора векторов параметров
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            thetas: np.ndarray
+                (B x s)-матрица векторов параметров
+
+        Returns
+        -------
+            np.ndarray
+                (B x n x n)-массив матриц состояния
+    """
+    return evaluate_batch(thetas)[0]
+
+
+def get_dFdtheta_batch(t, thetas):
+    """ Функция получения матриц значений частных производных матрицы
+        состояния по параметрам
+        для набора векторов параметров
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            thetas: np.ndarray
+                (B x s)-матрица векторов параметров
+
+        Returns
+        -------
+            np.ndarray
+                (B x s x n x n)-массив частных производных
+                матрицы состояния по параметрам
+    """
+    return evaluate_batch(thetas)[1]
+
+
+def get_Psi_batch(t, thetas):
+    """ Функция получения матриц управления
+        для набора векторов параметров
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            thetas: np.ndarray
+                (B x s)-матрица векторов параметров
+
+        Returns
+        -------
+            np.ndarray
+                (B x n x r)-массив матриц управления
+    """
+    return evaluate_batch(thetas)[2]
+
+
+def get_dPsidtheta_batch(t, thetas):
+    """ Функция получения матриц значений частных производных матрицы
+        управления по параметрам
+        для набора векторов параметров
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            thetas: np.ndarray
+                (B x s)-матрица векторов параметров
+
+        Returns
+        -------
+            np.ndarray
+                (B x s x n x r)-массив частных производных
+                матрицы управления по параметрам
+    """
+    return evaluate_batch(thetas)[3]
+
+
+def get_H_batch(t, thetas):
+    """ Функция получения матриц измерения
+        для набора векторов параметров
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            thetas: np.ndarray
+                (B x s)-матрица векторов параметров
+
+        Returns
+        -------
+            np.ndarray
+                (B x m x n)-массив матриц измерения
+    """
+    return evaluate_batch(thetas)[4]
+
+
+def get_dHdtheta_batch(t, thetas):
+    """ Функция получения матриц значений частных производных матрицы
+        измерения по параметрам
+        для набора векторов параметров
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            thetas: np.ndarray
+                (B x s)-матрица векторов параметров
+
+        Returns
+        -------
+            np.ndarray
+                (B x s x m x n)-массив частных производных
+                матрицы измерения по параметрам
+    """
+    return evaluate_batch(thetas)[5]
+
+
+def get_R_batch(t, thetas):
+    """ Функция получения ковариационных матриц ошибки измерения
+        для набора векторов параметров
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            thetas: np.ndarray
+                (B x s)-матрица векторов параметров
+
+        Returns
+        -------
+            np.ndarray
+                (B x m x m)-массив ковариационных матриц ошибки измерения
+    """
+    return evaluate_batch(thetas)[6]
+
+
+def get_dRdtheta_batch(t, thetas):
+    """ Функция получения матриц значений частных производных
+        ковариационной матрицы ошибки измерения по параметрам
+        для набора векторов параметров
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            thetas: np.ndarray
+                (B x s)-матрица векторов параметров
+
+        Returns
+        -------
+            np.ndarray
+                (B x s x m x m)-массив частных производных ковариационной
+                матрицы ошибки измерения по параметрам
+    """
+    return evaluate_batch(thetas)[7]
+
+
+def get_inv_R_batch(t, thetas):
+    """ Функция получения обратных ковариационных матриц ошибки
+        измерения для набора векторов параметров
+
+        Parameters
+        ----------
+            t: float
+                текущий момент времени
+            thetas: np.ndarray
+                (B x s)-матрица векторов параметров
+
+        Returns
+        -------
+            np.ndarray
+                (B x m x m)-массив матриц, обратных ковариационной
+                матрице ошибки измерения
+    """
+    return np.linalg.inv(evaluate_batch(thetas)[6])
@@ -0,0 +1,248 @@
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+
+
+# Признак включенного профилирования
+_enabled = False
+
+# Зарегистрированные этапы по именам
+_stages = {}
+
+# Инструментируемые функции: (id пространства имен, имя) ->
+# [пространство имен, имя, этап, исходная функция]
+_targets = {}
+
+
+class Stage:
+    """ Именованный таймер и счетчик вызовов этапа вычислений
+
+        Используется как контекстный менеджер вокруг кода этапа. При
+        выключенном профилировании вход и выход из этапа ничего не
+        измеряют. При вложенном входе в тот же этап учитывается время
+        внешнего входа.
+    """
+    __slots__ = ('name', 'time', 'calls', '_start', '_depth')
+
+    def __init__(self, name):
+        self.name = name
+        self.time = 0.
+        self.calls = 0
+        self._start = None
+        self._depth = 0
+
+    def __enter__(self):
+        if _enabled:
+            if self._depth == 0:
+                self._start = time.perf_counter()
+            self._depth += 1
+            self.calls += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._depth:
+            self._depth -= 1
+            if self._depth == 0:
+                self.time += time.perf_counter() - self._start
+        return False
+
+
+def stage(name) -> Stage:
+    """ Функция получения этапа по имени
+
+        Parameters
+        ----------
+            name: str
+                имя этапа вида '<модуль>.<этап>'
+
+        Returns
+        ----------
+            Stage
+                зарегистрированный этап
+    """
+    if name not in _stages:
+        _stages[name] = Stage(name)
+    return _stages[name]
+
+
+def instrument(namespace, names, stage_name):
+    """ Процедура регистрации функций модуля для профилирования
+
+        При включении профилирования функции в пространстве имен
+        заменяются обертками, измеряющими время вызова (для генераторов -
+        время получения каждого элемента), при выключении исходные
+        функции восстанавливаются. Поэтому выключенное профилирование
+        не замедляет вычисления.
+
+        Parameters
+        ----------
+            namespace: dict
+                пространство имен, через которое вызываются функции
+                (globals() вызывающего модуля или vars(модуль))
+            names: tuple
+                имена функций
+            stage_name: str
+                имя этапа, к которому относятся вызовы функций
+    """
+    for name in names:
+        key = (id(namespace), name)
+        if key in _targets:
+            continue
+        _targets[key] = [namespace, name, stage(stage_name), namespace[name]]
+        if _enabled:
+            _patch(_targets[key])
+
+
+def _wrap(func, timer):
+    """ Функция создания обертки функции, измеряющей время ее вызова
+
+        Parameters
+        ----------
+            func: function
+                функция или генераторная функция
+            timer: Stage
+                этап, к которому относятся вызовы
+
+        Returns
+        ----------
+            function
+                обертка функции
+    """
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return _timed(func(*args, **kwargs), timer)
+    else:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer:
+                return func(*args, **kwargs)
+    return wrapper
+
+
+def _timed(iterator, timer):
+    """ Генератор элементов итератора с измерением
+        времени получения каждого элемента
+
+        Parameters
+        ----------
+            iterator: iterator
+                итератор
+            timer: Stage
+                этап, к которому относится получение элементов
+
+        Yields
+        ----------
+            элементы итератора
+    """
+    while True:
+        with timer:
+            item = next(iterator, _timed)
+        if item is _timed:
+            return
+        yield item
+
+
+def _patch(target):
+    """ Процедура замены функции оберткой
+
+        Parameters
+        ----------
+            target: list
+                пространство имен, имя, этап, исходная функция
+    """
+    namespace, name, timer, func = target
+    namespace[name] = _wrap(func, timer)
+
+
+def enable():
+    """ Процедура включения профилирования
+    """
+    global _enabled
+    if _enabled:
+        return
+    _enabled = True
+    for target in _targets.values():
+        _patch(target)
+
+
+def disable():
+    """ Процедура выключения профилирования
+    """
+    global _enabled
+    if not _enabled:
+        return
+    _enabled = False
+    for namespace, name, _, func in _targets.values():
+        namespace[name] = func
+
+
+def is_enabled() -> bool:
+    """ Функция проверки включения профилирования
+
+        Returns
+        ----------
+            bool
+                признак включенного профилирования
+    """
+    return _enabled
+
+
+def reset():
+    """ Процедура обнуления времени и счетчиков всех этапов
+    """
+    for timer in _stages.values():
+        timer.time = 0.
+        timer.calls = 0
+        timer._depth = 0
+
+
+def report() -> dict:
+    """ Функция получения сводки по этапам
+
+        Время этапа включает время вложенных в него этапов.
+
+        Returns
+        ----------
+            dict
+                имя этапа -> суммарное время time, количество вызовов
+                calls и среднее время вызова mean (только для этапов
+                с ненулевым количеством вызовов)
+    """
+    return {name: {'time': timer.time, 'calls': timer.calls,
+                   'mean': timer.time / timer.calls}
+            for name, timer in sorted(_stages.items()) if timer.calls}
+
+
+def merge(other):
+    """ Процедура добавления сводки, полученной в другом
+        процессе, к времени и счетчикам этапов
+
+        Parameters
+        ----------
+            other: dict
+                сводка по этапам (см. report)
+    """
+    for name, values in other.items():
+        timer = stage(name)
+        timer.time += values['time']
+        timer.calls += values['calls']
+
+
+@contextmanager
+def profile():
+    """ Контекстный менеджер профилирования блока кода с
+        обнулением счетчиков на входе
+
+        Yields
+        ----------
+            function
+                функция report для получения сводки
+    """
+    reset()
+    enable()
+    try:
+        yield report
+    finally:
+        disable()
@@ -1,4 +1,5 @@
 import math
+import numpy as np
 
 
 def relative_error_theta_i(theta_true, theta_est):
@@ -19,3 +20,192 @@ def relative_error_theta_i(theta_true, theta_est):
     """
     error = math.fabs(theta_est - theta_true) / math.fabs(theta_true)
     return error
+
+
+def absolute_error(theta_true, theta_est) -> np.ndarray:
+    """ Функция вычисления абсолютных ошибок оценок параметров
+
+        Parameters
+        ----------
+            theta_true: np.ndarray
+                s-вектор истинных параметров
+            theta_est: np.ndarray
+                (... x s)-массив оценок параметров (траектория,
+                набор реализаций)
+
+        Returns
+        ----------
+            np.ndarray
+                (... x s)-массив абсолютных ошибок
+    """
+    return np.abs(np.asarray(theta_est) - theta_true)
+
+
+def relative_error(theta_true, theta_est) -> np.ndarray:
+    """ Функция вычисления относительных ошибок оценок параметров
+
+        Parameters
+        ----------
+            theta_true: np.ndarray
+                s-вектор истинных параметров
+            theta_est: np.ndarray
+                (... x s)-массив оценок параметров (траектория,
+                набор реализаций)
+
+        Returns
+        ----------
+            np.ndarray
+                (... x s)-массив относительных ошибок
+    """
+    return absolute_error(theta_true, theta_est) / np.abs(theta_true)
+
+
+def rmse(theta_true, theta_est, axis=0) -> np.ndarray:
+    """ Функция вычисления среднеквадратичной ошибки оценок параметров
+
+        Parameters
+        ----------
+            theta_true: np.ndarray
+                s-вектор истинных параметров
+            theta_est: np.ndarray
+                (... x s)-массив оценок параметров
+            axis: int
+                ось усреднения (0 - по траектории или по реализациям)
+
+        Returns
+        ----------
+            np.ndarray
+                массив среднеквадратичных ошибок
+    """
+    return np.sqrt(np.mean((np.asarray(theta_est) - theta_true) ** 2, axis=axis))
+
+
+def time_to_tolerance(error, tol) -> np.ndarray:
+    """ Функция определения номера первой оценки,
+        ошибка которой не превышает допуск
+
+        Parameters
+        ----------
+            error: np.ndarray
+                (N + 1) x s-вектор ошибок оценок по траектории
+            tol: float
+                допуск
+
+        Returns
+        ----------
+            np.ndarray
+                s-вектор номеров оценок (-1, если ошибка
+                не достигает допуска)
+    """
+    within = np.asarray(error) <= tol
+    return np.where(within.any(axis=0), within.argmax(axis=0), -1)
+
+
+def settling_index(error, tol) -> np.ndarray:
+    """ Функция определения номера оценки, начиная с которой
+        ошибка не превышает допуск до конца траектории
+
+        Неконечные ошибки (расходимость) считаются превышающими допуск.
+
+        Parameters
+        ----------
+            error: np.ndarray
+                (N + 1) x s-вектор ошибок оценок по траектории
+            tol: float
+                допуск
+
+        Returns
+        ----------
+            np.ndarray
+                s-вектор номеров оценок (-1, если последняя
+                оценка превышает допуск)
+    """
+    outside = ~(np.asarray(error) <= tol)
+    K = len(outside)
+    # Номер последней оценки вне допуска, отсчитываемый с конца
+    last_outside = K - 1 - outside[::-1].argmax(axis=0)
+    settled = np.where(outside.any(axis=0), last_outside + 1, 0)
+    return np.where(settled == K, -1, settled)
+
+
+class ErrorAccumulator:
+    """ Потоковый расчет метрик ошибок оценок параметров по траектории
+
+        Оценки передаются блоками в порядке поступления, матрица ошибок
+        всей траектории не хранится. Результаты совпадают с relative_error,
+        rmse, time_to_tolerance и settling_index для всей траектории.
+    """
+
+    def __init__(self, theta_true, tol=0.05, relative=True):
+        """ Parameters
+            ----------
+                theta_true: np.ndarray
+                    s-вектор истинных параметров
+                tol: float
+                    допуск для time_to_tolerance и settling_index
+                relative: bool
+                    признак использования относительных ошибок
+                    (иначе - абсолютных)
+        """
+        self.theta_true = np.asarray(theta_true, dtype=float)
+        self.tol = tol
+        self.relative = relative
+        s = len(self.theta_true)
+        self.count = 0
+        self.squared_error = np.zeros(s)
+        self.max_error = np.zeros(s)
+        self.last_error = np.full(s, np.nan)
+        self.first_within = np.full(s, -1)
+        self.last_outside = np.full(s, -1)
+
+    def update(self, theta_est):
+        """ Процедура учета очередного блока оценок
+
+            Parameters
+            ----------
+                theta_est: np.ndarray
+                    L x s-вектор очередных оценок параметров
+                    (или s-вектор одной оценки)
+        """
+        theta_est = np.atleast_2d(theta_est)
+        L = len(theta_est)
+        if L == 0:
+            return
+        error = relative_error(self.theta_true, theta_est) if self.relative \
+            else absolute_error(self.theta_true, theta_est)
+
+        self.squared_error += np.sum((theta_est - self.theta_true) ** 2, axis=0)
+        self.max_error = np.maximum(self.max_error, np.max(error, axis=0))
+        self.last_error = error[-1]
+
+        # Номера первой оценки в допуске и последней вне допуска
+        # -----------------------------------------
+        first = time_to_tolerance(error, self.tol)
+        update = (self.first_within < 0) & (first >= 0)
+        self.first_within[update] = self.count + first[update]
+        outside = ~(error <= self.tol)
+        last = L - 1 - outside[::-1].argmax(axis=0)
+        self.last_outside = np.where(outside.any(axis=0), self.count + last, self.last_outside)
+        # -----------------------------------------
+        self.count += L
+
+    def result(self) -> dict:
+        """ Функция получения метрик по учтенным оценкам
+
+            Returns
+            ----------
+                dict
+                    количество оценок count, s-векторы среднеквадратичной
+                    ошибки rmse, максимальной max_error и последней
+                    last_error ошибок, номеров time_to_tolerance и
+                    settling_index (см. одноименные функции)
+        """
+        settled = self.last_outside + 1
+        return {
+            'count': self.count,
+            'rmse': np.sqrt(self.squared_error / max(self.count, 1)),
+            'max_error': self.max_error,
+            'last_error': self.last_error,
+            'time_to_tolerance': self.first_within.copy(),
+            'settling_index': np.where(settled == self.count, -1, settled),
+        }
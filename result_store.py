@@ -0,0 +1,185 @@
+import json
+import re
+import time
+import zipfile
+import numpy as np
+
+
+# Формат имени члена архива: run<номер запуска>/<имя массива>.npy
+_MEMBER = re.compile(r'run(\d{6})/(\w+)\.npy$')
+
+
+def _run_count(archive) -> int:
+    """ Функция подсчета количества запусков в хранилище
+
+        Parameters
+        ----------
+            archive: zipfile.ZipFile
+                открытый архив хранилища
+
+        Returns
+        ----------
+            int
+                количество запусков
+    """
+    indices = [int(match.group(1)) for match in map(_MEMBER.match, archive.namelist()) if match]
+    return max(indices) + 1 if indices else 0
+
+
+def append_run(f_name, arrays, metadata=None) -> int:
+    """ Функция добавления результатов запуска в хранилище
+
+        Хранилище - сжатый архив .npz, каждый массив запуска записывается
+        отдельным членом run<номер>/<имя>.npy, метаданные - членом
+        run<номер>/metadata.npy (строка JSON). Ранее записанные запуски
+        не перезаписываются.
+
+        Parameters
+        ----------
+            f_name: str
+                имя файла хранилища (создается при отсутствии)
+            arrays: dict
+                имя -> массив результатов запуска (траектории оценок,
+                ошибок, времени)
+            metadata: dict
+                метаданные запуска, сериализуемые в JSON (метод,
+                начальные значения, времена этапов); время записи
+                добавляется автоматически
+
+        Returns
+        ----------
+            int
+                номер добавленного запуска
+    """
+    return append_runs(f_name, [(arrays, metadata)])[0]
+
+
+def append_runs(f_name, runs) -> list[int]:
+    """ Функция добавления результатов нескольких запусков в хранилище
+        за одно открытие архива (см. append_run)
+
+        Parameters
+        ----------
+            f_name: str
+                имя файла хранилища (создается при отсутствии)
+            runs: list
+                пары (arrays, metadata) запусков
+
+        Returns
+        ----------
+            list
+                номера добавленных запусков
+    """
+    indices = []
+    with zipfile.ZipFile(f_name, mode='a', compression=zipfile.ZIP_DEFLATED) as archive:
+        index = _run_count(archive)
+        for arrays, metadata in runs:
+            metadata = dict(metadata or {})
+            metadata.setdefault('created', time.time())
+            members = dict(arrays, metadata=np.array(json.dumps(metadata, default=_to_json)))
+            for name, value in members.items():
+                with archive.open(f'run{index:06d}/{name}.npy', 'w', force_zip64=True) as f:
+                    np.lib.format.write_array(f, np.asanyarray(value), allow_pickle=False)
+            indices.append(index)
+            index += 1
+    return indices
+
+
+def _to_json(value):
+    """ Функция преобразования массивов numpy в
+        сериализуемые в JSON значения
+
+        Parameters
+        ----------
+            value:
+                значение, не сериализуемое модулем json
+
+        Returns
+        ----------
+            list, int, float
+                значение в виде встроенного типа
+    """
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    raise TypeError(f'{type(value).__name__} не сериализуется в JSON')
+
+
+def open_store(f_name):
+    """ Функция открытия хранилища результатов для чтения
+
+        Массивы читаются с диска только при обращении к ним.
+
+        Parameters
+        ----------
+            f_name: str
+                имя файла хранилища
+
+        Returns
+        ----------
+            np.lib.npyio.NpzFile
+                открытое хранилище (закрывается методом close
+                или использованием в блоке with)
+    """
+    return np.load(f_name, allow_pickle=False)
+
+
+def run_count(store) -> int:
+    """ Функция получения количества запусков в хранилище
+
+        Parameters
+        ----------
+            store: np.lib.npyio.NpzFile
+                открытое хранилище (см. open_store)
+
+        Returns
+        ----------
+            int
+                количество запусков
+    """
+    return _run_count(store.zip)
+
+
+def read_metadata(store, index=None):
+    """ Функция чтения метаданных запусков без
+        чтения массивов результатов
+
+        Parameters
+        ----------
+            store: np.lib.npyio.NpzFile
+                открытое хранилище (см. open_store)
+            index: int
+                номер запуска (None - все запуски)
+
+        Returns
+        ----------
+            dict or list
+                метаданные запуска или список метаданных
+                всех запусков
+    """
+    if index is None:
+        return [read_metadata(store, k) for k in range(run_count(store))]
+    return json.loads(store[f'run{index:06d}/metadata'][()])
+
+
+def load_run(store, index, names=None) -> dict:
+    """ Функция чтения массивов результатов запуска
+
+        Parameters
+        ----------
+            store: np.lib.npyio.NpzFile
+                открытое хранилище (см. open_store)
+            index: int
+                номер запуска
+            names: list
+                имена читаемых массивов (None - все массивы запуска)
+
+        Returns
+        ----------
+            dict
+                имя -> массив результатов запуска
+    """
+    prefix = f'run{index:06d}/'
+    if names is None:
+        names = [key[len(prefix):] for key in store.files
+                 if key.startswith(prefix) and key != prefix + 'metadata']
+    return {name: store[prefix + name] for name in names}
@@ -1,8 +1,142 @@
-import re
+from collections import deque
 from grad_imf import *
+from imf_update import *
+from input_output import read_observations, count_observations
+from model_registry import get_model
+from trajectory import collect_trajectory
+import profiling
 
 
-def rmle(init_theta, f_name, s):
+# Псевдообращение через имя модуля: при профилировании заменяется
+# только вызов из этого модуля, а не numpy.linalg.pinv всего процесса
+_pinv = npl.pinv
+
+
+def iter_rmle(init_theta, observations, s, monitor=None, refresh_period=1, refresh_tol=1e-2,
+              grad_tol=None, stats=None, model=None):
+    """ Генератор оценок параметров рекурентного метода
+        максимального правдоподобия
+
+        При refresh_period != 1 информационная матрица Фишера и ее
+        псевдообратная матрица пересчитываются повторным проходом по
+        истории наблюдений не на каждом наблюдении, а только через
+        refresh_period наблюдений или при заметном изменении оценки
+        параметров или градиента. Между пересчетами расширенный вектор
+        состояния переносится между шагами (как в iter_rmle_recursive),
+        а вместо обратной информационной матрицы для N наблюдений
+        используется последняя вычисленная, умноженная на N_ref / N
+        (информационная матрица растет пропорционально количеству
+        наблюдений). Обработка наблюдения без пересчета выполняется
+        за фиксированное время.
+
+        Parameters
+        ----------
+            init_theta: np.ndarray
+                s-вектор начальных значений параметров
+            observations: str or iterable
+                имя файла с данными наблюдений или
+                последовательность m-векторов наблюдений
+            s: int
+                размер вектора параметров
+            monitor: ConvergenceMonitor
+                монитор сходимости, по сигналу которого оценивание
+                прекращается досрочно (None - до конца наблюдений)
+            refresh_period: int
+                период пересчета информационной матрицы (1 - на каждом
+                наблюдении, как в исходном методе, 0 - только по порогам
+                refresh_tol и grad_tol)
+            refresh_tol: float
+                относительное изменение оценки параметров с момента
+                последнего пересчета, при превышении которого выполняется
+                пересчет (None - не проверять). Без этой проверки оценки
+                на начальном участке, где они быстро меняются, могут
+                расходиться
+            grad_tol: float
+                относительное отличие градиента от градиента на наблюдении
+                последнего пересчета, при превышении которого выполняется
+                пересчет (None - не проверять)
+            stats: dict
+                словарь, в который записываются количество обработанных
+                наблюдений observations и количество пересчетов
+                информационной матрицы refreshes
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+
+        Yields
+        ----------
+            theta_curr: np.ndarray
+                s-вектор оценки параметров после очередного наблюдения
+    """
+
+    # Блок подготовки
+    # -----------------------------------------
+    model = get_model(model)
+    n, m, r = model.conventional.get_data()
+    N = 0
+    theta_curr = init_theta
+    if isinstance(observations, str):
+        observations = read_observations(observations)
+    if stats is None:
+        stats = {}
+    stats.update(observations=0, refreshes=0)
+    adaptive = refresh_period != 1
+    # Количество наблюдений, оценка параметров, градиент и псевдообратная
+    # информационная матрица на момент последнего пересчета
+    N_ref, theta_ref, grad_ref, P = 0, init_theta, None, None
+    xA, t = None, None
+    # -----------------------------------------
+
+    # Считывание нового наблюдения, если оно есть
+    for y in observations:
+        # Увеличение счетчика наблюдений на единицу
+        N += 1
+        stats['observations'] = N
+        if not adaptive:
+            # Вычисление градиента критерия максимального правдоподобия
+            # и информационной матрицы Фишера
+            imf, grad = grad_imf_evaluation(theta_curr, N, n, m, r, s, y, model)
+            stats['refreshes'] += 1
+            # Вычисление новой оценки вектора параметров
+            theta_curr = theta_curr - _pinv(imf) @ grad
+        else:
+            # Проверка необходимости пересчета по периоду
+            # и изменению оценки параметров
+            # -----------------------------------------
+            refresh = P is None or (refresh_period > 0 and N - N_ref >= refresh_period)
+            if refresh_tol is not None:
+                refresh = refresh or \
+                    npl.norm(theta_curr - theta_ref) > refresh_tol * npl.norm(theta_ref)
+            # -----------------------------------------
+
+            # Вычисление градиента без пересчета с переносом расширенного
+            # вектора состояния и проверка изменения градиента
+            # -----------------------------------------
+            if not refresh:
+                xA, t, _, grad = grad_imf_step(theta_curr, xA, t, n, m, r, s, y, model=model)
+                refresh = grad_tol is not None and \
+                    npl.norm(grad - grad_ref) > grad_tol * npl.norm(grad_ref)
+            # -----------------------------------------
+
+            # Пересчет расширенного вектора состояния и информационной
+            # матрицы повторным проходом по наблюдениям
+            # -----------------------------------------
+            if refresh:
+                xA, t, imf = replay_imf(theta_curr, N - 1, n, m, r, s, model)
+                xA, t, imf_k, grad = grad_imf_step(theta_curr, xA, t, n, m, r, s, y, model=model)
+                P = _pinv(imf + imf_k)
+                N_ref, theta_ref, grad_ref = N, theta_curr, grad
+                stats['refreshes'] += 1
+            # -----------------------------------------
+
+            # Вычисление новой оценки вектора параметров
+            theta_curr = theta_curr - N_ref / N * (P @ grad)
+        yield theta_curr
+        # Проверка сходимости оценок
+        if monitor is not None and monitor.update(theta_curr, grad=grad):
+            return
+
+
+def rmle(init_theta, f_name, s, monitor=None, **options):
     """ Функция вычисления оценки параметров рекурентным
         методом максимального правдоподобия
 
@@ -14,35 +148,521 @@ def rmle(init_theta, f_name, s):
                 имя файла с данными наблюдений
             s: int
                 размер вектора параметров
+            monitor: ConvergenceMonitor
+                монитор сходимости (None - без досрочной остановки)
+            options:
+                параметры пересчета информационной матрицы refresh_period,
+                refresh_tol, grad_tol, словарь stats и модель системы
+                model (см. iter_rmle)
 
         Returns
         ----------
             theta_est: np.ndarray
-                (N + 1) x s-вектор оценок параметров
+                (N + 1) x s-вектор оценок параметров (при досрочной
+                остановке - (monitor.stop_index + 1) x s)
+    """
+    with profiling.stage('rmle'):
+        N = count_observations(f_name)
+        return collect_trajectory(init_theta, iter_rmle(init_theta, f_name, s, monitor, **options),
+                                  N)
+
+
+def _replay_history(theta, history, n, m, r, s, factor, forgetting, model):
+    """ Функция пересчета расширенного вектора состояния и информационной
+        матрицы Фишера по ограниченной истории при текущей оценке параметров
+
+        Пересчет начинается с расширенного вектора состояния, сохраненного
+        перед самым ранним шагом истории. Сохраненные в истории векторы
+        состояния и приращения информационной матрицы заменяются
+        пересчитанными.
+
+        Parameters
+        ----------
+            theta: np.ndarray
+                s-вектор параметров
+            history: collections.deque
+                история шагов: расширенный вектор состояния и момент времени
+                перед шагом, приращение информационной матрицы на шаге
+            n: int
+                размер вектора состояний
+            m: int
+                размер вектора измерений
+            r: int
+                размер вектора управления
+            s: int
+                размер вектора параметров
+            factor: bool
+                признак хранения приращений в виде сомножителей
+            forgetting: float
+                коэффициент забывания
+            model: Model
+                модель системы
+
+        Returns
+        ----------
+            xA, t, imf: np.ndarray, float, np.ndarray
+                расширенный вектор состояния после последнего шага истории,
+                момент времени после последнего шага истории,
+                (s x s) информационная матрица Фишера по истории.
+    """
+    xA, t, _ = history[0]
+    imf = np.zeros(shape=(s, s))
+    replayed = []
+    for k in range(len(history)):
+        xA_prev, t_prev = xA, t
+        xA, t, inc, _ = grad_imf_step(theta, xA, t, n, m, r, s, factor=factor, model=model)
+        imf = forgetting * imf + (inc @ inc.T if factor else inc)
+        replayed.append((xA_prev, t_prev, inc))
+    history.clear()
+    history.extend(replayed)
+    return xA, t, imf
+
+
+def _replay_history_batch(thetas, history, rows, n, m, r, s, model):
+    """ Функция пересчета расширенных векторов состояния и информационных
+        матриц Фишера по ограниченной истории для части набора векторов
+        параметров (см. _replay_history)
+
+        Parameters
+        ----------
+            thetas: np.ndarray
+                (K x s)-матрица пересчитываемых векторов параметров
+            history: collections.deque
+                история шагов: (B x (s + 1) x n)-массив расширенных векторов
+                состояния и момент времени перед шагом, (B x s x s)-массив
+                приращений информационных матриц на шаге
+            rows: np.ndarray
+                B-вектор признаков пересчитываемых векторов параметров
+            n: int
+                размер вектора состояний
+            m: int
+                размер вектора измерений
+            r: int
+                размер вектора управления
+            s: int
+                размер вектора параметров
+            model: Model
+                модель системы
+
+        Returns
+        ----------
+            XA, imf: np.ndarray, np.ndarray
+                (K x (s + 1) x n)-массив расширенных векторов состояния
+                после последнего шага истории,
+                (K x s x s)-массив информационных матриц Фишера по истории.
+    """
+    XA, t = history[0][0][rows], history[0][1]
+    imf = np.zeros(shape=(len(thetas), s, s))
+    for XA_prev, _, inc in history:
+        XA_prev[rows] = XA
+        XA, t, imf_k, _, _ = grad_imf_step_batch(thetas, XA, t, n, m, r, s, model=model)
+        inc[rows] = imf_k
+        imf += imf_k
+    return XA, imf
+
+
+def iter_rmle_recursive(init_theta, observations, s, relin_period=0, relin_tol=1e-2,
+                        inverse='pinv', check_period=100, window=None, forgetting=1.,
+                        replay_length=100, monitor=None, stats=None, model=None):
+    """ Генератор оценок параметров рекурентного метода
+        максимального правдоподобия без повторного прохода
+        по всей истории наблюдений
+
+        Расширенный вектор состояния и информационная матрица
+        Фишера переносятся между шагами и вычисляются при текущей
+        оценке параметров, поэтому между пересчетами каждое наблюдение
+        обрабатывается за фиксированное время. Пересчет (по периоду
+        relin_period или по изменению оценки relin_tol) выполняется
+        повторным проходом только по последним replay_length шагам,
+        начиная с расширенного вектора состояния, сохраненного перед
+        ними; приращения информационной матрицы более ранних шагов
+        берутся при оценках, при которых они были вычислены. Поэтому
+        и пересчет выполняется за время, не зависящее от количества
+        наблюдений. При replay_length=None пересчет выполняется по всей
+        истории за время O(N), и при relin_period=1 оценки совпадают с
+        iter_rmle; без пересчета (relin_tol=None) оценки могут
+        расходиться (проверка согласованности - benchmark.check_recursive).
+
+        Информационная матрица может вычисляться по скользящему окну
+        последних наблюдений или с экспоненциальным забыванием. В этих
+        режимах пересчет выполняется только по ограниченной истории шагов,
+        и время обработки наблюдения и объем памяти не зависят от длины
+        потока наблюдений.
+
+        Parameters
+        ----------
+            init_theta: np.ndarray
+                s-вектор начальных значений параметров
+            observations: str or iterable
+                имя файла с данными наблюдений или
+                последовательность m-векторов наблюдений
+            s: int
+                размер вектора параметров
+            relin_period: int
+                период полного пересчета расширенного вектора состояния
+                и информационной матрицы при текущей оценке параметров
+                (0 - без пересчета, 1 - совпадает с rmle)
+            relin_tol: float
+                относительное изменение оценки параметров с момента
+                последнего пересчета, при превышении которого выполняется
+                полный пересчет (None - без пересчета по изменению оценки).
+                Без пересчета для систем с нейтрально устойчивой
+                матрицей состояния оценки могут расходиться
+            inverse: str
+                способ обращения информационной матрицы: 'pinv' -
+                псевдообращение на каждом шаге, 'woodbury' - обновление
+                обратной матрицы по тождеству Вудбери с переходом к
+                регуляризованному решению при плохой обусловленности
+            check_period: int
+                период проверки точности обновляемой обратной матрицы
+                (для inverse='woodbury')
+            window: int
+                длина скользящего окна наблюдений (None - без окна)
+            forgetting: float
+                коэффициент экспоненциального забывания из (0, 1]
+                (1 - без забывания). При забывании пересчет выполняется
+                по последним ceil(5 / (1 - forgetting)) шагам. Забывание
+                не совмещается со скользящим окном (ValueError)
+            replay_length: int
+                количество последних шагов, по которым выполняется пересчет
+                без окна и забывания (None - по всей истории наблюдений)
+            monitor: ConvergenceMonitor
+                монитор сходимости, по сигналу которого оценивание
+                прекращается досрочно (None - до конца наблюдений)
+            stats: dict
+                словарь, в который записываются количество обработанных
+                наблюдений observations, количество пересчетов
+                relinearizations, общее количество повторно пройденных
+                шагов replayed и наибольшее количество шагов одного
+                пересчета max_replay
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+
+        Yields
+        ----------
+            theta_curr: np.ndarray
+                s-вектор оценки параметров после очередного наблюдения
     """
 
     # Блок подготовки
     # -----------------------------------------
-    n, m, r = get_data()
+    if window is not None and forgetting < 1:
+        raise ValueError('скользящее окно и забывание не совмещаются: задайте window '
+                         'или forgetting')
+    model = get_model(model)
+    n, m, r = model.conventional.get_data()
     N = 0
-    theta_est = np.array([init_theta])
     theta_curr = init_theta
+    if isinstance(observations, str):
+        observations = read_observations(observations)
+    if stats is None:
+        stats = {}
+    stats.update(observations=0, relinearizations=0, replayed=0, max_replay=0)
+    xA = init_xA(n, s, model)
+    t = model.common.get_t0()
+    imf = np.zeros(shape=(s, s))
+    # Оценка параметров, при которой выполнялся последний пересчет
+    theta_lin = init_theta
+    # Матрица, обратная к информационной (для inverse='woodbury')
+    factor = inverse == 'woodbury'
+    P = None
+    # Ограниченная история шагов для режимов окна и забывания
+    history = None
+    if window is not None:
+        history = deque(maxlen=window)
+    elif forgetting < 1:
+        history = deque(maxlen=int(np.ceil(5 / (1 - forgetting))))
+    elif replay_length is not None:
+        history = deque(maxlen=replay_length)
+    # Информационная матрица по шагам, вышедшим из истории
+    # (без окна), с учетом забывания
+    imf_old = np.zeros(shape=(s, s))
     # -----------------------------------------
 
-    # Открытие файла с данными наблюдений для чтения
-    with open(f_name, 'r') as f:
+    # Считывание нового наблюдения, если оно есть
+    for y in observations:
+        # Увеличение счетчика наблюдений на единицу
+        N += 1
+        stats['observations'] = N
+        # Пересчет расширенного вектора состояния и информационной
+        # матрицы при текущей оценке параметров
+        # -----------------------------------------
+        relin = relin_period > 0 and (N - 1) % relin_period == 0
+        if relin_tol is not None:
+            relin = relin or npl.norm(theta_curr - theta_lin) > relin_tol * npl.norm(theta_lin)
+        if N > 1 and relin:
+            if history is None:
+                replayed = N - 1
+                xA, t, imf = replay_imf(theta_curr, replayed, n, m, r, s, model)
+            else:
+                replayed = len(history)
+                xA, t, imf = _replay_history(theta_curr, history, n, m, r, s, factor, forgetting,
+                                             model)
+                if window is None:
+                    imf += forgetting ** replayed * imf_old
+            theta_lin = theta_curr
+            P = None
+            stats['relinearizations'] += 1
+            stats['replayed'] += replayed
+            stats['max_replay'] = max(stats['max_replay'], replayed)
+        # -----------------------------------------
+
+        # Вычисление градиента критерия максимального правдоподобия
+        # и приращения информационной матрицы Фишера (при
+        # inverse='woodbury' - его сомножителя)
+        # -----------------------------------------
+        xA_prev, t_prev = xA, t
+        xA, t, inc, grad = grad_imf_step(theta_curr, xA, t, n, m, r, s, y, factor=factor,
+                                         model=model)
+        imf = forgetting * imf + (inc @ inc.T if factor else inc)
+        if factor and P is not None:
+            P = woodbury_update(P / forgetting, inc)
+        # -----------------------------------------
+
+        # Исключение из информационной матрицы приращения,
+        # вышедшего за пределы окна
+        # -----------------------------------------
+        if window is not None:
+            if len(history) == window:
+                inc_old = history[0][2]
+                imf -= inc_old @ inc_old.T if factor else inc_old
+                if factor and P is not None:
+                    P = woodbury_update(P, inc_old, sign=-1)
+            history.append((xA_prev, t_prev, inc))
+            # Периодическое суммирование приращений по окну
+            # для исключения накопления ошибок округления
+            if N % window == 0:
+                imf = sum(h[2] @ h[2].T if factor else h[2] for h in history)
+                P = None
+        elif history is not None:
+            if len(history) == history.maxlen:
+                inc_old = history[0][2]
+                imf_old = forgetting * imf_old + (inc_old @ inc_old.T if factor else inc_old)
+            history.append((xA_prev, t_prev, inc))
+        # -----------------------------------------
+
+        # Вычисление новой оценки вектора параметров
+        # -----------------------------------------
+        if factor:
+            # Проверка точности обновляемой обратной матрицы
+            if P is not None and N % check_period == 0 and \
+                    np.max(np.abs(P @ imf - np.eye(s))) > 1e-6:
+                P = None
+            if P is None:
+                P = inverse_from_cholesky(imf)
+            if P is not None:
+                theta_curr = theta_curr - P @ grad
+            else:
+                theta_curr = theta_curr - regularized_solve(imf, grad)
+        else:
+            theta_curr = theta_curr - _pinv(imf) @ grad
+        # -----------------------------------------
+        yield theta_curr
+        # Проверка сходимости оценок
+        if monitor is not None and monitor.update(theta_curr, grad=grad):
+            return
+
+
+def rmle_recursive(init_theta, f_name, s, **options):
+    """ Функция вычисления оценки параметров рекурентным
+        методом максимального правдоподобия без повторного
+        прохода по всей истории наблюдений
+
+        Parameters
+        ----------
+            init_theta: np.ndarray
+                s-вектор начальных значений параметров
+            f_name: str
+                имя файла с данными наблюдений
+            s: int
+                размер вектора параметров
+            options:
+                параметры режима оценивания (см. iter_rmle_recursive)
+
+        Returns
+        ----------
+            theta_est: np.ndarray
+                (N + 1) x s-вектор оценок параметров (при досрочной
+                остановке - (monitor.stop_index + 1) x s)
+    """
+    with profiling.stage('rmle_recursive'):
+        N = count_observations(f_name)
+        return collect_trajectory(init_theta, iter_rmle_recursive(init_theta, f_name, s, **options),
+                                  N)
+
+
+def rmle_multistart(init_thetas, f_name, s, race_after=20, keep_fraction=0.5,
+                    criterion='likelihood', relin_tol=1e-2, replay_length=100, model=None):
+    """ Функция вычисления оценок параметров рекурентным методом
+        максимального правдоподобия одновременно из набора начальных
+        приближений с отбраковкой неудачных приближений
+
+        Оценки для всех начальных приближений вычисляются совместно,
+        как в rmle_recursive. Через каждые race_after наблюдений
+        начальные приближения ранжируются по накопленному за это время
+        критерию, и продолжают работу только лучшие из них.
+        Приближения с неконечными значениями исключаются сразу.
+        Пересчет выполняется, как в rmle_recursive, только по последним
+        replay_length шагам.
+
+        Parameters
+        ----------
+            init_thetas: np.ndarray
+                (B x s)-матрица начальных значений параметров
+            f_name: str
+                имя файла с данными наблюдений
+            s: int
+                размер вектора параметров
+            race_after: int
+                количество наблюдений между отбраковками
+            keep_fraction: float
+                доля начальных приближений, остающихся после отбраковки
+            criterion: str
+                критерий отбраковки: 'likelihood' - отрицательный логарифм
+                функции правдоподобия, 'grad' - норма градиента
+            relin_tol: float
+                относительное изменение оценки параметров, при превышении
+                которого выполняется пересчет (см. rmle_recursive)
+            replay_length: int
+                количество последних шагов, по которым выполняется пересчет
+                (None - по всей истории наблюдений)
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+
+        Returns
+        ----------
+            theta_est, best: np.ndarray, int
+                (N + 1) x B x s-массив оценок параметров (после отбраковки
+                приближения его оценки равны nan),
+                номер лучшего начального приближения (None, если
+                исключены все приближения)
+    """
+
+    # Блок подготовки
+    # -----------------------------------------
+    model = get_model(model)
+    n, m, r = model.conventional.get_data()
+    N = 0
+    theta_curr = np.array(init_thetas, dtype=float)
+    B = len(theta_curr)
+    theta_est = np.full(shape=(count_observations(f_name) + 1, B, s), fill_value=np.nan)
+    theta_est[0] = theta_curr
+    # Номера продолжающих работу начальных приближений
+    alive = np.arange(B)
+    best = 0
+    XA = np.tile(np.reshape(init_xA(n, s, model), (1, s + 1, n)), (B, 1, 1))
+    t = model.common.get_t0()
+    imf = np.zeros(shape=(B, s, s))
+    theta_lin = theta_curr.copy()
+    # Накопленное с последней отбраковки значение критерия
+    score = np.zeros(B)
+    # Ограниченная история шагов для пересчета и информационные
+    # матрицы по шагам, вышедшим из истории
+    history = None if replay_length is None else deque(maxlen=replay_length)
+    imf_old = np.zeros(shape=(B, s, s))
+    # -----------------------------------------
+
+    # Переполнение для расходящихся приближений допустимо:
+    # такие приближения исключаются
+    with np.errstate(over='ignore', invalid='ignore'):
         # Считывание нового наблюдения, если оно есть
-        for line in f:
-            # Сохранение считанного наблюдения в нужном формате
-            y = np.array(re.split('[ 	]', line)).astype(np.float)
+        for y in read_observations(f_name):
             # Увеличение счетчика наблюдений на единицу
             N += 1
-            # Вычисление градиента критерия максимального правдоподобия
-            # и информационной матрицы Фишера
-            imf, grad = grad_imf_evaluation(theta_curr, N, n, m, r, s, y)
-            # Вычисление новой оценки вектора параметров
-            theta_curr = theta_curr - npl.pinv(imf) @ grad
-            # Сохранение полученной оценки
-            theta_est = np.append(theta_est, np.array([theta_curr]), axis=0)
 
-    return theta_est
+            # Пересчет расширенных векторов состояния и информационных
+            # матриц для приближений, оценки которых заметно изменились
+            # -----------------------------------------
+            relin = npl.norm(theta_curr - theta_lin, axis=1) > \
+                relin_tol * npl.norm(theta_lin, axis=1)
+            if N > 1 and relin.any():
+                if history is None:
+                    XA[relin], _, imf[relin] = replay_imf_batch(theta_curr[relin], N - 1, n, m, r,
+                                                                s, model)
+                else:
+                    XA[relin], imf[relin] = _replay_history_batch(theta_curr[relin], history, relin,
+                                                                  n, m, r, s, model)
+                    imf[relin] += imf_old[relin]
+                theta_lin[relin] = theta_curr[relin]
+            # -----------------------------------------
+
+            # Вычисление градиентов и приращений информационных матриц
+            XA_prev, t_prev = XA, t
+            XA, t, imf_k, grad, nll_k = grad_imf_step_batch(theta_curr, XA, t, n, m, r, s, y,
+                                                            model)
+            imf += imf_k
+            if history is not None:
+                if len(history) == history.maxlen:
+                    imf_old += history[0][2]
+                history.append((XA_prev, t_prev, imf_k))
+
+            # Исключение приближений с неконечными значениями
+            # -----------------------------------------
+            finite = np.isfinite(imf).all(axis=(1, 2)) & np.isfinite(grad).all(axis=1) & \
+                np.isfinite(nll_k)
+            if not finite.all():
+                alive, theta_curr, theta_lin = alive[finite], theta_curr[finite], theta_lin[finite]
+                XA, imf, imf_old = XA[finite], imf[finite], imf_old[finite]
+                grad, nll_k, score = grad[finite], nll_k[finite], score[finite]
+                history = _select_history(history, finite)
+                if len(alive) == 0:
+                    break
+            # -----------------------------------------
+
+            # Вычисление новых оценок векторов параметров
+            theta_curr = theta_curr - (_pinv(imf) @ grad[:, :, np.newaxis])[:, :, 0]
+            score += nll_k if criterion == 'likelihood' else npl.norm(grad, axis=1)
+
+            # Отбраковка начальных приближений
+            # -----------------------------------------
+            if N % race_after == 0 and len(alive) > 0:
+                order = np.argsort(score)
+                best = alive[order[0]]
+                order = order[:max(1, int(np.ceil(keep_fraction * len(alive))))]
+                alive, theta_curr, theta_lin = alive[order], theta_curr[order], theta_lin[order]
+                XA, imf, imf_old = XA[order], imf[order], imf_old[order]
+                score = np.zeros(len(order))
+                history = _select_history(history, order)
+            # -----------------------------------------
+
+            # Сохранение полученных оценок
+            theta_est[N, alive] = theta_curr
+
+    if len(alive) == 0:
+        best = None
+    elif N % race_after != 0:
+        best = alive[np.argmin(score)]
+    return theta_est, best
+
+
+def _select_history(history, index):
+    """ Функция выбора из истории шагов (см. _replay_history_batch)
+        векторов параметров, продолжающих работу
+
+        Parameters
+        ----------
+            history: collections.deque
+                история шагов (None - без истории)
+            index: np.ndarray
+                номера или признаки выбираемых векторов параметров
+
+        Returns
+        ----------
+            collections.deque
+                история шагов выбранных векторов параметров
+    """
+    if history is None:
+        return None
+    return deque(((XA[index], t, inc[index]) for XA, t, inc in history), maxlen=history.maxlen)
+
+
+# Функции, время вызова которых измеряется при включенном профилировании
+# -----------------------------------------
+profiling.instrument(globals(), ('read_observations', ), 'rmle.read')
+profiling.instrument(globals(), ('grad_imf_evaluation', ), 'grad_imf.evaluation')
+profiling.instrument(globals(), ('grad_imf_step', ), 'grad_imf.step')
+profiling.instrument(globals(), ('replay_imf', ), 'grad_imf.replay')
+profiling.instrument(globals(), ('inverse_from_cholesky', 'woodbury_update', 'regularized_solve'),
+                     'rmle.solve')
+profiling.instrument(globals(), ('_pinv', ), 'numpy.linalg.pinv')
+# -----------------------------------------
@@ -0,0 +1,248 @@
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import profiling
+from binary_observations import is_binary, open_binary
+from input_output import count_observations
+
+
+def read_blocks(f_name, chunk=4096, replication=0):
+    """ Генератор блоков наблюдений из файла с данными наблюдений
+
+        Текстовый файл разбирается блоками по chunk строк за одно
+        преобразование, из двоичного файла блоки возвращаются без
+        копирования.
+
+        Parameters
+        ----------
+            f_name: str
+                имя файла с данными наблюдений
+            chunk: int
+                количество наблюдений в блоке
+            replication: int
+                номер реализации в двоичном файле с
+                несколькими реализациями
+
+        Yields
+        ----------
+            np.ndarray
+                (L x m)-массив очередного блока наблюдений, L <= chunk
+    """
+    if is_binary(f_name):
+        header, Y = open_binary(f_name)
+        if header['B'] != 1:
+            Y = Y[:, replication]
+        for k in range(0, header['N'], chunk):
+            yield Y[k:k + chunk]
+        return
+    with open(f_name, 'r') as f:
+        while True:
+            lines = [line for _, line in zip(range(chunk), f) if line.strip()]
+            if not lines:
+                return
+            m = len(lines[0].split())
+            yield np.array(' '.join(lines).split()).astype(float).reshape(-1, m)
+
+
+def _drain(queue):
+    """ Генератор наблюдений из очереди, пополняемой
+        общим источником наблюдений
+
+        Parameters
+        ----------
+            queue: deque
+                очередь наблюдений
+
+        Yields
+        ----------
+            np.ndarray
+                m-вектор очередного наблюдения
+    """
+    while True:
+        yield queue.popleft()
+
+
+def run_shared(f_name, estimators, chunk=4096, replication=0, stats=None) -> tuple[dict, tuple]:
+    """ Функция оценивания параметров несколькими методами
+        за один проход по файлу с данными наблюдений
+
+        Каждый блок наблюдений читается и разбирается один раз и
+        передается всем методам. Метод задается функцией, получающей
+        итератор наблюдений и возвращающей генератор оценок (iter_rmle,
+        iter_rmle_recursive, iter_ekf), и получает из итератора одно
+        наблюдение на каждую оценку. Время работы учитывается для
+        каждого метода отдельно. Метод, генератор которого завершился
+        досрочно (по сигналу монитора сходимости), больше не получает
+        наблюдений; чтение прекращается, когда завершились все методы.
+
+        Parameters
+        ----------
+            f_name: str
+                имя файла с данными наблюдений
+            estimators: dict
+                название метода -> (init_theta, make), где init_theta -
+                s-вектор начальных значений параметров, make(observations) -
+                функция создания генератора оценок
+            chunk: int
+                количество наблюдений в блоке
+            replication: int
+                номер реализации в двоичном файле с
+                несколькими реализациями
+            stats: dict
+                название метода -> словарь статистики метода, передаваемый
+                функции создания генератора оценок как make(observations,
+                stats=...) (для методов, поддерживающих stats, например
+                iter_rmle)
+
+        Returns
+        ----------
+            results, read_time: dict, tuple
+                название метода -> (theta_est, wall_time, cpu_time), где
+                theta_est - (K + 1) x s-вектор оценок параметров по K
+                обработанным методом наблюдениям, wall_time
+                и cpu_time - астрономическое и процессорное время работы метода;
+                астрономическое и процессорное время чтения наблюдений
+    """
+
+    # Блок подготовки
+    # -----------------------------------------
+    N = count_observations(f_name)
+    if stats is None:
+        stats = {}
+    states = {}
+    for name, (init_theta, make) in estimators.items():
+        init_theta = np.asarray(init_theta)
+        theta_est = np.empty(shape=(N + 1,) + init_theta.shape)
+        theta_est[0] = init_theta
+        queue = deque()
+        options = {'stats': stats[name]} if name in stats else {}
+        states[name] = [make(_drain(queue), **options), queue, theta_est, 0., 0., None]
+    read_wall = 0.
+    read_cpu = 0.
+    k = 0
+    # -----------------------------------------
+
+    blocks = read_blocks(f_name, chunk, replication)
+    while any(state[5] is None for state in states.values()):
+        # Чтение очередного блока наблюдений
+        # -----------------------------------------
+        wall, cpu = time.perf_counter(), time.process_time()
+        Y = next(blocks, None)
+        read_wall += time.perf_counter() - wall
+        read_cpu += time.process_time() - cpu
+        if Y is None:
+            break
+        # -----------------------------------------
+
+        # Передача блока всем методам
+        # -----------------------------------------
+        L = len(Y)
+        for state in states.values():
+            estimates, queue, theta_est = state[:3]
+            if state[5] is not None:
+                continue
+            wall, cpu = time.perf_counter(), time.process_time()
+            queue.extend(Y)
+            for j in range(k + 1, k + L + 1):
+                theta = next(estimates, None)
+                if theta is None:
+                    # Досрочное завершение метода
+                    state[5] = j - 1
+                    queue.clear()
+                    break
+                theta_est[j] = theta
+            state[3] += time.perf_counter() - wall
+            state[4] += time.process_time() - cpu
+        k += L
+        # -----------------------------------------
+
+    for estimates, *_ in states.values():
+        estimates.close()
+    results = {name: (theta_est[:(k if stop is None else stop) + 1], wall, cpu)
+               for name, (_, _, theta_est, wall, cpu, stop) in states.items()}
+    return results, (read_wall, read_cpu)
+
+
+def _run_estimator(job) -> tuple:
+    """ Функция оценивания параметров одним методом с
+        измерением времени работы в рабочем процессе
+
+        Parameters
+        ----------
+            job: tuple
+                название метода, функция метода, s-вектор начальных значений
+                параметров, имя файла с данными наблюдений, размер
+                вектора параметров, признак профилирования, признак
+                сбора статистики метода (аргумент stats)
+
+        Returns
+        ----------
+            tuple
+                название метода, (N + 1) x s-вектор оценок параметров,
+                астрономическое и процессорное время работы метода,
+                сводка по этапам (см. profiling.report) или None,
+                статистика метода или None
+    """
+    name, estimator, init_theta, f_name, s, profile, collect = job
+    options = {'stats': {}} if collect else {}
+    if profile:
+        profiling.reset()
+        profiling.enable()
+    wall, cpu = time.perf_counter(), time.process_time()
+    theta_est = estimator(init_theta, f_name, s, **options)
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    report = None
+    if profile:
+        report = profiling.report()
+        profiling.disable()
+    return name, theta_est, wall, cpu, report, options.get('stats')
+
+
+def run_parallel(f_name, estimators, s, workers=None, stats=None) -> dict:
+    """ Функция одновременного оценивания параметров несколькими
+        методами в отдельных процессах
+
+        Методы не имеют общих данных, кроме файла наблюдений, поэтому
+        астрономическое время работы определяется самым медленным методом,
+        а не суммой времен. Функция должна вызываться из блока
+        if __name__ == '__main__' запускаемого модуля. При включенном
+        профилировании сводки по этапам рабочих процессов добавляются
+        к сводке текущего процесса.
+
+        Parameters
+        ----------
+            f_name: str
+                имя файла с данными наблюдений
+            estimators: dict
+                название метода -> (init_theta, estimator), где init_theta -
+                s-вектор начальных значений параметров, estimator(init_theta,
+                f_name, s) - функция метода уровня модуля (rmle, re_ekf)
+            s: int
+                размер вектора параметров
+            workers: int
+                количество процессов (по умолчанию по количеству методов)
+            stats: dict
+                название метода -> словарь, в который записывается
+                статистика метода, собранная в рабочем процессе (для
+                методов, поддерживающих аргумент stats, например rmle)
+
+        Returns
+        ----------
+            dict
+                название метода -> (theta_est, wall_time, cpu_time), где
+                theta_est - (N + 1) x s-вектор оценок параметров, wall_time
+                и cpu_time - астрономическое и процессорное время работы метода
+    """
+    if stats is None:
+        stats = {}
+    jobs = [(name, estimator, init_theta, f_name, s, profiling.is_enabled(), name in stats)
+            for name, (init_theta, estimator) in estimators.items()]
+    with ProcessPoolExecutor(max_workers=workers or len(jobs)) as pool:
+        results = list(pool.map(_run_estimator, jobs))
+    for name, *_, report, method_stats in results:
+        if report is not None:
+            profiling.merge(report)
+        if method_stats is not None:
+            stats[name].update(method_stats)
+    return {name: (theta_est, wall, cpu) for name, theta_est, wall, cpu, *_ in results}
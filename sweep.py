@@ -0,0 +1,382 @@
+import argparse
+import hashlib
+import inspect
+import itertools
+import json
+import os
+import sys
+import time
+import numpy as np
+from input_output import read_observations, count_observations, generate_data_bulk, output
+from model_registry import available_models, get_model
+from rmlm import iter_rmle, iter_rmle_recursive
+from ekf import iter_ekf
+from relative_errors import relative_error
+
+
+# Методы оценивания (генераторы оценок)
+ESTIMATORS = {
+    'RMLM': iter_rmle,
+    'RMLM-recursive': iter_rmle_recursive,
+    'EKF': iter_ekf,
+}
+
+# Версия кэша результатов: входит в ключ кэша и увеличивается при
+# изменениях, влияющих на результаты, но не отраженных в исходном
+# коде модулей проекта (например, формата записи траекторий)
+CACHE_VERSION = 3
+
+# Каталог проекта: исходный код модулей из него входит в ключ кэша
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Параметры по умолчанию
+DEFAULTS = {
+    'data': 'data/position_control_system200',
+    'N': [200],
+    'init_theta': [[1., 1.]],
+    'estimators': ['RMLM', 'EKF'],
+    'cache_dir': 'results/cache',
+    'output': None,
+    'generate': None,
+    'seed': None,
+    'model': None,
+    'model_options': {},
+    'estimator_options': {},
+}
+
+
+def file_hash(f_name) -> str:
+    """ Функция вычисления хэша содержимого файла
+
+        Parameters
+        ----------
+            f_name: str
+                имя файла
+
+        Returns
+        ----------
+            str
+                шестнадцатеричный SHA-256 содержимого файла
+    """
+    h = hashlib.sha256()
+    with open(f_name, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def source_files(*objects) -> list[str]:
+    """ Функция получения файлов исходного кода модулей проекта,
+        от которых зависят объекты
+
+        Зависимости находятся транзитивно по модулям, на которые
+        ссылаются пространства имен модулей (импортированные модули
+        и объекты), и ограничиваются каталогом проекта.
+
+        Parameters
+        ----------
+            objects:
+                модули, функции или объекты классов
+
+        Returns
+        ----------
+            list
+                отсортированные пути к файлам модулей
+    """
+    def module_of(value):
+        if inspect.ismodule(value):
+            return value
+        name = getattr(value, '__module__', None)
+        if not isinstance(name, str):
+            name = type(value).__module__
+        return sys.modules.get(name)
+
+    files = set()
+    stack = [module_of(obj) for obj in objects]
+    while stack:
+        module = stack.pop()
+        f_name = getattr(module, '__file__', None)
+        if f_name is None:
+            continue
+        f_name = os.path.abspath(f_name)
+        if f_name in files or os.path.commonpath((f_name, _ROOT)) != _ROOT or \
+                'site-packages' in f_name:
+            continue
+        files.add(f_name)
+        stack.extend(module_of(value) for value in vars(module).values())
+    return sorted(files)
+
+
+def cache_key(data_hash, name, init_theta, model=None, options=None) -> str:
+    """ Функция вычисления ключа кэша результатов оценивания
+
+        Ключ зависит от версии кэша, содержимого файла наблюдений,
+        исходного кода всех модулей проекта, от которых зависят метод
+        и модель (см. source_files), модели и ее параметров, параметров
+        метода и начальных значений параметров, но не от количества
+        наблюдений: оценки для меньших N являются префиксом траектории
+        для большего N.
+
+        Parameters
+        ----------
+            data_hash: str
+                хэш файла с данными наблюдений
+            name: str
+                название метода (см. ESTIMATORS)
+            init_theta: np.ndarray
+                s-вектор начальных значений параметров
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+            options: dict
+                параметры генератора оценок метода (сериализуемые в JSON)
+
+        Returns
+        ----------
+            str
+                шестнадцатеричный ключ
+    """
+    model = get_model(model)
+    h = hashlib.sha256()
+    h.update(str(CACHE_VERSION).encode())
+    h.update(data_hash.encode())
+    h.update(name.encode())
+    h.update(json.dumps([model.name, model.options], sort_keys=True).encode())
+    h.update(json.dumps(options or {}, sort_keys=True).encode())
+    for f_name in source_files(ESTIMATORS[name], model.conventional, model.extended,
+                               model.common):
+        h.update(os.path.relpath(f_name, _ROOT).encode())
+        h.update(file_hash(f_name).encode())
+    h.update(np.asarray(init_theta, dtype=float).tobytes())
+    return h.hexdigest()
+
+
+def run_prefix(f_name, name, init_theta, s, N, model=None, options=None) \
+        -> tuple[np.ndarray, np.ndarray, dict]:
+    """ Функция оценивания параметров по первым N наблюдениям
+        с сохранением времени работы и статистики метода (для методов
+        с аргументом stats) после каждого наблюдения
+
+        При расходимости метода оставшиеся оценки равны NaN.
+
+        Parameters
+        ----------
+            f_name: str
+                имя файла с данными наблюдений
+            name: str
+                название метода (см. ESTIMATORS)
+            init_theta: np.ndarray
+                s-вектор начальных значений параметров
+            s: int
+                размер вектора параметров
+            N: int
+                количество наблюдений
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+            options: dict
+                параметры генератора оценок метода (например, relin_tol,
+                window для RMLM-recursive, square_root для EKF)
+
+        Returns
+        ----------
+            theta_est, times, counts: np.ndarray, np.ndarray, dict
+                (N + 1) x s-вектор оценок параметров,
+                (N + 1)-вектор астрономического времени работы
+                метода до получения каждой оценки,
+                название показателя статистики метода (например,
+                refreshes для RMLM) -> (N + 1)-вектор его значений
+                после каждой оценки
+    """
+    theta_est = np.full(shape=(N + 1, s), fill_value=np.nan)
+    times = np.full(shape=N + 1, fill_value=np.nan)
+    theta_est[0] = init_theta
+    times[0] = 0.
+    stats = {}
+    options = dict(options or {})
+    if 'stats' in inspect.signature(ESTIMATORS[name]).parameters:
+        options['stats'] = stats
+    counts = {}
+    estimates = ESTIMATORS[name](init_theta, itertools.islice(read_observations(f_name), N), s,
+                                 model=model, **options)
+    start = time.perf_counter()
+    try:
+        with np.errstate(all='ignore'):
+            for k, theta in enumerate(estimates, 1):
+                theta_est[k] = theta
+                times[k] = time.perf_counter() - start
+                if k == 1:
+                    counts = {key: np.zeros(N + 1, dtype=int) for key in stats}
+                for key, value in stats.items():
+                    counts[key][k] = value
+    except (ArithmeticError, np.linalg.LinAlgError):
+        pass
+    return theta_est, times, counts
+
+
+def sweep(f_name, Ns, init_thetas, estimators, cache_dir, model=None,
+          estimator_options=None) -> list[dict]:
+    """ Функция серии экспериментов по количеству наблюдений,
+        начальным значениям параметров и методам
+
+        Для каждой пары (метод, начальные значения) выполняется один
+        проход по max(Ns) наблюдениям, оценки для всех N берутся из
+        полученной траектории. Траектории сохраняются в кэше: при
+        повторном запуске пары, траектория которых в кэше не короче
+        max(Ns), не вычисляются, а для остальных пар траектория
+        вычисляется заново с начала по max(Ns) наблюдениям (состояние
+        генератора оценок не сохраняется, и продолжить траекторию
+        из кэша нельзя).
+
+        Parameters
+        ----------
+            f_name: str
+                имя файла с данными наблюдений
+            Ns: list
+                значения количества наблюдений
+            init_thetas: list
+                s-векторы начальных значений параметров
+            estimators: list
+                названия методов (см. ESTIMATORS)
+            cache_dir: str
+                каталог кэша результатов
+            model: Model
+                модель системы (None - модель по умолчанию, см. model_registry)
+            estimator_options: dict
+                название метода -> параметры его генератора оценок
+                (см. run_prefix)
+
+        Returns
+        ----------
+            list
+                результаты по точкам серии: название метода estimator,
+                начальные значения init_theta, количество наблюдений N,
+                s-вектор оценок theta_est, время работы time, статистика
+                метода stats (см. run_prefix), признак получения
+                из кэша cached
+    """
+    N_max = max(Ns)
+    if N_max > count_observations(f_name):
+        raise ValueError(f'в {f_name} меньше {N_max} наблюдений')
+    data_hash = file_hash(f_name)
+    model = get_model(model)
+    estimator_options = estimator_options or {}
+    os.makedirs(cache_dir, exist_ok=True)
+
+    rows = []
+    for name in estimators:
+        options = estimator_options.get(name, {})
+        for init_theta in init_thetas:
+            init_theta = np.asarray(init_theta, dtype=float)
+            key = cache_key(data_hash, name, init_theta, model, options)
+            path = os.path.join(cache_dir, key + '.npz')
+
+            # Чтение траектории из кэша или ее вычисление
+            # -----------------------------------------
+            cached = False
+            if os.path.exists(path):
+                with np.load(path) as data:
+                    theta_est, times = data['theta_est'], data['times']
+                    counts = {key[len('stats_'):]: data[key] for key in data.files
+                              if key.startswith('stats_')}
+                cached = len(theta_est) > N_max
+            if not cached:
+                theta_est, times, counts = run_prefix(f_name, name, init_theta, len(init_theta),
+                                                      N_max, model, options)
+                tmp_path = f'{path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    np.savez(f, theta_est=theta_est, times=times,
+                             **{'stats_' + key: value for key, value in counts.items()})
+                os.replace(tmp_path, path)
+            # -----------------------------------------
+
+            for N in Ns:
+                rows.append({'estimator': name, 'init_theta': init_theta, 'N': N,
+                             'theta_est': theta_est[N], 'time': times[N],
+                             'stats': {key: int(value[N]) for key, value in counts.items()},
+                             'cached': cached})
+    return rows
+
+
+def load_config(argv=None) -> dict:
+    """ Функция получения параметров серии экспериментов из
+        файла конфигурации (JSON) и командной строки
+
+        Параметры командной строки имеют приоритет
+        над файлом конфигурации.
+
+        Parameters
+        ----------
+            argv: list
+                аргументы командной строки (по умолчанию sys.argv[1:])
+
+        Returns
+        ----------
+            dict
+                параметры серии (см. DEFAULTS)
+    """
+    parser = argparse.ArgumentParser(description='Серия экспериментов оценивания параметров')
+    parser.add_argument('--config', help='файл конфигурации (JSON)')
+    parser.add_argument('--data', help='файл с данными наблюдений')
+    parser.add_argument('--N', type=int, nargs='+', help='значения количества наблюдений')
+    parser.add_argument('--init-theta', dest='init_theta', action='append',
+                        type=lambda value: [float(v) for v in value.split(',')],
+                        help='начальные значения параметров через запятую (можно повторять)')
+    parser.add_argument('--estimators', nargs='+', choices=list(ESTIMATORS), help='методы')
+    parser.add_argument('--cache-dir', dest='cache_dir', help='каталог кэша результатов')
+    parser.add_argument('--output', help='файл для записи результатов (по умолчанию stdout)')
+    parser.add_argument('--generate', type=int,
+                        help='сгенерировать файл данных с заданным количеством наблюдений, '
+                             'если он отсутствует')
+    parser.add_argument('--seed', type=int, help='начальное значение генератора для --generate')
+    parser.add_argument('--model', choices=available_models(),
+                        help='модель системы (по умолчанию position_control_system)')
+    parser.add_argument('--model-options', dest='model_options', type=json.loads,
+                        help='параметры модели (JSON), например {"n": 40, "s": 20}')
+    parser.add_argument('--estimator-options', dest='estimator_options', type=json.loads,
+                        help='параметры методов (JSON), например '
+                             '{"RMLM-recursive": {"relin_tol": 0.05}, "EKF": {"square_root": true}}')
+    args = parser.parse_args(argv)
+
+    config = dict(DEFAULTS)
+    if args.config is not None:
+        with open(args.config, 'r') as f:
+            config.update(json.load(f))
+    config.update({key: value for key, value in vars(args).items()
+                   if key != 'config' and value is not None})
+    return config
+
+
+def main(argv=None):
+    """ Процедура выполнения серии экспериментов
+        с параметрами командной строки
+
+        Parameters
+        ----------
+            argv: list
+                аргументы командной строки (по умолчанию sys.argv[1:])
+    """
+    config = load_config(argv)
+    model = get_model(config['model'], **config['model_options'])
+    s, theta_true = model.common.get_data_theta()
+    if config['generate'] is not None and not os.path.exists(config['data']):
+        generate_data_bulk(config['generate'], theta_true, config['data'], seed=config['seed'],
+                           model=model)
+
+    unknown = set(config['estimator_options']) - set(ESTIMATORS)
+    if unknown:
+        raise ValueError(f'параметры заданы для неизвестных методов {sorted(unknown)}')
+    rows = sweep(config['data'], config['N'], config['init_theta'], config['estimators'],
+                 config['cache_dir'], model, config['estimator_options'])
+
+    f = open(config['output'], 'w') if config['output'] else sys.stdout
+    try:
+        for row in rows:
+            error = relative_error(theta_true, row['theta_est'])
+            method = f'{row["estimator"]} N={row["N"]} theta0={row["init_theta"].tolist()}'
+            output(row['theta_est'], error, row['time'], method, s, f, stats=row['stats'])
+    finally:
+        if f is not sys.stdout:
+            f.close()
+
+
+if __name__ == '__main__':
+    main()
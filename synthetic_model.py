@@ -0,0 +1,941 @@
+import numpy as np
+import numpy.linalg as npl
+from model_registry import Model
+
+
+class SyntheticConventionalModel:
+    """ Синтетическая линейная стационарная модель с параметрами,
+        линейно входящими в матрицы состояния и управления
+
+        x(k + 1) = F(theta) x(k) + Psi(theta) u(k),  y(k + 1) = H x(k + 1) + v(k + 1),
+        F(theta) = A0 + sum_i theta_i A_i,  Psi(theta) = B0 + sum_i theta_i B_i.
+
+        A0 - нормальная матрица со спектральным радиусом spectral_radius,
+        а возмущения A_i масштабированы так, что ||F(theta) - A0||_2 не
+        превышает margin при 0 <= theta <= 2 theta_true, поэтому модель
+        устойчива при всех таких параметрах. Управление - периодическая
+        двоичная последовательность, обеспечивающая постоянное
+        возбуждение системы.
+
+        Методы имеют те же параметры и значения, что и одноименные
+        функции position_control_system.conventional_model.
+    """
+
+    # Признак стационарности модели: матрицы модели не зависят от времени
+    TIME_INVARIANT = True
+
+    # Признак постоянного вектора управления
+    CONSTANT_INPUT = False
+
+    def __init__(self, n, m, r, s, seed=0, spectral_radius=0.8, margin=0.15, noise=0.1,
+                 input_period=127):
+        """ Parameters
+            ----------
+                n: int
+                    размер вектора состояний
+                m: int
+                    размер вектора измерений
+                r: int
+                    размер вектора управления
+                s: int
+                    размер вектора параметров
+                seed: int
+                    начальное значение генератора случайных чисел
+                spectral_radius: float
+                    наибольший модуль собственных значений A0
+                margin: float
+                    наибольшая норма вклада параметров в матрицу состояния
+                noise: float
+                    дисперсия ошибок измерений
+                input_period: int
+                    период последовательности управления
+        """
+        rng = np.random.default_rng(seed)
+        self.n, self.m, self.r, self.s = n, m, r, s
+        self.theta_true = rng.uniform(0.5, 1.5, size=s)
+
+        # Матрицы модели
+        # -----------------------------------------
+        Q, _ = npl.qr(rng.standard_normal(size=(n, n)))
+        self.A0 = Q @ np.diag(spectral_radius * rng.uniform(0.5, 1., size=n)
+                              * rng.choice((-1., 1.), size=n)) @ Q.T
+        A = rng.standard_normal(size=(s, n, n))
+        A *= (margin / (2 * s * self.theta_true * npl.norm(A, ord=2, axis=(1, 2))))[:, None, None]
+        self.A = A
+        self.B0 = rng.standard_normal(size=(n, r)) / np.sqrt(n)
+        self.B = rng.standard_normal(size=(s, n, r)) / np.sqrt(n)
+        self.C = rng.standard_normal(size=(m, n)) / np.sqrt(n)
+        self.R = noise * np.eye(m)
+        self.inv_R = npl.inv(self.R)
+        self.U = rng.choice((-1., 1.), size=(input_period, r, 1))
+        # -----------------------------------------
+
+        # Не зависящие от параметров значения доступны только для
+        # чтения, так как разделяются между вызовами
+        # -----------------------------------------
+        self.dHdtheta = np.zeros(shape=(s, m, n))
+        self.dRdtheta = np.zeros(shape=(s, m, m))
+        self.xt0 = np.zeros(shape=(n, 1))
+        self.dxt0dtheta = np.zeros(shape=(s, n, 1))
+        for value in (self.A0, self.A, self.B0, self.B, self.C, self.R, self.inv_R, self.U,
+                      self.dHdtheta, self.dRdtheta, self.xt0, self.dxt0dtheta):
+            value.flags.writeable = False
+        # -----------------------------------------
+        self._theta_last = None
+        self._F_last = None
+        self._Psi_last = None
+
+    def get_data(self) -> tuple[int, int, int]:
+        """ Функция получения общей информации об исследуемой модели
+
+            Returns
+            -------
+                n, m, r: int, int, int
+                    размер вектора состояний,
+                    размер вектора измерений,
+                    размер вектора управления.
+        """
+        return self.n, self.m, self.r
+
+    def _matrices(self, theta) -> tuple[np.ndarray, np.ndarray]:
+        """ Функция вычисления матриц состояния и управления с
+            сохранением результата для последнего вектора параметров
+
+            Parameters
+            ----------
+                theta: np.ndarray
+                    s-вектор параметров
+
+            Returns
+            -------
+                F, Psi: np.ndarray, np.ndarray
+                    (n x n)-матрица состояния,
+                    (n x r)-матрица управления.
+        """
+        theta = np.asarray(theta, dtype=float)
+        if self._theta_last is None or not np.array_equal(theta, self._theta_last):
+            self._F_last = self.A0 + np.tensordot(theta, self.A, axes=1)
+            self._Psi_last = self.B0 + np.tensordot(theta, self.B, axes=1)
+            self._F_last.flags.writeable = False
+            self._Psi_last.flags.writeable = False
+            self._theta_last = theta.copy()
+        return self._F_last, self._Psi_last
+
+    def get_F(self, t, theta):
+        """ Функция получения матрицы состояния
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                theta: np.ndarray
+                    s-вектор параметров
+
+            Returns
+            -------
+                np.ndarray
+                    (n x n)-матрица состояния
+        """
+        return self._matrices(theta)[0]
+
+    def get_dFdtheta(self, t, theta):
+        """ Функция получения матрицы значений частных производных
+            матрицы состояния по параметрам
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                theta: np.ndarray
+                    s-вектор параметров
+
+            Returns
+            -------
+                np.ndarray
+                    (s x n x n)-матрица частных производных
+                    матрицы состояния по параметрам
+        """
+        return self.A
+
+    def get_Psi(self, t, theta):
+        """ Функция получения матрицы управления
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                theta: np.ndarray
+                    s-вектор параметров
+
+            Returns
+            -------
+                np.ndarray
+                    (n x r)-матрица управления
+        """
+        return self._matrices(theta)[1]
+
+    def get_dPsidtheta(self, t, theta):
+        """ Функция получения матрицы значений частных производных
+            матрицы управления по параметрам
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                theta: np.ndarray
+                    s-вектор параметров
+
+            Returns
+            -------
+                np.ndarray
+                    (s x n x r)-матрица частных производных
+                    матрицы управления по параметрам
+        """
+        return self.B
+
+    def get_H(self, t, theta):
+        """ Функция получения матрицы измерения
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                theta: np.ndarray
+                    s-вектор параметров
+
+            Returns
+            -------
+                np.ndarray
+                    (m x n)-матрица измерения
+        """
+        return self.C
+
+    def get_dHdtheta(self, t, theta):
+        """ Функция получения матрицы значений частных производных
+            матрицы измерения по параметрам
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                theta: np.ndarray
+                    s-вектор параметров
+
+            Returns
+            -------
+                np.ndarray
+                    (s x m x n)-матрица частных производных
+                    матрицы измерения по параметрам
+        """
+        return self.dHdtheta
+
+    def get_R(self, t, theta):
+        """ Функция получения ковариационной матрицы ошибки измерения
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                theta: np.ndarray
+                    s-вектор параметров
+
+            Returns
+            -------
+                np.ndarray
+                    (m x m)-ковариационная матрица ошибки измерения
+        """
+        return self.R
+
+    def get_dRdtheta(self, t, theta):
+        """ Функция получения матрицы значений частных производных
+            ковариационной матрицы ошибки измерения по параметрам
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                theta: np.ndarray
+                    s-вектор параметров
+
+            Returns
+            -------
+                np.ndarray
+                    (s x m x m)-матрица частных производных ковариационной
+                    матрицы ошибки измерения по параметрам
+        """
+        return self.dRdtheta
+
+    def get_inv_R(self, t, theta):
+        """ Функция получения обратной ковариационной матрицы
+            ошибки измерения
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                theta: np.ndarray
+                    s-вектор параметров
+
+            Returns
+            -------
+                np.ndarray
+                    (m x m)-матрица, обратная ковариационной
+                    матрице ошибки измерения
+        """
+        return self.inv_R
+
+    def get_u(self, t):
+        """ Функция получения вектора управления
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени (целое число шагов
+                    от начального момента)
+
+            Returns
+            -------
+                np.ndarray
+                    (r x 1)-вектор управления
+        """
+        return self.U[int(round(t)) % len(self.U)]
+
+    def get_xt0(self):
+        """ Функция получения вектора начального состояния
+
+            Returns
+            -------
+                np.ndarray
+                    (n x 1)-вектор начального состояния
+        """
+        return self.xt0
+
+    def get_dxt0dtheta(self):
+        """ Функция получения матрицы значений частных производных
+            вектора начального состояния по параметрам
+
+            Returns
+            -------
+                np.ndarray
+                    (s x n x 1)-матрица частных производных вектора
+                    начального состояния по параметрам
+        """
+        return self.dxt0dtheta
+
+    # Функции для набора из B векторов параметров (B x s)
+    # -----------------------------------------
+    def get_F_batch(self, t, thetas):
+        """ Функция получения матриц состояния для набора
+            векторов параметров
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                thetas: np.ndarray
+                    (B x s)-матрица векторов параметров
+
+            Returns
+            -------
+                np.ndarray
+                    (B x n x n)-массив матриц состояния
+        """
+        return self.A0 + np.tensordot(thetas, self.A, axes=1)
+
+    def get_dFdtheta_batch(self, t, thetas):
+        """ Функция получения матриц значений частных производных
+            матрицы состояния по параметрам для набора векторов параметров
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                thetas: np.ndarray
+                    (B x s)-матрица векторов параметров
+
+            Returns
+            -------
+                np.ndarray
+                    (B x s x n x n)-массив частных производных
+                    матрицы состояния по параметрам
+        """
+        return np.broadcast_to(self.A, (len(thetas),) + self.A.shape)
+
+    def get_Psi_batch(self, t, thetas):
+        """ Функция получения матриц управления для набора
+            векторов параметров
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                thetas: np.ndarray
+                    (B x s)-матрица векторов параметров
+
+            Returns
+            -------
+                np.ndarray
+                    (B x n x r)-массив матриц управления
+        """
+        return self.B0 + np.tensordot(thetas, self.B, axes=1)
+
+    def get_dPsidtheta_batch(self, t, thetas):
+        """ Функция получения матриц значений частных производных
+            матрицы управления по параметрам для набора векторов параметров
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                thetas: np.ndarray
+                    (B x s)-матрица векторов параметров
+
+            Returns
+            -------
+                np.ndarray
+                    (B x s x n x r)-массив частных производных
+                    матрицы управления по параметрам
+        """
+        return np.broadcast_to(self.B, (len(thetas),) + self.B.shape)
+
+    def get_H_batch(self, t, thetas):
+        """ Функция получения матриц измерения для набора
+            векторов параметров
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                thetas: np.ndarray
+                    (B x s)-матрица векторов параметров
+
+            Returns
+            -------
+                np.ndarray
+                    (B x m x n)-массив матриц измерения
+        """
+        return np.broadcast_to(self.C, (len(thetas),) + self.C.shape)
+
+    def get_dHdtheta_batch(self, t, thetas):
+        """ Функция получения матриц значений частных производных
+            матрицы измерения по параметрам для набора векторов параметров
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                thetas: np.ndarray
+                    (B x s)-матрица векторов параметров
+
+            Returns
+            -------
+                np.ndarray
+                    (B x s x m x n)-массив частных производных
+                    матрицы измерения по параметрам
+        """
+        return np.broadcast_to(self.dHdtheta, (len(thetas),) + self.dHdtheta.shape)
+
+    def get_dRdtheta_batch(self, t, thetas):
+        """ Функция получения матриц значений частных производных
+            ковариационной матрицы ошибки измерения по параметрам
+            для набора векторов параметров
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                thetas: np.ndarray
+                    (B x s)-матрица векторов параметров
+
+            Returns
+            -------
+                np.ndarray
+                    (B x s x m x m)-массив частных производных ковариационной
+                    матрицы ошибки измерения по параметрам
+        """
+        return np.broadcast_to(self.dRdtheta, (len(thetas),) + self.dRdtheta.shape)
+
+    def get_inv_R_batch(self, t, thetas):
+        """ Функция получения обратных ковариационных матриц ошибки
+            измерения для набора векторов параметров
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                thetas: np.ndarray
+                    (B x s)-матрица векторов параметров
+
+            Returns
+            -------
+                np.ndarray
+                    (B x m x m)-массив матриц, обратных ковариационной
+                    матрице ошибки измерения
+        """
+        return np.broadcast_to(self.inv_R, (len(thetas),) + self.inv_R.shape)
+    # -----------------------------------------
+
+
+class SyntheticExtendedModel:
+    """ Расширенная модель для синтетической модели: вектор состояния
+        z = (x, theta) размера n + s, параметры постоянны с точностью до
+        малого шума с ковариационной матрицей q I
+
+        Методы имеют те же параметры и значения, что и одноименные
+        функции position_control_system.extended_model.
+    """
+
+    # Признак стационарности модели: матрицы модели не зависят от времени
+    TIME_INVARIANT = True
+
+    def __init__(self, conventional, q=1e-6, p_state=1e-2, p_theta=1.):
+        """ Parameters
+            ----------
+                conventional: SyntheticConventionalModel
+                    обычная модель
+                q: float
+                    дисперсия шума параметров
+                p_state: float
+                    начальная дисперсия оценок состояния
+                p_theta: float
+                    начальная дисперсия оценок параметров
+        """
+        self.model = conventional
+        n, m, r, s = conventional.n, conventional.m, conventional.r, conventional.s
+        self.n, self.m, self.r, self.s = n, m, r, s
+        self.G = np.vstack((np.zeros(shape=(n, s)), np.eye(s)))
+        self.Q = q * np.eye(s)
+        self.P0 = np.diag(np.concatenate((np.full(n, p_state), np.full(s, p_theta))))
+        self.H = np.hstack((conventional.C, np.zeros(shape=(m, s))))
+        for value in (self.G, self.Q, self.P0, self.H):
+            value.flags.writeable = False
+
+    def get_data(self) -> tuple[int, int, int]:
+        """ Функция получения общей информации об
+            исследуемой расширенной модели
+
+            Returns
+            -------
+                n, m, r: int, int, int
+                    размер вектора состояний,
+                    размер вектора измерений,
+                    размер вектора управления.
+        """
+        return self.n + self.s, self.m, self.r
+
+    def get_f(self, t, z):
+        """ Функция получения вектора правой части
+            расширенной модели (F(theta) x, theta)
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                z: np.ndarray
+                    (n + s)-вектор состояния расширенной модели
+
+            Returns
+            -------
+                np.ndarray
+                    ((n + s) x 1)-вектор правой части
+                    расширенной модели
+        """
+        n = self.n
+        F, _ = self.model._matrices(z[n:])
+        return np.reshape(np.concatenate((F @ z[:n], z[n:])), (-1, 1))
+
+    def get_F(self, t, z):
+        """ Функция получения матрицы частных производных
+            вектора правой части f + psi u расширенной модели
+            по каждому состоянию
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                z: np.ndarray
+                    (n + s)-вектор состояния расширенной модели
+
+            Returns
+            -------
+                np.ndarray
+                    ((n + s) x (n + s))-матрица частных производных
+                    вектора правой части по каждому состоянию
+        """
+        n, s = self.n, self.s
+        F, _ = self.model._matrices(z[n:])
+        J = np.eye(n + s)
+        J[:n, :n] = F
+        J[:n, n:] = (self.model.A @ z[:n]).T + (self.model.B @ self.get_u(t))[:, :, 0].T
+        return J
+
+    def get_psi(self, t, z):
+        """ Функция получения матрицы управления
+            расширенной модели (Psi(theta), 0)
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                z: np.ndarray
+                    (n + s)-вектор состояния расширенной модели
+
+            Returns
+            -------
+                np.ndarray
+                    ((n + s) x r)-матрица управления
+        """
+        _, Psi = self.model._matrices(z[self.n:])
+        return np.vstack((Psi, np.zeros(shape=(self.s, self.r))))
+
+    def get_h(self, t, z):
+        """ Функция получения вектора измерения
+            расширенной модели
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                z: np.ndarray
+                    (n + s)-вектор состояния расширенной модели
+
+            Returns
+            -------
+                np.ndarray
+                    m-вектор измерения
+        """
+        return self.model.C @ z[:self.n]
+
+    def get_H(self, t, z):
+        """ Функция получения матрицы частных производных
+            вектора измерения расширенной модели
+            по каждому состоянию
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                z: np.ndarray
+                    (n + s)-вектор состояния расширенной модели
+
+            Returns
+            -------
+                np.ndarray
+                    (m x (n + s))-матрица частных производных
+                    вектора измерения по каждому состоянию
+        """
+        return self.H
+
+    def get_u(self, t):
+        """ Функция получения вектора управления
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени (целое число шагов
+                    от начального момента)
+
+            Returns
+            -------
+                np.ndarray
+                    (r x 1)-вектор управления
+        """
+        return self.model.get_u(t)
+
+    def get_R(self, t, z):
+        """ Функция получения ковариационной матрицы ошибки измерения
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                z: np.ndarray
+                    (n + s)-вектор состояния расширенной модели
+
+            Returns
+            -------
+                np.ndarray
+                    (m x m)-ковариационная матрица ошибки измерения
+        """
+        return self.model.R
+
+    def get_G(self, t):
+        """ Функция получения матрицы возмущения
+            расширенной модели
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+
+            Returns
+            -------
+                np.ndarray
+                    ((n + s) x s)-матрица возмущения
+        """
+        return self.G
+
+    def get_Q(self, t):
+        """ Функция получения ковариационной матрицы
+            шума параметров
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+
+            Returns
+            -------
+                np.ndarray
+                    (s x s)-ковариационная матрица шума
+        """
+        return self.Q
+
+    def get_P0(self):
+        """ Функция получения ковариационной матрицы оценки
+            вектора начального состояния расширенной модели
+
+            Returns
+            -------
+                np.ndarray
+                    ((n + s) x (n + s))-ковариационная матрица
+                    вектора начального состояния
+        """
+        return self.P0
+
+    def get_x0(self, theta):
+        """ Функция получения вектора начального состояния
+            расширенной модели
+
+            Parameters
+            ----------
+                theta: np.ndarray
+                    s-вектор параметров
+
+            Returns
+            -------
+                np.ndarray
+                    (n + s)-вектор начального состояния
+        """
+        return np.concatenate((self.model.xt0[:, 0], theta))
+
+    # Функции для набора из B векторов состояния (B x (n + s))
+    # -----------------------------------------
+    def get_f_batch(self, t, Z):
+        """ Функция получения векторов правой части расширенной
+            модели для набора векторов состояния
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                Z: np.ndarray
+                    (B x (n + s))-матрица векторов состояния
+                    расширенной модели
+
+            Returns
+            -------
+                np.ndarray
+                    (B x (n + s))-матрица векторов правой части
+                    расширенной модели
+        """
+        n = self.n
+        f = np.array(Z, dtype=float)
+        f[:, :n] = np.einsum('bij,bj->bi', self.model.get_F_batch(t, Z[:, n:]), Z[:, :n])
+        return f
+
+    def get_F_batch(self, t, Z):
+        """ Функция получения матриц частных производных вектора
+            правой части расширенной модели по каждому состоянию
+            для набора векторов состояния
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                Z: np.ndarray
+                    (B x (n + s))-матрица векторов состояния
+                    расширенной модели
+
+            Returns
+            -------
+                np.ndarray
+                    (B x (n + s) x (n + s))-массив матриц частных производных
+                    вектора правой части по каждому состоянию
+        """
+        n, s = self.n, self.s
+        J = np.tile(np.eye(n + s), (len(Z), 1, 1))
+        J[:, :n, :n] = self.model.get_F_batch(t, Z[:, n:])
+        J[:, :n, n:] = np.einsum('pij,bj->bip', self.model.A, Z[:, :n]) + \
+            (self.model.B @ self.get_u(t))[:, :, 0].T
+        return J
+
+    def get_psi_batch(self, t, Z):
+        """ Функция получения матриц управления расширенной
+            модели для набора векторов состояния
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                Z: np.ndarray
+                    (B x (n + s))-матрица векторов состояния
+                    расширенной модели
+
+            Returns
+            -------
+                np.ndarray
+                    (B x (n + s) x r)-массив матриц управления
+        """
+        psi = np.zeros(shape=(len(Z), self.n + self.s, self.r))
+        psi[:, :self.n] = self.model.get_Psi_batch(t, Z[:, self.n:])
+        return psi
+
+    def get_h_batch(self, t, Z):
+        """ Функция получения векторов измерения расширенной
+            модели для набора векторов состояния
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                Z: np.ndarray
+                    (B x (n + s))-матрица векторов состояния
+                    расширенной модели
+
+            Returns
+            -------
+                np.ndarray
+                    (B x m)-матрица векторов измерения
+        """
+        return Z[:, :self.n] @ self.model.C.T
+
+    def get_H_batch(self, t, Z):
+        """ Функция получения матриц частных производных вектора
+            измерения расширенной модели по каждому состоянию
+            для набора векторов состояния
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                Z: np.ndarray
+                    (B x (n + s))-матрица векторов состояния
+                    расширенной модели
+
+            Returns
+            -------
+                np.ndarray
+                    (B x m x (n + s))-массив матриц частных производных
+                    вектора измерения по каждому состоянию
+        """
+        return np.broadcast_to(self.H, (len(Z),) + self.H.shape)
+
+    def get_R_batch(self, t, Z):
+        """ Функция получения ковариационных матриц ошибки измерения
+            для набора векторов состояния
+
+            Parameters
+            ----------
+                t: float
+                    текущий момент времени
+                Z: np.ndarray
+                    (B x (n + s))-матрица векторов состояния
+                    расширенной модели
+
+            Returns
+            -------
+                np.ndarray
+                    (B x m x m)-массив ковариационных матриц ошибки измерения
+        """
+        return np.broadcast_to(self.model.R, (len(Z),) + self.model.R.shape)
+    # -----------------------------------------
+
+
+class SyntheticCommonData:
+    """ Общие данные синтетической модели: истинные параметры и
+        моменты времени (целые числа шагов)
+    """
+
+    def __init__(self, theta_true):
+        """ Parameters
+            ----------
+                theta_true: np.ndarray
+                    s-вектор истинных параметров
+        """
+        self.theta_true = theta_true
+
+    def get_data_theta(self) -> tuple[int, np.ndarray]:
+        """ Функция получения общей информации о неизвестных параметрах
+
+            Returns
+            -------
+                s, theta_true: int, np.ndarray
+                    размер вектора параметров,
+                    s-вектор истинных параметров.
+        """
+        return len(self.theta_true), self.theta_true.copy()
+
+    def get_t0(self):
+        """ Функция получения начального момента времени
+
+            Returns
+            -------
+                float
+                    начальный момент времени
+        """
+        return 0.
+
+    def get_t_step(self):
+        """ Функция получения шага времени
+
+            Returns
+            -------
+                float
+                    шаг времени
+        """
+        return 1.
+
+    def get_t_next(self, t_prev):
+        """ Функция получения следующего момента времени
+
+            Parameters
+            ----------
+                t_prev: float
+                    предыдущий момент времени
+
+            Returns
+            -------
+                float
+                    следующий момент времени
+        """
+        return t_prev + 1.
+
+
+def make_model(n=10, m=2, r=2, s=5, seed=0, **options) -> Model:
+    """ Функция создания синтетической модели заданного размера
+
+        Parameters
+        ----------
+            n: int
+                размер вектора состояний
+            m: int
+                размер вектора измерений
+            r: int
+                размер вектора управления
+            s: int
+                размер вектора параметров
+            seed: int
+                начальное значение генератора случайных чисел
+            options:
+                прочие параметры SyntheticConventionalModel
+
+        Returns
+        ----------
+            Model
+                модель с обычной, расширенной моделями и общими данными
+    """
+    conventional = SyntheticConventionalModel(n, m, r, s, seed, **options)
+    return Model('synthetic', conventional, SyntheticExtendedModel(conventional),
+                 SyntheticCommonData(conventional.theta_true),
+                 dict(options, n=n, m=m, r=r, s=s, seed=seed))
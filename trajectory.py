@@ -0,0 +1,63 @@
+import numpy as np
+
+
+def collect_trajectory(init_theta, estimates, N=None, every=1, maxlen=None) -> np.ndarray:
+    """ Функция сохранения оценок параметров, получаемых от генератора
+        оценок, в заранее выделенный массив
+
+        Сохраняется каждая every-ая оценка, начиная с начального значения.
+        Если задано maxlen, хранятся только последние maxlen сохраненных
+        оценок (кольцевой буфер), и объем памяти не зависит от количества
+        наблюдений.
+
+        Parameters
+        ----------
+            init_theta: np.ndarray
+                s-вектор начальных значений параметров
+            estimates: iterator
+                генератор s-векторов оценок параметров после
+                каждого наблюдения
+            N: int
+                количество наблюдений для выделения памяти (если не задано,
+                массив увеличивается вдвое при заполнении)
+            every: int
+                шаг прореживания оценок
+            maxlen: int
+                размер кольцевого буфера (None - хранить все оценки)
+
+        Returns
+        ----------
+            theta_est: np.ndarray
+                K x s-вектор сохраненных оценок параметров в порядке
+                поступления; строка j отвечает оценке после j * every
+                наблюдений (при maxlen - последним сохраненным оценкам)
+    """
+
+    # Блок подготовки
+    # -----------------------------------------
+    init_theta = np.asarray(init_theta)
+    if maxlen is not None:
+        size = maxlen
+    elif N is not None:
+        size = N // every + 1
+    else:
+        size = 1024
+    theta_est = np.empty(shape=(size,) + init_theta.shape)
+    theta_est[0] = init_theta
+    K = 1
+    # -----------------------------------------
+
+    for k, theta in enumerate(estimates, 1):
+        if k % every:
+            continue
+        if maxlen is None and K == len(theta_est):
+            theta_est = np.concatenate((theta_est, np.empty_like(theta_est)))
+        theta_est[K % size if maxlen is not None else K] = theta
+        K += 1
+
+    # Упорядочивание кольцевого буфера
+    if maxlen is not None:
+        if K <= size:
+            return theta_est[:K]
+        return np.roll(theta_est, -(K % size), axis=0)
+    return theta_est[:K]